@@ -3,11 +3,45 @@ import os
 import time
 import json
 import argparse
-from collections import deque, OrderedDict, defaultdict
+import operator
+import functools
+import contextlib
+import cProfile
+import struct
+import mmap
+import pickle
+import zlib
+import gzip
+import bz2
+import lzma
+import random
+import math
+import hashlib
+import sqlite3
+import tempfile
+import platform
+from array import array
+from collections import deque, OrderedDict, defaultdict, Counter
+from heapq import heappush, heappop, heapify
+from itertools import repeat, compress, accumulate, islice
 from datetime import datetime
-from tqdm import tqdm
 import threading
 import queue
+import socket
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, get_context
+try:
+    import resource
+except ImportError:  # No disponible en Windows
+    resource = None
+try:
+    import zstandard
+except ImportError:  # Opcional: solo para trazas .zst
+    zstandard = None
+
+# Súbela cuando cambie el resultado de alguna simulación: invalida los resultados del almacén
+SIMULATOR_VERSION = '2.0'
 
 class Colors:
     HEADER = '\033[95m'
@@ -82,313 +116,3853 @@ def print_table(headers, rows, title=None, colors=None):
     line = "┌" + "┬".join("─" * width for width in col_widths) + "┐"
     print(f"{Colors.BOLD}{Colors.CYAN}{line}{Colors.ENDC}")
     
-    header_line = "│"
-    for i, (header, width, color) in enumerate(zip(headers, col_widths, colors)):
-        header_line += f"{color}{str(header).center(width)}{Colors.ENDC}│"
-    print(header_line)
+    header_line = "│"
+    for i, (header, width, color) in enumerate(zip(headers, col_widths, colors)):
+        header_line += f"{color}{str(header).center(width)}{Colors.ENDC}│"
+    print(header_line)
+    
+    line = "├" + "┼".join("─" * width for width in col_widths) + "┤"
+    print(f"{Colors.BOLD}{Colors.CYAN}{line}{Colors.ENDC}")
+    
+    for row in rows:
+        row_line = "│"
+        for i, (cell, width) in enumerate(zip(row, col_widths)):
+            color = colors[i] if i < len(colors) else Colors.WHITE
+            cell_str = str(cell).rjust(width-1) + " "
+            row_line += f"{color}{cell_str}{Colors.ENDC}│"
+        print(row_line)
+  
+    line = "└" + "┴".join("─" * width for width in col_widths) + "┘"
+    print(f"{Colors.BOLD}{Colors.CYAN}{line}{Colors.ENDC}")
+
+def print_progress_bar(current, total, description="Progreso", width=50):
+    """Barra de progreso"""
+    progress = int(width * current / total)
+    bar = "█" * progress + "░" * (width - progress)
+    percentage = (current / total) * 100
+    
+    print(f"\r{Colors.BOLD}{Colors.CYAN}{description}: {Colors.YELLOW}[{bar}] {percentage:.1f}% ({current:,}/{total:,}){Colors.ENDC}", end="", flush=True)
+
+# ═══════════════════════ Perfilado ═══════════════════════
+
+class _TimedPhase:
+    __slots__ = ['timer', 'name', 'wall', 'cpu']
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+    
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.timer.add(self.name, time.perf_counter() - self.wall, time.process_time() - self.cpu)
+        return False
+
+class PhaseTimer:
+    """Tiempo de pared y de CPU acumulado por fase (lectura, parseo, preprocesamiento, simulación...)
+
+    Deshabilitado, phase() devuelve siempre el mismo contexto vacío: el costo es una
+    llamada por bloque o por simulación, nunca por referencia.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.phases = {}
+    
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        return _TimedPhase(self, name)
+    
+    def add(self, name, wall, cpu, calls=1):
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [wall, cpu, calls]
+        else:
+            entry[0] += wall
+            entry[1] += cpu
+            entry[2] += calls
+    
+    def summary(self):
+        return {name: {'wall_time': wall, 'cpu_time': cpu, 'calls': calls}
+                for name, (wall, cpu, calls) in self.phases.items()}
+
+NULL_PHASE = contextlib.nullcontext()
+DISABLED_TIMER = PhaseTimer(enabled=False)
+
+def histogram_quantile(histogram, quantile):
+    """Cota superior del bucket log2 que contiene el cuantil pedido"""
+    total = sum(histogram)
+    if total == 0:
+        return 0
+    target = quantile * total
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return (1 << bucket) - 1
+    return (1 << (len(histogram) - 1)) - 1
+
+class ConfigurationProfile(PhaseTimer):
+    """Perfil de una simulación: fases, selección de víctima y latencia de los fallos de página"""
+
+    def __init__(self):
+        super().__init__()
+        self.victim_selections = 0
+        self.victim_ns = 0
+        self.faults = 0
+        self.fault_ns = 0
+        self.fault_histogram = [0] * 64  # buckets log2 de nanosegundos
+    
+    def instrument(self, manager):
+        """Envuelve los hooks ya enlazados del gestor; solo se usa con --profile"""
+        profile = self
+        handle_page_fault = type(manager).handle_page_fault.__get__(manager)
+        histogram = self.fault_histogram
+        perf_counter_ns = time.perf_counter_ns
+        
+        def timed_page_fault(page_num, operation, current_pos=None):
+            start = perf_counter_ns()
+            frame_num = handle_page_fault(page_num, operation, current_pos)
+            elapsed = perf_counter_ns() - start
+            profile.faults += 1
+            profile.fault_ns += elapsed
+            histogram[elapsed.bit_length()] += 1
+            return frame_num
+        
+        manager.policy_evict = self.timed_victim_selection(manager.policy_evict)
+        manager.handle_page_fault = timed_page_fault
+    
+    def timed_victim_selection(self, evict):
+        """Envuelve un hook de selección de víctima para contar y medir cada llamada"""
+        profile = self
+        perf_counter_ns = time.perf_counter_ns
+        
+        def timed_evict(*args):
+            start = perf_counter_ns()
+            victim = evict(*args)
+            profile.victim_ns += perf_counter_ns() - start
+            profile.victim_selections += 1
+            return victim
+        return timed_evict
+    
+    def summary(self):
+        latency = {}
+        for bucket, count in enumerate(self.fault_histogram):
+            if count:
+                latency[f"{(1 << bucket) >> 1}-{(1 << bucket) - 1}"] = count
+        return {
+            'phases': super().summary(),
+            'victim_selections': self.victim_selections,
+            'victim_time': self.victim_ns / 1e9,
+            'victim_avg_ns': self.victim_ns / self.victim_selections if self.victim_selections else 0,
+            'faults': self.faults,
+            'fault_time': self.fault_ns / 1e9,
+            'fault_latency_ns': latency,
+            'fault_latency_p50_ns': histogram_quantile(self.fault_histogram, 0.5),
+            'fault_latency_p99_ns': histogram_quantile(self.fault_histogram, 0.99)
+        }
+
+class SamplingProfiler(threading.Thread):
+    """Muestrea la pila del hilo principal cada interval segundos; se guarda en formato folded (flamegraph)"""
+
+    def __init__(self, interval=0.005):
+        super().__init__(name="vmsim-sampler", daemon=True)
+        self.interval = interval
+        self.thread_id = threading.main_thread().ident
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+    
+    def run(self):
+        current_frames = sys._current_frames
+        while not self.stopped.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+    
+    def stop(self):
+        self.stopped.set()
+        self.join()
+    
+    def dump_stats(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class MemoryReference:
+    __slots__ = ['address', 'operation', 'page_num']
+    
+    def __init__(self, address, operation):
+        self.address = address
+        self.operation = operation
+        self.page_num = address >> 12
+
+# Tabla byte -> 8 operaciones ('R'/'W'), bit menos significativo primero
+_OPS_BYTE_TABLE = [''.join('W' if (b >> i) & 1 else 'R' for i in range(8)) for b in range(256)]
+
+TRACE_CACHE_SUFFIX = '.vmtrace'
+TRACE_CACHE_MAGIC = b'VMTRACE1'
+# magic, tamaño del archivo fuente, mtime_ns del archivo fuente, número de referencias
+TRACE_CACHE_HEADER = struct.Struct('<8sQqQ')
+
+class DecodedTrace:
+    """Traza decodificada una sola vez: páginas en array('Q') y bitmap R/W empaquetado"""
+    __slots__ = ['pages', 'ops', 'count', 'source']
+
+    def __init__(self, pages, ops, source=None):
+        self.pages = pages
+        self.ops = ops
+        self.count = len(pages)
+        self.source = source
+
+    def is_write(self, index):
+        return (self.ops[index >> 3] >> (index & 7)) & 1
+
+    def write_count(self):
+        return int.from_bytes(self.ops, 'little').bit_count()
+
+    def operations(self, start=0, end=None):
+        """Desempaqueta el bitmap como cadena de 'R'/'W' para el rango [start, end)"""
+        if end is None:
+            end = self.count
+        first = start >> 3
+        last = (end + 7) >> 3
+        unpacked = ''.join([_OPS_BYTE_TABLE[b] for b in self.ops[first:last]])
+        offset = first << 3
+        return unpacked[start - offset:end - offset]
+
+_OPS_PACK_TABLE = {ops: b for b, ops in enumerate(_OPS_BYTE_TABLE)}
+_VALID_OPS = frozenset((b'R', b'W'))
+
+TRACE_BLOCK_SIZE = 4 * 1024 * 1024  # bytes por bloque del lector mmap
+ASID_SHIFT = 52                     # clave de página con ASID: (asid << 52) | (dirección >> 12)
+MAX_ASID = (1 << (64 - ASID_SHIFT)) - 1
+BASE_PAGE_SHIFT = 12                # la traza decodificada guarda páginas de 4 KiB
+BASE_PAGE_SIZE = 1 << BASE_PAGE_SHIFT
+PAGE_KEY_MASK = (1 << ASID_SHIFT) - 1
+ASID_KEY_MASK = ((1 << 64) - 1) ^ PAGE_KEY_MASK
+PAGE_SIZE_UNITS = {'K': 10, 'M': 20, 'G': 30, 'T': 40}
+
+def parse_page_size(text):
+    """'4K', '16K', '2M', '1G' o un número de bytes -> bytes (potencia de 2, mínimo 4 KiB)"""
+    value = text.strip().upper()
+    for suffix in ('IB', 'B'):
+        if value.endswith(suffix) and value[:-len(suffix)][-1:] in PAGE_SIZE_UNITS:
+            value = value[:-len(suffix)]
+    if value[-1:] in PAGE_SIZE_UNITS:
+        size = int(value[:-1]) << PAGE_SIZE_UNITS[value[-1]]
+    else:
+        size = int(value)
+    if size < BASE_PAGE_SIZE or size & (size - 1):
+        raise ValueError(f"El tamaño de página debe ser una potencia de 2 de al menos 4K: {text}")
+    return size
+
+def format_page_size(size):
+    for unit, shift in sorted(PAGE_SIZE_UNITS.items(), key=lambda item: item[1], reverse=True):
+        if size >= 1 << shift and size % (1 << shift) == 0:
+            return f"{size >> shift}{unit}"
+    return str(size)
+
+def coarsen_pages(pages, shift):
+    """Páginas de 4 KiB -> páginas de 4 KiB << shift, conservando el ASID de la clave"""
+    if shift == 0:
+        return pages
+    if not len(pages) or max(pages) <= PAGE_KEY_MASK:
+        return array('Q', map(shift.__rrshift__, pages))
+    return array('Q', map(operator.or_, map(operator.and_, pages, repeat(ASID_KEY_MASK)),
+                          map(shift.__rrshift__, map(operator.and_, pages, repeat(PAGE_KEY_MASK)))))
+
+def coarsen_trace(trace, shift):
+    """La misma traza vista con páginas más grandes (mismas posiciones y operaciones)"""
+    if shift == 0:
+        return trace
+    return DecodedTrace(coarsen_pages(trace.pages, shift), trace.ops, trace.source)
+
+def page_size_statistics(page_size, frames, unique_pages, tlb_entries):
+    """Memoria, footprint y alcance del TLB para un tamaño de página"""
+    footprint = unique_pages * page_size
+    reach = tlb_entries * page_size
+    return {
+        'page_size': page_size,
+        'memory_bytes': frames * page_size,
+        'footprint_bytes': footprint,
+        'tlb_reach_bytes': reach,
+        'tlb_reach_coverage': min(1.0, reach / footprint) if footprint else 1.0
+    }
+
+def config_label(policy, page_size=BASE_PAGE_SIZE):
+    """Nombre de la política con el tamaño de página si no es el de 4 KiB"""
+    return policy if page_size == BASE_PAGE_SIZE else f"{policy}@{format_page_size(page_size)}"
+
+TRACE_SAMPLE_COUNT = 16
+TRACE_SAMPLE_SIZE = 64 * 1024
+
+def check_asids(asids):
+    if asids and max(asids) > MAX_ASID:
+        raise ValueError(f"ASID fuera de rango (máximo {MAX_ASID}): {max(asids)}")
+
+def parse_trace_block(block):
+    """Convierte un bloque de líneas completas en (array de páginas, cadena de operaciones)
+
+    Las líneas son "<dirección> <R|W>" o "<dirección> <R|W> <asid>"; con ASID la página
+    se empaqueta como (asid << ASID_SHIFT) | página.
+    """
+    tokens = block.split()
+    lines = block.count(b'\n') + (0 if block.endswith(b'\n') else 1)
+
+    if len(tokens) == 2 * lines and _VALID_OPS.issuperset(tokens[1::2]):
+        # Camino rápido: todas las líneas son "<dirección> <R|W>", conversión en bloque
+        pages = array('Q', map((12).__rrshift__, map(int, tokens[0::2], repeat(16))))
+        return pages, b''.join(tokens[1::2]).decode('ascii')
+
+    if len(tokens) == 3 * lines and _VALID_OPS.issuperset(tokens[1::3]):
+        # Camino rápido con columna de ASID
+        asids = list(map(int, tokens[2::3]))
+        check_asids(asids)
+        pages = array('Q', map(operator.or_, map(ASID_SHIFT.__rlshift__, asids),
+                               map((12).__rrshift__, map(int, tokens[0::3], repeat(16)))))
+        return pages, b''.join(tokens[1::3]).decode('ascii')
+
+    # Camino lento: hay líneas vacías o mal formadas en el bloque
+    pages = array('Q')
+    ops = []
+    for line in block.splitlines():
+        parts = line.split()
+        if len(parts) == 2 or (len(parts) == 3 and parts[2].isdigit()):
+            asid = int(parts[2]) if len(parts) == 3 else 0
+            check_asids([asid])
+            pages.append((asid << ASID_SHIFT) | (int(parts[0], 16) >> 12))
+            ops.append('W' if parts[1] == b'W' else 'R')
+    return pages, ''.join(ops)
+
+# ═══════════════════════ Entrada comprimida y stdin ═══════════════════════
+
+STDIN_TRACE = '-'
+TRACE_COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.lzma': 'xz', '.zst': 'zstd'}
+TRACE_PIPELINE_DEPTH = 4            # bloques en vuelo entre etapas de la tubería
+TRACE_ESTIMATE_PREFIX = 1024 * 1024  # texto descomprimido para estimar el tamaño total
+
+def trace_compression(filepath):
+    """Formato de compresión según la extensión, o None para texto plano"""
+    return TRACE_COMPRESSION_SUFFIXES.get(os.path.splitext(filepath)[1].lower())
+
+def is_sequential_trace(filepath):
+    """Las trazas comprimidas y stdin solo se pueden leer de principio a fin (sin mmap)"""
+    return filepath == STDIN_TRACE or trace_compression(filepath) is not None
+
+def open_decompressor(raw, compression):
+    """Flujo descomprimido sobre un archivo binario abierto (no lo cierra al salir)"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(raw, 'rb')
+    if compression == 'xz':
+        return lzma.LZMAFile(raw, 'rb')
+    if zstandard is None:
+        raise ImportError("Las trazas .zst necesitan el paquete zstandard (pip install zstandard)")
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+
+@contextlib.contextmanager
+def open_trace_stream(filepath):
+    """Abre la traza como flujo binario secuencial: stdin, texto plano o comprimido"""
+    if filepath == STDIN_TRACE:
+        yield sys.stdin.buffer
+        return
+    with open(filepath, 'rb') as raw:
+        compression = trace_compression(filepath)
+        if compression is None:
+            yield raw
+            return
+        with open_decompressor(raw, compression) as stream:
+            yield stream
+
+def estimate_trace_size(filepath):
+    """Bytes de texto de la traza; en comprimidas se extrapola la razón de un prefijo (0 si no se sabe)"""
+    if filepath == STDIN_TRACE:
+        return 0
+    size = os.path.getsize(filepath)
+    compression = trace_compression(filepath)
+    if compression is None or size == 0:
+        return size
+    
+    with open(filepath, 'rb') as raw, open_decompressor(raw, compression) as stream:
+        sample = stream.read(TRACE_ESTIMATE_PREFIX)
+        consumed = raw.tell()
+    if len(sample) < TRACE_ESTIMATE_PREFIX or not consumed:
+        return len(sample)
+    return int(size * len(sample) / consumed)
+
+def _pipeline_put(channel, item, stop):
+    """put() que se rinde si el consumidor abandonó la tubería"""
+    while not stop.is_set():
+        try:
+            channel.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+class TraceReaderStage(threading.Thread):
+    """Primera etapa: lee y descomprime bloques de líneas completas (zlib, bz2, lzma y zstd liberan el GIL)"""
+
+    def __init__(self, filepath, block_size, start_offset, output, stop):
+        super().__init__(name='vmsim-trace-reader', daemon=True)
+        self.filepath = filepath
+        self.block_size = block_size
+        self.start_offset = start_offset
+        self.output = output
+        self.stop = stop
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.blocks = 0
+    
+    def run(self):
+        try:
+            self.read_blocks()
+        except BaseException as e:
+            _pipeline_put(self.output, e, self.stop)
+    
+    def read_blocks(self):
+        perf_counter = time.perf_counter
+        thread_time = time.thread_time
+        with open_trace_stream(self.filepath) as stream:
+            # Reanudar: el offset de un checkpoint cuenta bytes de texto descomprimido
+            remaining = self.start_offset
+            while remaining > 0:
+                skipped = len(stream.read(min(remaining, self.block_size)))
+                if not skipped:
+                    break
+                remaining -= skipped
+            
+            offset = self.start_offset
+            pending = b''
+            while True:
+                start_time = perf_counter()
+                start_cpu = thread_time()
+                data = stream.read(self.block_size)
+                if data:
+                    data = pending + data
+                    newline = data.rfind(b'\n') + 1
+                    if newline:
+                        pending = data[newline:]
+                        data = data[:newline]
+                    else:
+                        # Línea más larga que el bloque
+                        pending, data = data, b''
+                else:
+                    data, pending = pending, b''
+                self.wall += perf_counter() - start_time
+                self.cpu += thread_time() - start_cpu
+                
+                if data:
+                    offset += len(data)
+                    self.blocks += 1
+                    if not _pipeline_put(self.output, (data, offset), self.stop):
+                        return
+                elif not pending:
+                    break
+        _pipeline_put(self.output, None, self.stop)
+
+class TraceParserStage(threading.Thread):
+    """Segunda etapa: convierte los bloques de texto en (páginas, operaciones, offset)"""
+
+    def __init__(self, source, output, stop):
+        super().__init__(name='vmsim-trace-parser', daemon=True)
+        self.source = source
+        self.output = output
+        self.stop = stop
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.blocks = 0
+    
+    def run(self):
+        perf_counter = time.perf_counter
+        thread_time = time.thread_time
+        while not self.stop.is_set():
+            try:
+                item = self.source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None or isinstance(item, BaseException):
+                _pipeline_put(self.output, item, self.stop)
+                return
+            block, offset = item
+            start_time = perf_counter()
+            start_cpu = thread_time()
+            try:
+                pages, ops = parse_trace_block(block)
+            except Exception as e:
+                _pipeline_put(self.output, e, self.stop)
+                return
+            self.wall += perf_counter() - start_time
+            self.cpu += thread_time() - start_cpu
+            self.blocks += 1
+            if not _pipeline_put(self.output, (pages, ops, offset), self.stop):
+                return
+
+def iter_pipelined_trace_batches(filepath, block_size=TRACE_BLOCK_SIZE, start_offset=0, timer=DISABLED_TIMER):
+    """Descompresión -> parseo -> consumidor, en hilos unidos por colas acotadas
+
+    Mientras el consumidor simula un lote, el lector ya descomprime y el parser
+    convierte los siguientes; las colas limitan la memoria a TRACE_PIPELINE_DEPTH
+    bloques por etapa.
+    """
+    stop = threading.Event()
+    blocks = queue.Queue(TRACE_PIPELINE_DEPTH)
+    batches = queue.Queue(TRACE_PIPELINE_DEPTH)
+    reader = TraceReaderStage(filepath, block_size, start_offset, blocks, stop)
+    parser = TraceParserStage(blocks, batches, stop)
+    reader.start()
+    parser.start()
+    try:
+        while True:
+            with timer.phase('pipeline_wait'):
+                item = batches.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        parser.join()
+        reader.join(1.0)  # Un read() bloqueado en stdin no se puede interrumpir
+        timer.add('decompress', reader.wall, reader.cpu, reader.blocks)
+        timer.add('parse', parser.wall, parser.cpu, parser.blocks)
+
+def iter_trace_batches(filepath, block_size=TRACE_BLOCK_SIZE, start_offset=0, timer=DISABLED_TIMER):
+    """Lee la traza con mmap en bloques de tamaño fijo y produce (páginas, operaciones, offset)
+
+    Las trazas comprimidas y stdin pasan por iter_pipelined_trace_batches.
+    """
+    if is_sequential_trace(filepath):
+        yield from iter_pipelined_trace_batches(filepath, block_size, start_offset, timer)
+        return
+    
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return
+
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = start_offset
+        while offset < size:
+            end = min(offset + block_size, size)
+            if end < size:
+                newline = mm.rfind(b'\n', offset, end)
+                if newline == -1:
+                    # Línea más larga que el bloque
+                    newline = mm.find(b'\n', end)
+                end = size if newline == -1 else newline + 1
+
+            with timer.phase('read'):
+                block = mm[offset:end]
+            with timer.phase('parse'):
+                pages, ops = parse_trace_block(block)
+            offset = end
+            yield pages, ops, offset
+
+def estimate_reference_count(filepath, samples=TRACE_SAMPLE_COUNT, sample_size=TRACE_SAMPLE_SIZE):
+    """Estima el número de referencias a partir del tamaño y longitudes de línea muestreadas
+
+    Devuelve 0 si no se puede estimar (stdin).
+    """
+    if is_sequential_trace(filepath):
+        size = estimate_trace_size(filepath)
+        if size == 0:
+            return 0
+        with open_trace_stream(filepath) as stream:
+            sample = stream.read(min(size, TRACE_ESTIMATE_PREFIX))
+        return max(1, int(size * sample.count(b'\n') / len(sample))) if sample else 0
+    
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return 0
+
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if size <= samples * sample_size:
+            return mm[:].count(b'\n') + (0 if mm[size - 1:size] == b'\n' else 1)
+
+        sampled_bytes = 0
+        sampled_lines = 0
+        stride = (size - sample_size) // (samples - 1)
+        for i in range(samples):
+            chunk = mm[i * stride:i * stride + sample_size]
+            sampled_bytes += len(chunk)
+            sampled_lines += chunk.count(b'\n')
+
+    if sampled_lines == 0:
+        return 1
+    return int(size * sampled_lines / sampled_bytes)
+
+class OpsBitmapBuilder:
+    """Empaqueta cadenas de operaciones 'R'/'W' en un bitmap de 1 bit por referencia"""
+    __slots__ = ['bitmap', 'pending']
+
+    def __init__(self):
+        self.bitmap = bytearray()
+        self.pending = ''
+
+    def extend(self, ops):
+        if self.pending:
+            ops = self.pending + ops
+        full = len(ops) & ~7
+        pack = _OPS_PACK_TABLE.__getitem__
+        self.bitmap += bytes(map(pack, [ops[i:i + 8] for i in range(0, full, 8)]))
+        self.pending = ops[full:]
+
+    def finish(self):
+        if self.pending:
+            self.bitmap.append(_OPS_PACK_TABLE[self.pending.ljust(8, 'R')])
+            self.pending = ''
+        return self.bitmap
+
+def decode_trace_file(filepath, show_progress=True, timer=DISABLED_TIMER):
+    """Parsea el archivo de traza de texto una única vez"""
+    pages = array('Q')
+    ops = OpsBitmapBuilder()
+    # En trazas comprimidas el tamaño es una estimación y en stdin se desconoce
+    size = estimate_trace_size(filepath) if show_progress else 0
+
+    for batch_pages, batch_ops, offset in iter_trace_batches(filepath, timer=timer):
+        with timer.phase('pack'):
+            pages.extend(batch_pages)
+            ops.extend(batch_ops)
+        if size:
+            print_progress_bar(min(offset, size), size, "Decodificando traza")
+        elif show_progress:
+            print(f"\r{Colors.BOLD}{Colors.CYAN}Decodificando traza: {Colors.YELLOW}{len(pages):,} referencias{Colors.ENDC}",
+                  end="", flush=True)
+
+    if size:
+        print_progress_bar(size, size, "Decodificando traza")
+    if show_progress and (size or len(pages)):
+        print()
+    return DecodedTrace(pages, ops.finish(), filepath)
+
+def trace_cache_path(filepath):
+    return filepath + TRACE_CACHE_SUFFIX
+
+def load_trace_cache(filepath):
+    """Carga el sidecar .vmtrace si sigue siendo válido para el archivo de texto"""
+    cache_path = trace_cache_path(filepath)
+    if not os.path.exists(cache_path):
+        return None
+
+    source = os.stat(filepath)
+    with open(cache_path, 'rb') as f:
+        header = f.read(TRACE_CACHE_HEADER.size)
+        if len(header) != TRACE_CACHE_HEADER.size:
+            return None
+        magic, size, mtime_ns, count = TRACE_CACHE_HEADER.unpack(header)
+        if magic != TRACE_CACHE_MAGIC or size != source.st_size or mtime_ns != source.st_mtime_ns:
+            return None
+
+        pages = array('Q')
+        pages.frombytes(f.read(count * pages.itemsize))
+        ops = bytearray(f.read((count + 7) >> 3))
+
+    if len(pages) != count or len(ops) != (count + 7) >> 3:
+        return None
+    if sys.byteorder == 'big':
+        pages.byteswap()
+    return DecodedTrace(pages, ops, filepath)
+
+def save_trace_cache(filepath, trace):
+    """Escribe el sidecar .vmtrace junto a la traza de texto"""
+    source = os.stat(filepath)
+    pages = trace.pages
+    if sys.byteorder == 'big':
+        pages = array('Q', pages)
+        pages.byteswap()
+
+    tmp_path = trace_cache_path(filepath) + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(TRACE_CACHE_HEADER.pack(TRACE_CACHE_MAGIC, source.st_size, source.st_mtime_ns, trace.count))
+        f.write(pages.tobytes())
+        f.write(trace.ops)
+    os.replace(tmp_path, trace_cache_path(filepath))
+
+def load_trace(filepath, use_cache=False, timer=DISABLED_TIMER):
+    """Devuelve la traza decodificada, reutilizando el sidecar si está vigente"""
+    start_time = time.time()
+
+    if use_cache:
+        try:
+            with timer.phase('cache_load'):
+                trace = load_trace_cache(filepath)
+        except OSError:
+            trace = None
+        if trace is not None:
+            elapsed = time.time() - start_time
+            print(f"{Colors.OKGREEN}✅ Traza cargada desde {trace_cache_path(filepath)} en {elapsed:.2f} segundos{Colors.ENDC}")
+            return trace
+
+    trace = decode_trace_file(filepath, timer=timer)
+    elapsed = time.time() - start_time
+    print(f"{Colors.OKGREEN}✅ Traza decodificada en {elapsed:.2f} segundos{Colors.ENDC}")
+
+    if use_cache:
+        try:
+            save_trace_cache(filepath, trace)
+            print(f"{Colors.OKGREEN}💾 Caché binaria guardada en: {trace_cache_path(filepath)}{Colors.ENDC}")
+        except OSError as e:
+            print(f"{Colors.WARNING}⚠️  No se pudo guardar la caché binaria: {e}{Colors.ENDC}")
+    return trace
+
+# ═══════════════════════ Políticas de reemplazo ═══════════════════════
+
+REPLACEMENT_POLICIES = {}
+
+def register_policy(name):
+    """Decorador que registra una clase de política bajo el nombre usado en --policies"""
+    def decorator(policy_class):
+        policy_class.name = name
+        REPLACEMENT_POLICIES[name] = policy_class
+        return policy_class
+    return decorator
+
+def create_policy(name, frame_count):
+    try:
+        policy_class = REPLACEMENT_POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Política de reemplazo desconocida: {name}")
+    return policy_class(frame_count)
+
+class ReplacementPolicy:
+    """Interfaz de política: on_hit/on_insert actualizan su estado y evict elige el frame víctima"""
+    __slots__ = ['frame_count']
+    name = None
+    requires_trace = False  # True si necesita la traza completa antes de simular (OPT)
+    transient = ()          # slots que no se guardan en los checkpoints (se recalculan en prepare)
+
+    def __getstate__(self):
+        state = {}
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                if slot not in self.transient and hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        return state
+
+    def __setstate__(self, state):
+        for slot in self.transient:
+            setattr(self, slot, None)
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def __init__(self, frame_count):
+        self.frame_count = frame_count
+
+    def prepare(self, trace):
+        """Preprocesamiento opcional con la traza decodificada"""
+
+    def adopt_preparation(self, prepared):
+        """Reutiliza el preprocesamiento de otra instancia ya preparada con la misma traza"""
+
+    def on_hit(self, page_num, frame_num, pos):
+        """Acierto sobre una página residente"""
+
+    def on_insert(self, page_num, frame_num, pos):
+        """Página cargada en un frame tras un fallo"""
+
+    def evict(self, page_num, pos):
+        """Elige el frame a liberar para cargar page_num; devuelve el número de frame"""
+        raise NotImplementedError
+
+    def on_remove(self, page_num, frame_num):
+        """Página liberada por el gestor sin pasar por evict (asignación variable)"""
+        raise NotImplementedError
+
+    def attach_storage(self, frame_dirty, write_back):
+        """Bits de sucio por frame del gestor y su escritura asíncrona (None sin --write-queue)"""
+
+@register_policy("FIFO")
+class FIFOPolicy(ReplacementPolicy):
+    __slots__ = ['queue', 'stale']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.queue = deque()
+        self.stale = {}  # frame -> entradas obsoletas en la cola (frames liberados con on_remove)
+
+    def on_insert(self, page_num, frame_num, pos):
+        self.queue.append(frame_num)
+
+    def evict(self, page_num, pos):
+        queue = self.queue
+        stale = self.stale
+        frame_num = queue.popleft()
+        # Las entradas obsoletas de un frame siempre preceden a la vigente
+        while stale and frame_num in stale:
+            if stale[frame_num] == 1:
+                del stale[frame_num]
+            else:
+                stale[frame_num] -= 1
+            frame_num = queue.popleft()
+        return frame_num
+
+    def on_remove(self, page_num, frame_num):
+        self.stale[frame_num] = self.stale.get(frame_num, 0) + 1
+
+@register_policy("LRU")
+class LRUPolicy(ReplacementPolicy):
+    __slots__ = ['order']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.order = OrderedDict()  # página -> frame, de menos a más reciente
+
+    def on_hit(self, page_num, frame_num, pos):
+        self.order.move_to_end(page_num)
+
+    def on_insert(self, page_num, frame_num, pos):
+        self.order[page_num] = frame_num
+
+    def evict(self, page_num, pos):
+        return self.order.popitem(last=False)[1]
+
+    def on_remove(self, page_num, frame_num):
+        del self.order[page_num]
+
+@register_policy("LFU")
+class LFUPolicy(ReplacementPolicy):
+    __slots__ = ['counter', 'buckets', 'freq_heap', 'freq_in_heap']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        # Contador histórico por página (no se reinicia al expulsarla)
+        self.counter = {}
+        # frecuencia -> {página: frame} de residentes en orden de último acceso
+        self.buckets = {}
+        self.freq_heap = []
+        self.freq_in_heap = set()
+
+    def _promote(self, page_num, frame_num, freq):
+        bucket = self.buckets.get(freq)
+        if bucket is None:
+            bucket = self.buckets[freq] = OrderedDict()
+        if freq not in self.freq_in_heap:
+            self.freq_in_heap.add(freq)
+            heappush(self.freq_heap, freq)
+        bucket[page_num] = frame_num
+
+    def on_hit(self, page_num, frame_num, pos):
+        freq = self.counter[page_num]
+        del self.buckets[freq][page_num]
+        self.counter[page_num] = freq + 1
+        self._promote(page_num, frame_num, freq + 1)
+
+    def on_insert(self, page_num, frame_num, pos):
+        freq = self.counter.get(page_num, 0) + 1
+        self.counter[page_num] = freq
+        self._promote(page_num, frame_num, freq)
+
+    def evict(self, page_num, pos):
+        # Menor frecuencia y, en caso de empate, el acceso más antiguo
+        buckets = self.buckets
+        freq_heap = self.freq_heap
+        while freq_heap:
+            bucket = buckets.get(freq_heap[0])
+            if bucket:
+                return bucket.popitem(last=False)[1]
+            self.freq_in_heap.discard(heappop(freq_heap))
+        raise RuntimeError("LFU sin páginas residentes")
+
+    def on_remove(self, page_num, frame_num):
+        del self.buckets[self.counter[page_num]][page_num]
+
+@register_policy("CLOCK")
+class ClockPolicy(ReplacementPolicy):
+    __slots__ = ['bits', 'next_frame', 'prev_frame', 'head', 'tail', 'anchor']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        # Arreglo circular de frames con bit de referencia, más una lista enlazada de
+        # frames en orden de carga (el orden que recorre la manecilla)
+        self.bits = bytearray(frame_count)
+        self.next_frame = array('l', [-1]) * frame_count
+        self.prev_frame = array('l', [-1]) * frame_count
+        self.head = -1
+        self.tail = -1
+        # La manecilla arranca en el frame que sigue al ancla (-1 = cabeza de la lista)
+        self.anchor = -1
+
+    def on_hit(self, page_num, frame_num, pos):
+        self.bits[frame_num] = 1
+
+    def on_insert(self, page_num, frame_num, pos):
+        self.bits[frame_num] = 1
+        self.prev_frame[frame_num] = self.tail
+        self.next_frame[frame_num] = -1
+        if self.tail == -1:
+            self.head = frame_num
+        else:
+            self.next_frame[self.tail] = frame_num
+        self.tail = frame_num
+
+    def evict(self, page_num, pos):
+        bits = self.bits
+        next_frame = self.next_frame
+        frame_num = next_frame[self.anchor] if self.anchor != -1 else -1
+        if frame_num == -1:
+            frame_num = self.head
+
+        while bits[frame_num]:
+            bits[frame_num] = 0
+            frame_num = next_frame[frame_num]
+            if frame_num == -1:
+                frame_num = self.head
+
+        # El frame víctima sale de la lista y se reinsertará al final con la página nueva;
+        # la manecilla queda una posición después del sucesor, como al avanzar el índice
+        # sobre la lista de páginas en orden de carga
+        following = self._unlink(frame_num)
+        self.anchor = following
+        return frame_num
+
+    def _unlink(self, frame_num):
+        prev_frame = self.prev_frame[frame_num]
+        following = self.next_frame[frame_num]
+        if prev_frame == -1:
+            self.head = following
+        else:
+            self.next_frame[prev_frame] = following
+        if following == -1:
+            self.tail = prev_frame
+        else:
+            self.prev_frame[following] = prev_frame
+        return following
+
+    def on_remove(self, page_num, frame_num):
+        self.bits[frame_num] = 0
+        if self.anchor == frame_num:
+            # La manecilla sigue apuntando al sucesor del frame liberado
+            self.anchor = self.prev_frame[frame_num]
+        self._unlink(frame_num)
+
+@register_policy("OPT")
+class OPTPolicy(ReplacementPolicy):
+    __slots__ = ['next_use', 'heap', 'resident_next', 'loads']
+    requires_trace = True
+    transient = ('next_use',)
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.next_use = None
+        self.heap = []           # max-heap (-siguiente uso, orden de carga, página, frame) con borrado perezoso
+        self.resident_next = {}  # página residente -> (siguiente uso vigente, orden de carga)
+        self.loads = 0
+
+    def prepare(self, trace):
+        # Una sola pasada hacia atrás: next_use[i] = siguiente posición de pages[i]
+        self.next_use = compute_next_use(trace.pages)
+
+    def adopt_preparation(self, prepared):
+        self.next_use = prepared.next_use
+
+    def _push(self, page_num, frame_num, pos, load_order):
+        next_use = self.next_use[pos]
+        resident_next = self.resident_next
+        resident_next[page_num] = (next_use, load_order)
+        heap = self.heap
+        heappush(heap, (-next_use, load_order, page_num, frame_num))
+
+        # Compactar cuando las entradas obsoletas dominan el heap
+        if len(heap) > 4 * self.frame_count + 64:
+            heap[:] = [entry for entry in heap if resident_next.get(entry[2]) == (-entry[0], entry[1])]
+            heapify(heap)
+
+    def on_hit(self, page_num, frame_num, pos):
+        self._push(page_num, frame_num, pos, self.resident_next[page_num][1])
+
+    def on_insert(self, page_num, frame_num, pos):
+        # Entre páginas sin uso futuro se desempata por orden de carga
+        self.loads += 1
+        self._push(page_num, frame_num, pos, self.loads)
+
+    def evict(self, page_num, pos):
+        # Víctima: la página residente cuyo siguiente uso está más lejos
+        heap = self.heap
+        resident_next = self.resident_next
+        while heap:
+            neg_next_use, load_order, victim_page, frame_num = heappop(heap)
+            if resident_next.get(victim_page) == (-neg_next_use, load_order):
+                del resident_next[victim_page]
+                return frame_num
+        raise RuntimeError("OPT sin páginas residentes")
+
+    def on_remove(self, page_num, frame_num):
+        # La entrada del heap queda obsoleta y se descarta al salir
+        del self.resident_next[page_num]
+
+# Políticas adaptativas y resistentes a recorridos secuenciales. Todas guardan las listas
+# como OrderedDict página -> frame (O(1) por acceso) y las páginas fantasma (expulsadas
+# recientemente, sin frame) como OrderedDict página -> None.
+
+@register_policy("ARC")
+class ARCPolicy(ReplacementPolicy):
+    """Adaptive Replacement Cache (Megiddo y Modha, FAST 2003)
+
+    T1 guarda páginas vistas una vez y T2 las vistas al menos dos veces; B1 y B2 son sus
+    fantasmas. Un acierto en B1 agranda el objetivo p de T1 y uno en B2 lo achica.
+    """
+    __slots__ = ['t1', 't2', 'b1', 'b2', 'target', 'replacing']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.target = 0
+        self.replacing = None  # página cuyo fallo ya ajustó target y el directorio en evict
+
+    def _adapt(self, page_num):
+        if page_num in self.b1:
+            self.target = min(self.frame_count, self.target + max(1, len(self.b2) // len(self.b1)))
+        elif page_num in self.b2:
+            self.target = max(0, self.target - max(1, len(self.b1) // len(self.b2)))
+
+    def on_hit(self, page_num, frame_num, pos):
+        t1 = self.t1
+        if page_num in t1:
+            del t1[page_num]
+            self.t2[page_num] = frame_num
+        else:
+            self.t2.move_to_end(page_num)
+
+    def on_insert(self, page_num, frame_num, pos):
+        # Sin evict previo (había un frame libre) el ajuste se hace aquí
+        handled = self.replacing == page_num
+        self.replacing = None
+        if page_num in self.b1 or page_num in self.b2:
+            if not handled:
+                self._adapt(page_num)
+            self.b1.pop(page_num, None)
+            self.b2.pop(page_num, None)
+            self.t2[page_num] = frame_num
+        else:
+            if not handled:
+                # Directorio acotado a c páginas en L1 y 2c en total
+                if len(self.t1) + len(self.b1) >= self.frame_count and self.b1:
+                    self.b1.popitem(last=False)
+                elif len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) >= 2 * self.frame_count and self.b2:
+                    self.b2.popitem(last=False)
+            self.t1[page_num] = frame_num
+
+    def evict(self, page_num, pos):
+        t1 = self.t1
+        in_b2 = page_num in self.b2
+        self.replacing = page_num
+        if in_b2 or page_num in self.b1:
+            self._adapt(page_num)
+        elif len(t1) + len(self.b1) >= self.frame_count:
+            if len(t1) >= self.frame_count or not self.b1:
+                # L1 ocupa toda la caché: la página sale sin dejar fantasma
+                return t1.popitem(last=False)[1]
+            self.b1.popitem(last=False)
+        elif len(t1) + len(self.t2) + len(self.b1) + len(self.b2) >= 2 * self.frame_count and self.b2:
+            self.b2.popitem(last=False)
+        
+        if t1 and (len(t1) > self.target or (in_b2 and len(t1) == self.target) or not self.t2):
+            victim, frame_num = t1.popitem(last=False)
+            self.b1[victim] = None
+        else:
+            victim, frame_num = self.t2.popitem(last=False)
+            self.b2[victim] = None
+        return frame_num
+
+    def on_remove(self, page_num, frame_num):
+        if self.t1.pop(page_num, None) is None:
+            del self.t2[page_num]
+
+@register_policy("CAR")
+class CARPolicy(ReplacementPolicy):
+    """Clock with Adaptive Replacement (Bansal y Modha, FAST 2004)
+
+    Como ARC pero T1 y T2 son relojes: un acierto solo marca el bit de referencia y la
+    manecilla mueve las páginas marcadas de T1 a T2 (o al final de T2).
+    """
+    __slots__ = ['t1', 't2', 'b1', 'b2', 'referenced', 'target']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.t1 = OrderedDict()  # reloj: la cabeza es la posición de la manecilla
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.referenced = set()
+        self.target = 0
+
+    def on_hit(self, page_num, frame_num, pos):
+        self.referenced.add(page_num)
+
+    def on_insert(self, page_num, frame_num, pos):
+        b1 = self.b1
+        b2 = self.b2
+        if page_num in b1:
+            self.target = min(self.frame_count, self.target + max(1, len(b2) // len(b1)))
+            del b1[page_num]
+            self.t2[page_num] = frame_num
+        elif page_num in b2:
+            self.target = max(0, self.target - max(1, len(b1) // len(b2)))
+            del b2[page_num]
+            self.t2[page_num] = frame_num
+        else:
+            self.t1[page_num] = frame_num
+
+    def evict(self, page_num, pos):
+        t1 = self.t1
+        t2 = self.t2
+        referenced = self.referenced
+        while True:
+            if t1 and (len(t1) >= max(1, self.target) or not t2):
+                victim, frame_num = t1.popitem(last=False)
+                if victim not in referenced:
+                    self.b1[victim] = None
+                    break
+                referenced.discard(victim)
+                t2[victim] = frame_num
+            else:
+                victim, frame_num = t2.popitem(last=False)
+                if victim not in referenced:
+                    self.b2[victim] = None
+                    break
+                referenced.discard(victim)
+                t2[victim] = frame_num
+        
+        if page_num not in self.b1 and page_num not in self.b2:
+            if len(t1) + len(self.b1) >= self.frame_count:
+                self.b1.popitem(last=False)
+            elif len(t1) + len(t2) + len(self.b1) + len(self.b2) >= 2 * self.frame_count and self.b2:
+                self.b2.popitem(last=False)
+        return frame_num
+
+    def on_remove(self, page_num, frame_num):
+        self.referenced.discard(page_num)
+        if self.t1.pop(page_num, None) is None:
+            del self.t2[page_num]
+
+@register_policy("2Q")
+class TwoQueuePolicy(ReplacementPolicy):
+    """2Q completo (Johnson y Shasha, VLDB 1994)
+
+    Las páginas nuevas entran en A1in (FIFO, ~25% de los frames); al salir dejan un
+    fantasma en A1out (~50%). Solo un fallo sobre un fantasma lleva la página a Am (LRU),
+    así un recorrido secuencial nunca desplaza a las páginas calientes.
+    """
+    __slots__ = ['a1in', 'a1out', 'am', 'kin', 'kout']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.a1in = OrderedDict()
+        self.a1out = OrderedDict()
+        self.am = OrderedDict()
+        self.kin = max(1, frame_count // 4)
+        self.kout = max(1, frame_count // 2)
+
+    def on_hit(self, page_num, frame_num, pos):
+        # En A1in un acierto no cambia nada: suelen ser referencias correlacionadas
+        if page_num in self.am:
+            self.am.move_to_end(page_num)
+
+    def on_insert(self, page_num, frame_num, pos):
+        if page_num in self.a1out:
+            del self.a1out[page_num]
+            self.am[page_num] = frame_num
+        else:
+            self.a1in[page_num] = frame_num
+
+    def evict(self, page_num, pos):
+        a1in = self.a1in
+        if a1in and (len(a1in) > self.kin or not self.am):
+            victim, frame_num = a1in.popitem(last=False)
+            a1out = self.a1out
+            a1out[victim] = None
+            if len(a1out) > self.kout:
+                a1out.popitem(last=False)
+            return frame_num
+        return self.am.popitem(last=False)[1]
+
+    def on_remove(self, page_num, frame_num):
+        if self.a1in.pop(page_num, None) is None:
+            del self.am[page_num]
+
+@register_policy("LIRS")
+class LIRSPolicy(ReplacementPolicy):
+    """Low Inter-reference Recency Set (Jiang y Zhang, SIGMETRICS 2002)
+
+    Las páginas LIR (distancia de reuso corta) ocupan casi todos los frames; el 1% restante
+    (al menos uno) es para páginas HIR residentes en la cola Q, de donde salen las víctimas.
+    La pila S ordena por recencia LIR, HIR residentes y fantasmas HIR; su fondo es siempre LIR.
+    """
+    __slots__ = ['stack', 'lir', 'queue', 'ghosts', 'lir_limit']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.stack = OrderedDict()   # pila S: página -> None, fondo primero
+        self.lir = {}                # página LIR -> frame
+        self.queue = OrderedDict()   # HIR residentes -> frame, la cabeza es la próxima víctima
+        self.ghosts = OrderedDict()  # HIR no residentes que siguen en S, acotadas a frame_count
+        self.lir_limit = max(1, frame_count - max(1, frame_count // 100))
+
+    def _prune(self):
+        # Quita del fondo de S todo lo que no sea LIR
+        stack = self.stack
+        lir = self.lir
+        while stack:
+            bottom = next(iter(stack))
+            if bottom in lir:
+                break
+            del stack[bottom]
+            self.ghosts.pop(bottom, None)
+
+    def _demote_bottom(self):
+        # El LIR del fondo de S pasa a HIR residente al final de Q
+        stack = self.stack
+        bottom = next(iter(stack))
+        del stack[bottom]
+        self.queue[bottom] = self.lir.pop(bottom)
+        self._prune()
+
+    def on_hit(self, page_num, frame_num, pos):
+        stack = self.stack
+        if page_num in self.lir:
+            at_bottom = next(iter(stack)) == page_num
+            stack.move_to_end(page_num)
+            if at_bottom:
+                self._prune()
+        elif page_num in stack:
+            # HIR con reuso más corto que el LIR más antiguo: pasa a LIR
+            stack.move_to_end(page_num)
+            del self.queue[page_num]
+            self.lir[page_num] = frame_num
+            self._demote_bottom()
+        else:
+            stack[page_num] = None
+            self.queue.move_to_end(page_num)
+
+    def on_insert(self, page_num, frame_num, pos):
+        stack = self.stack
+        if len(self.lir) < self.lir_limit:
+            # Arranque: los primeros frames se llenan de páginas LIR
+            self.ghosts.pop(page_num, None)
+            stack[page_num] = None
+            stack.move_to_end(page_num)
+            self.lir[page_num] = frame_num
+        elif page_num in stack:
+            # Fantasma HIR todavía en S: su distancia de reuso la convierte en LIR
+            del self.ghosts[page_num]
+            stack.move_to_end(page_num)
+            self.lir[page_num] = frame_num
+            self._demote_bottom()
+        else:
+            stack[page_num] = None
+            self.queue[page_num] = frame_num
+
+    def evict(self, page_num, pos):
+        if not self.queue:
+            self._demote_bottom()
+        victim, frame_num = self.queue.popitem(last=False)
+        if victim in self.stack:
+            ghosts = self.ghosts
+            ghosts[victim] = None
+            if len(ghosts) > self.frame_count:
+                oldest = ghosts.popitem(last=False)[0]
+                del self.stack[oldest]
+        return frame_num
+
+    def on_remove(self, page_num, frame_num):
+        if page_num in self.lir:
+            del self.lir[page_num]
+            del self.stack[page_num]
+            self._prune()
+        else:
+            del self.queue[page_num]
+            self.stack.pop(page_num, None)
+
+# Políticas que prefieren expulsar páginas limpias: consultan los bits de sucio del gestor
+# (attach_storage) y, con el modelo de escritura, pueden adelantar escrituras asíncronas.
+
+WSCLOCK_WINDOW = 10000  # τ de WSCLOCK en referencias
+
+@register_policy("WSCLOCK")
+class WSClockPolicy(ReplacementPolicy):
+    """WSClock (Carr y Hennessy, SOSP 1981): reloj sobre los frames con la edad del working set
+
+    Una página sin referenciar y fuera de la ventana τ se expulsa si está limpia; si está sucia
+    se programa su escritura asíncrona y la manecilla sigue. Si tras una vuelta completa no
+    aparece ninguna, se elige la primera limpia no referenciada y, si no, la primera no referenciada.
+    """
+    __slots__ = ['bits', 'last_use', 'resident', 'hand', 'frame_dirty', 'write_back']
+    transient = ('write_back',)
+    window = WSCLOCK_WINDOW
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.bits = bytearray(frame_count)
+        self.last_use = array('q', [0]) * frame_count  # referencia en que se vio usado por última vez
+        self.resident = bytearray(frame_count)
+        self.hand = 0
+        self.frame_dirty = bytearray(frame_count)      # sin gestor: todas limpias
+        self.write_back = None
+
+    def attach_storage(self, frame_dirty, write_back):
+        self.frame_dirty = frame_dirty
+        self.write_back = write_back
+
+    def on_hit(self, page_num, frame_num, pos):
+        self.bits[frame_num] = 1
+
+    def on_insert(self, page_num, frame_num, pos):
+        self.bits[frame_num] = 1
+        self.last_use[frame_num] = pos
+        self.resident[frame_num] = 1
+
+    def evict(self, page_num, pos):
+        bits = self.bits
+        last_use = self.last_use
+        resident = self.resident
+        dirty = self.frame_dirty
+        write_back = self.write_back
+        count = self.frame_count
+        horizon = pos - self.window
+        hand = self.hand
+        victim = clean = unreferenced = -1
+        # La primera vuelta puede limpiar todos los bits de referencia; la segunda solo hace falta
+        # si en la primera no quedó ningún candidato
+        for step in range(2 * count):
+            if step == count and unreferenced != -1:
+                break
+            frame_num = hand
+            hand = hand + 1 if hand + 1 < count else 0
+            if not resident[frame_num]:
+                continue
+            if bits[frame_num]:
+                bits[frame_num] = 0
+                last_use[frame_num] = pos
+                continue
+            old = last_use[frame_num] <= horizon
+            if not dirty[frame_num]:
+                if old:
+                    victim = frame_num
+                    break
+                if clean == -1:
+                    clean = frame_num
+            elif old and write_back is not None and write_back(frame_num):
+                # Queda limpia cuando la manecilla vuelva a pasar
+                continue
+            if unreferenced == -1:
+                unreferenced = frame_num
+        if victim == -1:
+            victim = clean if clean != -1 else unreferenced
+        
+        self.hand = victim + 1 if victim + 1 < count else 0
+        resident[victim] = 0
+        return victim
+
+    def on_remove(self, page_num, frame_num):
+        self.bits[frame_num] = 0
+        self.resident[frame_num] = 0
+
+@register_policy("CFLRU")
+class CleanFirstLRUPolicy(LRUPolicy):
+    """Clean-First LRU (Park et al., CASES 2006)
+
+    Entre las frame_count/4 páginas menos recientes (la ventana limpia-primero) se expulsa
+    la limpia más antigua; si todas están sucias, la LRU.
+    """
+    __slots__ = ['window', 'frame_dirty']
+
+    def __init__(self, frame_count):
+        super().__init__(frame_count)
+        self.window = max(1, frame_count // 4)
+        self.frame_dirty = bytearray(frame_count)
+
+    def attach_storage(self, frame_dirty, write_back):
+        self.frame_dirty = frame_dirty
+
+    def evict(self, page_num, pos):
+        order = self.order
+        dirty = self.frame_dirty
+        for victim, frame_num in islice(order.items(), self.window):
+            if not dirty[frame_num]:
+                del order[victim]
+                return frame_num
+        return order.popitem(last=False)[1]
+
+# ═══════════════════════ Traducción de direcciones: TLB + tabla multinivel ═══════════════════════
+
+class MemoryTimings:
+    """Latencias (ns) usadas para calcular el EAT"""
+    __slots__ = ['memory_ns', 'page_fault_ns', 'writeback_ns', 'tlb_ns', 'pwc_ns']
+
+    def __init__(self, memory_ns=100, page_fault_ns=10000000, writeback_ns=0, tlb_ns=1, pwc_ns=2):
+        self.memory_ns = memory_ns
+        self.page_fault_ns = page_fault_ns
+        self.writeback_ns = writeback_ns
+        self.tlb_ns = tlb_ns
+        self.pwc_ns = pwc_ns
+
+DEFAULT_TIMINGS = MemoryTimings()
+
+TLB_POLICIES = ('LRU', 'FIFO', 'RANDOM')
+_TLB_EMPTY = (1 << 64) - 1
+
+class TLB:
+    """TLB asociativo por conjuntos sobre arreglos planos de etiquetas y marcas de tiempo"""
+    __slots__ = ['sets', 'ways', 'policy', 'tags', 'stamps', 'clock', 'seed', 'hits', 'misses']
+
+    def __init__(self, entries, ways=4, policy='LRU'):
+        if policy not in TLB_POLICIES:
+            raise ValueError(f"Política de TLB desconocida: {policy}")
+        self.ways = max(1, min(ways, entries))
+        self.sets = max(1, entries // self.ways)
+        self.policy = policy
+        self.tags = array('Q', [_TLB_EMPTY]) * (self.sets * self.ways)
+        self.stamps = array('Q', bytes(8 * self.sets * self.ways))
+        self.clock = 0
+        self.seed = 0x2545F4914F6CDD1D
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, page_num):
+        """True si la traducción está en el TLB; si no, la carga y devuelve False"""
+        base = (page_num % self.sets) * self.ways
+        end = base + self.ways
+        tags = self.tags
+        self.clock += 1
+        try:
+            slot = tags.index(page_num, base, end)
+        except ValueError:
+            self.misses += 1
+            self.fill(page_num, base, end)
+            return False
+        self.hits += 1
+        if self.policy == 'LRU':
+            self.stamps[slot] = self.clock
+        return True
+
+    def fill(self, page_num, base, end):
+        stamps = self.stamps
+        if self.policy == 'RANDOM':
+            try:
+                slot = self.tags.index(_TLB_EMPTY, base, end)
+            except ValueError:
+                self.seed = (self.seed * 6364136223846793005 + 1442695040888963407) & _TLB_EMPTY
+                slot = base + (self.seed >> 33) % self.ways
+        else:
+            # Las entradas vacías tienen marca 0 y salen primero
+            ways_stamps = stamps[base:end]
+            slot = base + ways_stamps.index(min(ways_stamps))
+        self.tags[slot] = page_num
+        stamps[slot] = self.clock
+
+    def invalidate(self, page_num):
+        """Shootdown de la traducción de una página expulsada"""
+        base = (page_num % self.sets) * self.ways
+        try:
+            slot = self.tags.index(page_num, base, base + self.ways)
+        except ValueError:
+            return
+        self.tags[slot] = _TLB_EMPTY
+        self.stamps[slot] = 0
+
+class PageTableWalker:
+    """Tabla de páginas radix de varios niveles con caché de recorrido (PWC) por nivel"""
+    __slots__ = ['levels', 'bits', 'pwc_entries', 'pwc', 'level_accesses', 'pwc_hits', 'pwc_lookups', 'walks']
+
+    def __init__(self, levels=4, bits=9, pwc_entries=16):
+        self.levels = levels
+        self.bits = bits
+        self.pwc_entries = pwc_entries
+        # Una caché LRU por nivel no hoja: prefijo de la página -> entrada
+        self.pwc = [OrderedDict() for _ in range(levels - 1)] if pwc_entries else []
+        self.level_accesses = [0] * levels
+        self.pwc_hits = 0
+        self.pwc_lookups = 0
+        self.walks = 0
+
+    def walk(self, page_num):
+        """Recorre la tabla desde el nivel más profundo cacheado; devuelve accesos a memoria"""
+        self.walks += 1
+        levels = self.levels
+        start = 0
+        if self.pwc:
+            self.pwc_lookups += 1
+            for level in range(levels - 2, -1, -1):
+                cache = self.pwc[level]
+                prefix = page_num >> (self.bits * (levels - 1 - level))
+                if prefix in cache:
+                    cache.move_to_end(prefix)
+                    self.pwc_hits += 1
+                    start = level + 1
+                    break
+            for level in range(start, levels - 1):
+                cache = self.pwc[level]
+                cache[page_num >> (self.bits * (levels - 1 - level))] = None
+                if len(cache) > self.pwc_entries:
+                    cache.popitem(last=False)
+
+        level_accesses = self.level_accesses
+        for level in range(start, levels):
+            level_accesses[level] += 1
+        return levels - start
+
+VIRTUAL_ADDRESS_BITS = 48  # direcciones virtuales de x86-64 con 4 niveles de 4 KiB
+
+def page_table_levels(page_size, bits=9):
+    """Niveles de la tabla radix para cubrir el espacio virtual con páginas de page_size"""
+    return max(1, (VIRTUAL_ADDRESS_BITS - (page_size.bit_length() - 1)) // bits)
+
+class TranslationConfig:
+    """Parámetros del modelo TLB + tabla de páginas; build() crea una instancia por gestor
+
+    Con levels=None los niveles salen del tamaño de página del gestor (4 con 4 KiB,
+    3 con 2 MiB, 2 con 1 GiB).
+    """
+    __slots__ = ['tlb_entries', 'tlb_ways', 'tlb_policy', 'levels', 'bits', 'pwc_entries']
+
+    def __init__(self, tlb_entries=64, tlb_ways=4, tlb_policy='LRU', levels=None, bits=9, pwc_entries=16):
+        self.tlb_entries = tlb_entries
+        self.tlb_ways = tlb_ways
+        self.tlb_policy = tlb_policy
+        self.levels = levels
+        self.bits = bits
+        self.pwc_entries = pwc_entries
+
+    def build(self, page_size=BASE_PAGE_SIZE):
+        levels = self.levels or page_table_levels(page_size, self.bits)
+        return AddressTranslation(
+            TLB(self.tlb_entries, self.tlb_ways, self.tlb_policy),
+            PageTableWalker(levels, self.bits, self.pwc_entries)
+        )
+
+class AddressTranslation:
+    """TLB delante de la tabla de páginas multinivel"""
+    __slots__ = ['tlb', 'walker', 'tlb_lookup']
+
+    def __init__(self, tlb, walker):
+        self.tlb = tlb
+        self.walker = walker
+        self.tlb_lookup = tlb.lookup
+
+    def translate(self, page_num):
+        if not self.tlb_lookup(page_num):
+            self.walker.walk(page_num)
+
+    def invalidate(self, page_num):
+        self.tlb.invalidate(page_num)
+
+    def get_statistics(self, total_accesses, timings):
+        """Contadores de traducción y su coste medio por acceso (ns)"""
+        tlb = self.tlb
+        walker = self.walker
+        walk_memory_accesses = sum(walker.level_accesses)
+        lookups = tlb.hits + tlb.misses
+        translation_ns = (
+            timings.tlb_ns * lookups
+            + timings.memory_ns * walk_memory_accesses
+            + timings.pwc_ns * walker.pwc_lookups
+        ) / total_accesses
+        return {
+            'tlb_hits': tlb.hits,
+            'tlb_misses': tlb.misses,
+            'tlb_hit_rate': tlb.hits / lookups * 100 if lookups else 0,
+            'page_walks': walker.walks,
+            'walk_memory_accesses': walk_memory_accesses,
+            'walk_accesses_per_level': list(walker.level_accesses),
+            'pwc_hits': walker.pwc_hits,
+            'pwc_hit_rate': walker.pwc_hits / walker.pwc_lookups * 100 if walker.pwc_lookups else 0,
+            'translation_ns': translation_ns
+        }
+
+class SimulationOptions:
+    """Opciones comunes a todas las configuraciones de un barrido"""
+    __slots__ = ['sample_rate', 'timings', 'translation', 'checkpoint', 'profile', 'address_spaces', 'allocation',
+                 'writeback']
+
+    def __init__(self, sample_rate=None, timings=None, translation=None, checkpoint=None, profile=None,
+                 address_spaces=None, allocation=None, writeback=None):
+        self.sample_rate = sample_rate
+        self.timings = timings or DEFAULT_TIMINGS
+        self.translation = translation
+        self.checkpoint = checkpoint
+        # PhaseTimer del proceso; además, cada gestor lleva su ConfigurationProfile
+        self.profile = profile
+        self.address_spaces = address_spaces  # AddressSpaceConfig: estadísticas y reemplazo por proceso
+        self.allocation = allocation          # AllocationConfig: conjunto residente variable (WS/PFF)
+        self.writeback = writeback            # WritebackConfig: cola de escritura, dispositivo y limpiador
+
+DEFAULT_OPTIONS = SimulationOptions()
+
+# ═══════════════════════ Gestor de memoria ═══════════════════════
+
+# Entradas del TLB para estimar su alcance cuando no se modela (--tlb-entries)
+DEFAULT_TLB_REACH_ENTRIES = 64
+
+class HyperLogLog:
+    """Cuenta aproximada de páginas distintas con memoria fija (2^bits registros de un byte)
+
+    Error relativo típico 1.04 / sqrt(2^bits); por debajo de 2.5 * 2^bits páginas se usa
+    conteo lineal, prácticamente exacto.
+    """
+    __slots__ = ['bits', 'registers']
+
+    def __init__(self, bits=14):
+        self.bits = bits
+        self.registers = bytearray(1 << bits)
+
+    def add(self, key):
+        # Mezcla splitmix64: las páginas consecutivas quedan repartidas en todos los bits
+        key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & SAMPLE_HASH_MASK
+        key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & SAMPLE_HASH_MASK
+        key ^= key >> 31
+        rest_bits = 64 - self.bits
+        index = key >> rest_bits
+        rank = rest_bits + 1 - (key & ((1 << rest_bits) - 1)).bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        registers = self.registers
+        size = len(registers)
+        zeros = registers.count(0)
+        if zeros and zeros > size * math.exp(-2.5):
+            return round(size * math.log(size / zeros))
+        alpha = 0.7213 / (1 + 1.079 / size)
+        return round(alpha * size * size / sum(2.0 ** -rank for rank in registers))
+
+class AdvancedPagedMemoryManager:
+    # Escritura asíncrona de un frame sucio para las políticas (ver WritebackManager)
+    async_writeback = None
+    
+    def __init__(self, frame_count, replacement_policy, options=None, page_size=BASE_PAGE_SIZE):
+        options = options or DEFAULT_OPTIONS
+        self.frame_count = frame_count
+        self.replacement_policy = replacement_policy
+        # Los llamadores entregan páginas de page_size (ver coarsen_pages)
+        self.page_size = page_size
+        self.page_shift = page_size.bit_length() - 1 - BASE_PAGE_SHIFT
+        self.tlb_reach_entries = options.translation.tlb_entries if options.translation else DEFAULT_TLB_REACH_ENTRIES
+        self.page_table = {}
+        # Tabla de frames como arreglos paralelos: página cargada y bit de sucio
+        self.frame_pages = array('Q', bytes(8 * frame_count))
+        self.frame_dirty = bytearray(frame_count)
+        self.dirty_pages = set()
+       
+        self.page_faults = 0
+        self.disk_writes = 0
+        self.replacements = 0
+        self.hits = 0
+        self.total_accesses = 0
+        self.operation_stats = {'R': 0, 'W': 0}
+        # Cada página distinta entra por un fallo: se estima con los fallos, sin un contador por página
+        self.unique_estimate = HyperLogLog()
+        
+        self.policy = create_policy(replacement_policy, frame_count)
+        
+        # Modelo opcional de TLB + recorrido de tabla de páginas
+        self.timings = options.timings
+        self.translation = options.translation.build(page_size) if options.translation else None
+        self.profile = ConfigurationProfile() if options.profile is not None else None
+        self.bind_hooks()
+    
+    # Atributos que no forman parte del estado de un checkpoint
+    UNSAVED_ATTRIBUTES = ('policy_on_hit', 'policy_on_insert', 'policy_evict', 'translate', 'timings',
+                          'profile', 'handle_page_fault')
+    
+    def bind_hooks(self):
+        """Enlaza una sola vez los métodos de la política: sin comparar cadenas en cada acceso"""
+        self.policy_on_hit = self.policy.on_hit
+        self.policy_on_insert = self.policy.on_insert
+        self.policy_evict = self.policy.evict
+        self.translate = self.translation.translate if self.translation else None
+        self.policy.attach_storage(self.frame_dirty, self.async_writeback)
+        if self.profile is not None:
+            self.profile.instrument(self)
+    
+    def checkpoint_key(self):
+        """Identifica la configuración para no restaurar un checkpoint ajeno"""
+        translation = None
+        if self.translation is not None:
+            tlb = self.translation.tlb
+            walker = self.translation.walker
+            translation = (tlb.sets, tlb.ways, tlb.policy, walker.levels, walker.bits, walker.pwc_entries)
+        return (type(self).__name__, self.replacement_policy, self.frame_count,
+                getattr(self, 'sample_rate', None), translation, self.page_size)
+    
+    def get_checkpoint_state(self):
+        """Tablas, estructuras de la política y contadores a guardar"""
+        return {name: value for name, value in self.__dict__.items() if name not in self.UNSAVED_ATTRIBUTES}
+    
+    def restore_checkpoint_state(self, state):
+        self.__dict__.update(state)
+        self.bind_hooks()
+    
+    def prepare_policy(self, trace, verbose=True):
+        """Preprocesa la traza decodificada para políticas que la necesitan (OPT)"""
+        if verbose:
+            print_section_header(f"PREPROCESANDO PARA {self.replacement_policy}")
+        
+        start_time = time.time()
+        with (self.profile or DISABLED_TIMER).phase('preprocess'):
+            self.policy.prepare(self.policy_trace(trace))
+        
+        elapsed = time.time() - start_time
+        if verbose:
+            print(f"{Colors.OKGREEN}✅ Preprocesamiento completado en {elapsed:.2f} segundos{Colors.ENDC}")
+    
+    def policy_trace(self, trace):
+        """La traza de 4 KiB tal como la ve la política (con el tamaño de página del gestor)"""
+        return coarsen_trace(trace, self.page_shift)
+    
+    def access_page(self, page_num, operation, current_pos=None):
+        self.total_accesses += 1
+        self.operation_stats[operation] += 1
+        if self.translate is not None:
+            self.translate(page_num)
+        
+        frame_num = self.page_table.get(page_num)
+        if frame_num is not None:
+            # Hit de página
+            self.hits += 1
+            self.policy_on_hit(page_num, frame_num, current_pos)
+            
+            if operation == 'W':
+                self.frame_dirty[frame_num] = 1
+                self.dirty_pages.add(page_num)
+            
+            return frame_num
+        else:
+            # Page fault
+            self.page_faults += 1
+            self.unique_estimate.add(page_num)
+            return self.handle_page_fault(page_num, operation, current_pos)
+    
+    def access_batch(self, pages, ops, start_pos=0):
+        """Procesa un lote de referencias (equivale a access_page sobre cada una)"""
+        page_table_get = self.page_table.get
+        frame_dirty = self.frame_dirty
+        dirty_pages_add = self.dirty_pages.add
+        add_unique = self.unique_estimate.add
+        on_hit = self.policy_on_hit
+        handle_page_fault = self.handle_page_fault
+        translate = self.translate
+        hits = 0
+        pos = start_pos
+        
+        for page_num, operation in zip(pages, ops):
+            if translate is not None:
+                translate(page_num)
+            frame_num = page_table_get(page_num)
+            if frame_num is not None:
+                hits += 1
+                on_hit(page_num, frame_num, pos)
+                if operation == 'W':
+                    frame_dirty[frame_num] = 1
+                    dirty_pages_add(page_num)
+            else:
+                add_unique(page_num)
+                handle_page_fault(page_num, operation, pos)
+            pos += 1
+        
+        count = pos - start_pos
+        writes = ops.count('W')
+        self.total_accesses += count
+        self.hits += hits
+        self.page_faults += count - hits
+        self.operation_stats['W'] += writes
+        self.operation_stats['R'] += count - writes
+        return count
+    
+    def handle_page_fault(self, page_num, operation, current_pos=None):
+        if len(self.page_table) < self.frame_count:
+            # Avilable Frames
+            frame_num = len(self.page_table)
+        else:
+            # Reemplazo
+            self.replacements += 1
+            frame_num = self.select_victim_frame(current_pos, page_num)
+            victim_page = self.frame_pages[frame_num]
+            
+            if self.frame_dirty[frame_num]:
+                self.disk_writes += 1
+            
+            # Clean STRUCTS
+            del self.page_table[victim_page]
+            self.dirty_pages.discard(victim_page)
+            if self.translation is not None:
+                self.translation.invalidate(victim_page)
+        
+        # NEW PAGE 
+        self.page_table[page_num] = frame_num
+        self.frame_pages[frame_num] = page_num
+        if operation == 'W':
+            self.frame_dirty[frame_num] = 1
+            self.dirty_pages.add(page_num)
+        else:
+            self.frame_dirty[frame_num] = 0
+        
+        self.policy_on_insert(page_num, frame_num, current_pos)
+        return frame_num
+    
+    def select_victim_frame(self, current_pos=None, incoming_page=None):
+        return self.policy_evict(incoming_page, current_pos)
+    
+    def get_statistics(self):
+        """Calcula estadísticas avanzadas"""
+        if self.total_accesses == 0:
+            return {}
+        
+        stats = summarize_counters(
+            self.total_accesses, self.hits, self.page_faults, self.replacements, self.disk_writes,
+            self.operation_stats['R'], self.operation_stats['W'], self.unique_estimate.count(),
+            self.timings
+        )
+        if self.translation is not None:
+            stats.update(self.translation.get_statistics(self.total_accesses, self.timings))
+            stats['eat'] += stats['translation_ns']
+        stats.update(page_size_statistics(self.page_size, self.frame_count, stats['unique_pages'],
+                                          self.tlb_reach_entries))
+        if self.profile is not None:
+            stats['profile'] = self.profile.summary()
+        return stats
+
+def summarize_counters(total_accesses, hits, page_faults, replacements, disk_writes, reads, writes, unique_pages,
+                       timings=DEFAULT_TIMINGS):
+    """Construye el diccionario de estadísticas a partir de los contadores de una simulación"""
+    hit_rate = (hits / total_accesses) * 100
+    fault_rate = (page_faults / total_accesses) * 100
+    replacement_rate = (replacements / total_accesses) * 100
+    
+    # Effective Access Time: acceso a memoria + fallos + escrituras de páginas sucias
+    eat = timings.memory_ns + (fault_rate / 100 * timings.page_fault_ns)
+    if disk_writes is not None:
+        eat += disk_writes / total_accesses * timings.writeback_ns
+    
+    return {
+        'total_accesses': total_accesses,
+        'hits': hits,
+        'page_faults': page_faults,
+        'replacements': replacements,
+        'disk_writes': disk_writes,
+        'hit_rate': hit_rate,
+        'fault_rate': fault_rate,
+        'replacement_rate': replacement_rate,
+        'eat': eat,
+        'reads': reads,
+        'writes': writes,
+        'unique_pages': unique_pages,
+        'avg_page_accesses': total_accesses / unique_pages if unique_pages else 0
+    }
+
+# ═══════════════════════ Simulación muestreada (SHARDS) ═══════════════════════
+
+SAMPLE_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+SAMPLE_HASH_MASK = (1 << 64) - 1
+SAMPLE_SUBSETS = 16  # submuestras independientes para estimar el error
+
+def page_sample_hash(page_num):
+    """Hash multiplicativo de 32 bits de la página"""
+    return ((page_num * SAMPLE_HASH_MULTIPLIER) & SAMPLE_HASH_MASK) >> 32
+
+def sample_threshold(sample_rate):
+    return int(sample_rate * (1 << 32))
+
+def sample_trace(trace, sample_rate):
+    """Traza decodificada con solo las referencias a páginas que pasan el filtro de hash"""
+    threshold = sample_threshold(sample_rate)
+    keep = [page_sample_hash(page_num) < threshold for page_num in trace.pages]
+    pages = array('Q', compress(trace.pages, keep))
+    ops = OpsBitmapBuilder()
+    ops.extend(''.join(compress(trace.operations(), keep)))
+    return DecodedTrace(pages, ops.finish(), trace.source)
+
+class SampledMemoryManager(AdvancedPagedMemoryManager):
+    """Muestreo espacial estilo SHARDS: solo se simulan las páginas cuyo hash cae bajo
+    el umbral, con los frames escalados por la tasa de muestreo"""
+
+    def __init__(self, frame_count, replacement_policy, sample_rate, options=None, page_size=BASE_PAGE_SIZE):
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"La tasa de muestreo debe estar en (0, 1]: {sample_rate}")
+        super().__init__(max(1, round(frame_count * sample_rate)), replacement_policy, options, page_size)
+        self.requested_frames = frame_count
+        self.sample_rate = sample_rate
+        self.threshold = sample_threshold(sample_rate)
+        self.sampled_pos = 0
+        self.observed_accesses = 0
+        self.observed_writes = 0
+        # Accesos y fallos por submuestra (bits bajos del hash)
+        self.subset_accesses = [0] * SAMPLE_SUBSETS
+        self.subset_faults = [0] * SAMPLE_SUBSETS
+    
+    def policy_trace(self, trace):
+        return sample_trace(super().policy_trace(trace), self.sample_rate)
+    
+    def access_page(self, page_num, operation, current_pos=None):
+        self.observed_accesses += 1
+        if operation == 'W':
+            self.observed_writes += 1
+        page_hash = page_sample_hash(page_num)
+        if page_hash >= self.threshold:
+            return None
+        self.subset_accesses[page_hash % SAMPLE_SUBSETS] += 1
+        self.sampled_pos += 1
+        return super().access_page(page_num, operation, self.sampled_pos - 1)
+    
+    def access_batch(self, pages, ops, start_pos=0):
+        threshold = self.threshold
+        hashes = [((page_num * SAMPLE_HASH_MULTIPLIER) & SAMPLE_HASH_MASK) >> 32 for page_num in pages]
+        keep = [page_hash < threshold for page_hash in hashes]
+        
+        self.observed_accesses += len(pages)
+        self.observed_writes += ops.count('W')
+        subset_accesses = self.subset_accesses
+        for page_hash in compress(hashes, keep):
+            subset_accesses[page_hash % SAMPLE_SUBSETS] += 1
+        
+        count = super().access_batch(
+            array('Q', compress(pages, keep)), ''.join(compress(ops, keep)), self.sampled_pos
+        )
+        self.sampled_pos += count
+        return count
+    
+    def handle_page_fault(self, page_num, operation, current_pos=None):
+        self.subset_faults[page_sample_hash(page_num) % SAMPLE_SUBSETS] += 1
+        return super().handle_page_fault(page_num, operation, current_pos)
+    
+    def get_statistics(self):
+        """Estadísticas estimadas para la traza completa, con intervalo de confianza del 95%"""
+        if self.observed_accesses == 0:
+            return {}
+        
+        rate = self.sample_rate
+        total = self.observed_accesses
+        if self.total_accesses:
+            fault_ratio = self.page_faults / self.total_accesses
+        else:
+            fault_ratio = 0.0
+        page_faults = min(total, round(fault_ratio * total))
+        writes = self.observed_writes
+        
+        stats = summarize_counters(
+            total, total - page_faults, page_faults, round(self.replacements / rate),
+            round(self.disk_writes / rate), total - writes, writes,
+            round(self.unique_estimate.count() / rate), self.timings
+        )
+        if self.translation is not None:
+            stats.update(self.translation.get_statistics(self.total_accesses, self.timings))
+            stats['eat'] += stats['translation_ns']
+        
+        # Error estándar entre submuestras independientes del espacio de páginas
+        ratios = [faults / accesses for faults, accesses in zip(self.subset_faults, self.subset_accesses) if accesses]
+        if len(ratios) > 1:
+            mean = sum(ratios) / len(ratios)
+            variance = sum((ratio - mean) ** 2 for ratio in ratios) / (len(ratios) - 1)
+            error = 1.96 * (variance / len(ratios)) ** 0.5 * 100
+        else:
+            error = 100.0
+        
+        stats.update({
+            'sample_rate': rate,
+            'sampled_accesses': self.total_accesses,
+            'sampled_frames': self.frame_count,
+            'hit_rate_error': error,
+            'fault_rate_error': error,
+            'eat_error': error / 100 * self.timings.page_fault_ns
+        })
+        stats.update(page_size_statistics(self.page_size, self.requested_frames, stats['unique_pages'],
+                                          self.tlb_reach_entries))
+        if self.profile is not None:
+            stats['profile'] = self.profile.summary()
+        return stats
+
+def create_manager(frame_count, replacement_policy, options=None, page_size=BASE_PAGE_SIZE):
+    """Gestor exacto, muestreado, multiproceso, de asignación variable o con modelo de escritura según las opciones"""
+    options = options or DEFAULT_OPTIONS
+    if options.writeback is not None:
+        return WritebackManager(frame_count, replacement_policy, options.writeback, options, page_size)
+    if options.allocation is not None:
+        return VariableAllocationManager(frame_count, replacement_policy, options.allocation, options, page_size)
+    if options.address_spaces is not None:
+        return MultiProcessMemoryManager(frame_count, replacement_policy, options.address_spaces, options,
+                                         page_size)
+    if options.sample_rate is None or options.sample_rate >= 1:
+        return AdvancedPagedMemoryManager(frame_count, replacement_policy, options, page_size)
+    return SampledMemoryManager(frame_count, replacement_policy, options.sample_rate, options, page_size)
+
+# ═══════════════════════ Múltiples espacios de direcciones ═══════════════════════
+
+class AddressSpaceConfig:
+    """Reemplazo global o local (cuota de frames por proceso) sobre un pool de frames compartido"""
+    __slots__ = ['scope', 'quota', 'process_count', 'ws_window']
+
+    def __init__(self, scope='global', quota=None, process_count=1, ws_window=10000):
+        if scope not in ('global', 'local'):
+            raise ValueError(f"Alcance de reemplazo desconocido: {scope}")
+        self.scope = scope
+        self.quota = quota                  # None = reparto equitativo entre process_count procesos
+        self.process_count = process_count
+        self.ws_window = ws_window
+    
+    def quota_for(self, frame_count):
+        if self.quota is not None:
+            return self.quota
+        return max(1, frame_count // max(1, self.process_count))
+
+class ProcessState:
+    """Estado de un proceso en reemplazo local: su política sobre índices locales y sus frames"""
+    __slots__ = ['policy', 'slots', 'holes', 'resident']
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.slots = []     # índice local -> frame global (-1 si se lo quitó otro proceso)
+        self.holes = []     # índices locales libres
+        self.resident = 0
+
+def count_address_spaces(trace):
+    """Número de ASID distintos en una traza decodificada"""
+    return len(set(map(ASID_SHIFT.__rrshift__, trace.pages)))
+
+class MultiProcessMemoryManager(AdvancedPagedMemoryManager):
+    """Varios procesos sobre un pool de frames compartido
+
+    Las páginas llegan como claves (asid << ASID_SHIFT) | página, así que la tabla de páginas
+    sigue siendo un solo dict con búsquedas O(1). Con alcance global una sola política elige
+    entre todos los frames; con alcance local cada proceso tiene su propia política sobre sus
+    frames, limitada a `quota`. Un proceso sin frames con el pool agotado toma uno del proceso
+    que más frames tiene.
+    """
+
+    def __init__(self, frame_count, replacement_policy, address_spaces, options=None, page_size=BASE_PAGE_SIZE):
+        self.local = address_spaces.scope == 'local'
+        self.quota = address_spaces.quota_for(frame_count) if self.local else None
+        self.ws_window = address_spaces.ws_window
+        self.processes = {}
+        self.frame_slot = array('l', [-1]) * frame_count
+        self.allocated = 0
+        super().__init__(frame_count, replacement_policy, options, page_size)
+        
+        self.process_accesses = defaultdict(int)
+        self.process_faults = defaultdict(int)
+        self.process_resident = defaultdict(int)
+        self.process_peak = defaultdict(int)
+        # Working set por proceso: claves distintas en la ventana actual de ws_window referencias
+        self.window_keys = set()
+        self.window_fill = 0
+        self.process_ws_sum = defaultdict(int)
+        self.process_ws_max = defaultdict(int)
+        self.windows = 0
+    
+    UNSAVED_ATTRIBUTES = AdvancedPagedMemoryManager.UNSAVED_ATTRIBUTES + ('process_evict',)
+    
+    def bind_hooks(self):
+        super().bind_hooks()
+        if self.local:
+            self.policy_on_hit = self._local_on_hit
+        # Con alcance local la víctima la elige la política del proceso dueño: se mide igual
+        # que policy_evict
+        self.process_evict = self._process_evict
+        if self.profile is not None:
+            self.process_evict = self.profile.timed_victim_selection(self.process_evict)
+    
+    def checkpoint_key(self):
+        return super().checkpoint_key() + (self.local, self.quota, self.ws_window)
+    
+    def prepare_policy(self, trace, verbose=True):
+        super().prepare_policy(trace, verbose)
+        for process in self.processes.values():
+            process.policy.adopt_preparation(self.policy)
+    
+    def _local_on_hit(self, page_num, frame_num, pos):
+        self.processes[page_num >> ASID_SHIFT].policy.on_hit(page_num, self.frame_slot[frame_num], pos)
+    
+    def access_batch(self, pages, ops, start_pos=0):
+        count = super().access_batch(pages, ops, start_pos)
+        process_accesses = self.process_accesses
+        for asid, accesses in Counter(map(ASID_SHIFT.__rrshift__, pages)).items():
+            process_accesses[asid] += accesses
+        
+        start = 0
+        while start < len(pages):
+            take = min(self.ws_window - self.window_fill, len(pages) - start)
+            self.window_keys.update(pages[start:start + take])
+            self.window_fill += take
+            start += take
+            if self.window_fill == self.ws_window:
+                self._close_window()
+        return count
+    
+    def access_page(self, page_num, operation, current_pos=None):
+        self.process_accesses[page_num >> ASID_SHIFT] += 1
+        self.window_keys.add(page_num)
+        self.window_fill += 1
+        if self.window_fill == self.ws_window:
+            self._close_window()
+        return super().access_page(page_num, operation, current_pos)
+    
+    def _close_window(self):
+        for asid, size in Counter(map(ASID_SHIFT.__rrshift__, self.window_keys)).items():
+            self.process_ws_sum[asid] += size
+            if size > self.process_ws_max[asid]:
+                self.process_ws_max[asid] = size
+        self.window_keys.clear()
+        self.window_fill = 0
+        self.windows += 1
+    
+    def select_victim_frame(self, current_pos=None, incoming_page=None):
+        frame_num = self.policy_evict(incoming_page, current_pos)
+        self.process_resident[self.frame_pages[frame_num] >> ASID_SHIFT] -= 1
+        return frame_num
+    
+    def handle_page_fault(self, page_num, operation, current_pos=None):
+        asid = page_num >> ASID_SHIFT
+        self.process_faults[asid] += 1
+        if self.local:
+            frame_num = self._local_page_fault(page_num, asid, operation, current_pos)
+        else:
+            frame_num = super().handle_page_fault(page_num, operation, current_pos)
+        
+        resident = self.process_resident[asid] + 1
+        self.process_resident[asid] = resident
+        if resident > self.process_peak[asid]:
+            self.process_peak[asid] = resident
+        return frame_num
+    
+    def _process(self, asid):
+        process = self.processes.get(asid)
+        if process is None:
+            process = self.processes[asid] = ProcessState(create_policy(self.replacement_policy, self.quota))
+            process.policy.adopt_preparation(self.policy)
+        return process
+    
+    def _take_slot(self, process, frame_num):
+        if process.holes:
+            slot = process.holes.pop()
+            process.slots[slot] = frame_num
+        else:
+            slot = len(process.slots)
+            process.slots.append(frame_num)
+        self.frame_slot[frame_num] = slot
+        process.resident += 1
+        return slot
+    
+    @staticmethod
+    def _process_evict(owner, incoming_page, current_pos):
+        return owner.policy.evict(incoming_page, current_pos)
+    
+    def _release_victim(self, owner, page_num, current_pos):
+        """Expulsa la víctima que elige la política del dueño y devuelve el frame liberado"""
+        self.replacements += 1
+        slot = self.process_evict(owner, page_num, current_pos)
+        frame_num = owner.slots[slot]
+        owner.resident -= 1
+        victim_page = self.frame_pages[frame_num]
+        self.process_resident[victim_page >> ASID_SHIFT] -= 1
+        
+        if self.frame_dirty[frame_num]:
+            self.disk_writes += 1
+        del self.page_table[victim_page]
+        self.dirty_pages.discard(victim_page)
+        if self.translation is not None:
+            self.translation.invalidate(victim_page)
+        return slot, frame_num
+    
+    def _local_page_fault(self, page_num, asid, operation, current_pos):
+        process = self._process(asid)
+        if process.resident < self.quota and self.allocated < self.frame_count:
+            # Frame libre del pool
+            frame_num = self.allocated
+            self.allocated += 1
+            slot = self._take_slot(process, frame_num)
+        elif process.resident:
+            # Reemplazo local: la víctima sale de los frames del propio proceso
+            slot, frame_num = self._release_victim(process, page_num, current_pos)
+            process.resident += 1
+        else:
+            # Pool agotado y el proceso no tiene frames: se toma uno del que más tiene
+            owner = max(self.processes.values(), key=lambda candidate: candidate.resident)
+            owner_slot, frame_num = self._release_victim(owner, page_num, current_pos)
+            owner.slots[owner_slot] = -1
+            owner.holes.append(owner_slot)
+            slot = self._take_slot(process, frame_num)
+        
+        self.page_table[page_num] = frame_num
+        self.frame_pages[frame_num] = page_num
+        if operation == 'W':
+            self.frame_dirty[frame_num] = 1
+            self.dirty_pages.add(page_num)
+        else:
+            self.frame_dirty[frame_num] = 0
+        
+        process.policy.on_insert(page_num, slot, current_pos)
+        return frame_num
+    
+    def get_statistics(self):
+        stats = super().get_statistics()
+        if not stats:
+            return stats
+        
+        windows = self.windows
+        processes = {}
+        for asid in sorted(self.process_accesses):
+            accesses = self.process_accesses[asid]
+            faults = self.process_faults[asid]
+            processes[str(asid)] = {
+                'accesses': accesses,
+                'page_faults': faults,
+                'fault_rate': faults / accesses * 100 if accesses else 0.0,
+                'resident_frames': self.process_resident[asid],
+                'peak_frames': self.process_peak[asid],
+                'working_set_mean': self.process_ws_sum[asid] / windows if windows else 0.0,
+                'working_set_max': self.process_ws_max[asid]
+            }
+        stats.update({
+            'replacement_scope': 'local' if self.local else 'global',
+            'process_quota': self.quota,
+            'working_set_window': self.ws_window,
+            'processes': processes
+        })
+        return stats
+
+# ═══════════════════════ Asignación variable ═══════════════════════
+
+ALLOCATION_MODES = ('ws', 'pff')
+
+class AllocationConfig:
+    """Conjunto residente variable: working set con ventana τ o frecuencia de fallos con umbral T"""
+    __slots__ = ['mode', 'window', 'threshold']
+
+    def __init__(self, mode='ws', window=10000, threshold=1000):
+        if mode not in ALLOCATION_MODES:
+            raise ValueError(f"Modo de asignación desconocido: {mode}")
+        if window <= 0 or threshold <= 0:
+            raise ValueError("La ventana y el umbral de asignación deben ser positivos")
+        self.mode = mode
+        self.window = window
+        self.threshold = threshold
+
+class VariableAllocationManager(AdvancedPagedMemoryManager):
+    """El conjunto residente crece y se reduce en vez de ocupar siempre frame_count frames
+
+    - ws: una página sale en cuanto pasan τ referencias sin usarla (working set de Denning).
+    - pff: en cada fallo, si desde el anterior pasaron más de T referencias se liberan las
+      páginas no referenciadas desde entonces; si no, el conjunto crece un frame.
+    frame_count es la memoria física: si no queda ningún frame libre, la política elige la
+    víctima como en asignación fija. Los frames liberados se avisan con policy.on_remove.
+    """
+
+    UNSAVED_ATTRIBUTES = AdvancedPagedMemoryManager.UNSAVED_ATTRIBUTES + ('touch',)
+
+    def __init__(self, frame_count, replacement_policy, allocation, options=None, page_size=BASE_PAGE_SIZE):
+        self.mode = allocation.mode
+        self.window = allocation.window
+        self.threshold = allocation.threshold
+        self.free_frames = []
+        self.allocated = 0
+        self.clock = 0              # referencias vistas (reloj virtual del proceso)
+        self.last_use = {}          # ws: página residente -> última referencia
+        self.recent = deque()       # ws: (referencia, página) de las últimas τ referencias
+        self.referenced = set()     # pff: páginas referenciadas desde el último fallo
+        self.last_fault = 0
+        self.releases = 0
+        self.resident_sum = 0
+        self.resident_peak = 0
+        super().__init__(frame_count, replacement_policy, options, page_size)
+    
+    def bind_hooks(self):
+        super().bind_hooks()
+        self.touch = self._ws_touch if self.mode == 'ws' else self._pff_touch
+        self.policy_on_hit = self._on_hit
+    
+    def checkpoint_key(self):
+        return super().checkpoint_key() + (self.mode, self.window, self.threshold)
+    
+    def _on_hit(self, page_num, frame_num, pos):
+        self.policy.on_hit(page_num, frame_num, pos)
+        self.touch(page_num)
+    
+    def _ws_touch(self, page_num):
+        clock = self.clock
+        self.last_use[page_num] = clock
+        recent = self.recent
+        recent.append((clock, page_num))
+        # Salen las páginas cuya última referencia quedó fuera de la ventana
+        horizon = clock - self.window
+        while recent[0][0] <= horizon:
+            used, page = recent.popleft()
+            if self.last_use.get(page) == used:
+                del self.last_use[page]
+                self._release(page)
+        self._account()
+    
+    def _pff_touch(self, page_num):
+        self.referenced.add(page_num)
+        self._account()
+    
+    def _account(self):
+        self.clock += 1
+        resident = len(self.page_table)
+        self.resident_sum += resident
+        if resident > self.resident_peak:
+            self.resident_peak = resident
+    
+    def _unload(self, page_num, frame_num):
+        if self.frame_dirty[frame_num]:
+            self.disk_writes += 1
+        del self.page_table[page_num]
+        self.dirty_pages.discard(page_num)
+        if self.translation is not None:
+            self.translation.invalidate(page_num)
+    
+    def _release(self, page_num):
+        """Libera una página por decisión del asignador (no de la política)"""
+        frame_num = self.page_table[page_num]
+        self._unload(page_num, frame_num)
+        self.policy.on_remove(page_num, frame_num)
+        self.free_frames.append(frame_num)
+        self.releases += 1
+    
+    def handle_page_fault(self, page_num, operation, current_pos=None):
+        if self.mode == 'pff':
+            if self.clock - self.last_fault > self.threshold:
+                # Fallos poco frecuentes: el conjunto se reduce a lo usado desde el fallo anterior
+                referenced = self.referenced
+                for page in [page for page in self.page_table if page not in referenced]:
+                    self._release(page)
+            self.referenced.clear()
+            self.last_fault = self.clock
+        
+        if self.free_frames:
+            frame_num = self.free_frames.pop()
+        elif self.allocated < self.frame_count:
+            frame_num = self.allocated
+            self.allocated += 1
+        else:
+            # Memoria física agotada: reemplazo con la política
+            self.replacements += 1
+            frame_num = self.select_victim_frame(current_pos, page_num)
+            victim_page = self.frame_pages[frame_num]
+            self._unload(victim_page, frame_num)
+            self.last_use.pop(victim_page, None)
+        
+        self.page_table[page_num] = frame_num
+        self.frame_pages[frame_num] = page_num
+        if operation == 'W':
+            self.frame_dirty[frame_num] = 1
+            self.dirty_pages.add(page_num)
+        else:
+            self.frame_dirty[frame_num] = 0
+        
+        self.policy_on_insert(page_num, frame_num, current_pos)
+        self.touch(page_num)
+        return frame_num
+    
+    def get_statistics(self):
+        stats = super().get_statistics()
+        if not stats:
+            return stats
+        stats.update({
+            'allocation': self.mode,
+            'allocation_parameter': self.window if self.mode == 'ws' else self.threshold,
+            'mean_resident_frames': self.resident_sum / self.clock if self.clock else 0.0,
+            'peak_resident_frames': self.resident_peak,
+            'allocation_releases': self.releases
+        })
+        return stats
+
+# ═══════════════════════ Escritura diferida y limpiador de páginas ═══════════════════════
+
+class WritebackConfig:
+    """Dispositivo de escritura con cola acotada y limpiador de páginas en segundo plano"""
+    __slots__ = ['queue_depth', 'latency_ns', 'bandwidth', 'cleaner_rate', 'cleaner_interval']
+
+    def __init__(self, queue_depth=32, latency_ns=100000, bandwidth=200 * 1024 * 1024, cleaner_rate=0,
+                 cleaner_interval=1000):
+        if queue_depth <= 0 or bandwidth <= 0 or cleaner_interval <= 0:
+            raise ValueError("La cola, el ancho de banda y el intervalo del limpiador deben ser positivos")
+        if latency_ns < 0 or cleaner_rate < 0:
+            raise ValueError("La latencia y la tasa del limpiador no pueden ser negativas")
+        self.queue_depth = queue_depth            # escrituras en vuelo como máximo
+        self.latency_ns = latency_ns              # latencia de cada escritura (se solapa entre escrituras)
+        self.bandwidth = bandwidth                # bytes/s: la transferencia de las páginas es secuencial
+        self.cleaner_rate = cleaner_rate          # páginas sucias que limpia cada despertar (0 = sin limpiador)
+        self.cleaner_interval = cleaner_interval  # referencias entre despertares del limpiador
+
+class WritebackManager(AdvancedPagedMemoryManager):
+    """Fallos que esperan a la escritura de su víctima sucia en un dispositivo con cola acotada
+
+    El reloj simulado avanza mem_ns por referencia y fault_ns por fallo, más lo que el fallo
+    espera: si la víctima está sucia, su escritura se encola (esperando hueco si la cola está
+    llena) y el frame no se reutiliza hasta que termina. Cada escritura tarda la latencia del
+    dispositivo más la transferencia de la página, y las transferencias no se solapan.
+    El limpiador despierta cada cleaner_interval referencias y escribe hasta cleaner_rate
+    páginas sucias recorriendo los frames en círculo, sin bloquear: si la cola se llena, para.
+    Las políticas que prefieren páginas limpias (WSCLOCK) pueden adelantar escrituras con
+    async_writeback. Las lecturas de los fallos no compiten por el dispositivo.
+    """
+
+    def __init__(self, frame_count, replacement_policy, writeback, options=None, page_size=BASE_PAGE_SIZE):
+        self.queue_depth = writeback.queue_depth
+        self.latency_ns = round(writeback.latency_ns)
+        self.transfer_ns = round(page_size * 1e9 / writeback.bandwidth)
+        self.cleaner_rate = writeback.cleaner_rate
+        self.cleaner_interval = writeback.cleaner_interval
+        self.next_cleaning = writeback.cleaner_interval
+        self.cleaner_hand = 0
+        self.inflight = deque()                                 # fin de las escrituras en vuelo, en orden
+        self.device_free = 0                                    # fin de la última transferencia
+        self.write_done = array('d', bytes(8 * frame_count))    # fin de la última escritura de cada frame
+        self.frame_cleaned = bytearray(frame_count)             # escrito por adelantado desde que se cargó
+        self.elapsed_ns = 0   # tiempo de fallos y esperas; el reloj es pos * mem_ns + elapsed_ns
+        self.now = 0
+        self.eviction_writes = 0
+        self.cleaner_writes = 0
+        self.policy_writes = 0
+        self.modified_evictions = 0
+        self.stall_ns = 0
+        self.stalled_faults = 0
+        self.max_stall_ns = 0
+        self.queue_full_waits = 0
+        super().__init__(frame_count, replacement_policy, options, page_size)
+    
+    def checkpoint_key(self):
+        return super().checkpoint_key() + (self.queue_depth, self.latency_ns, self.transfer_ns, self.cleaner_rate,
+                                           self.cleaner_interval)
+    
+    def access_batch(self, pages, ops, start_pos=0):
+        if not self.cleaner_rate:
+            return super().access_batch(pages, ops, start_pos)
+        # El lote se corta en cada despertar del limpiador
+        count = len(pages)
+        done = 0
+        while done < count:
+            pos = start_pos + done
+            if pos >= self.next_cleaning:
+                self._wake_cleaner(pos)
+            take = min(count - done, self.next_cleaning - pos)
+            super().access_batch(pages[done:done + take], ops[done:done + take], pos)
+            done += take
+        return count
+    
+    def access_page(self, page_num, operation, current_pos=None):
+        if self.cleaner_rate:
+            pos = current_pos if current_pos is not None else self.total_accesses
+            if pos >= self.next_cleaning:
+                self._wake_cleaner(pos)
+        return super().access_page(page_num, operation, current_pos)
+    
+    def _wake_cleaner(self, pos):
+        """Despertares pendientes antes de la referencia pos (igual en access_page y access_batch)"""
+        while pos >= self.next_cleaning:
+            self._run_cleaner(self.next_cleaning)
+            self.next_cleaning += self.cleaner_interval
+    
+    def _clock(self, pos):
+        return pos * self.timings.memory_ns + self.elapsed_ns
+    
+    def _write(self, frame_num, now, blocking):
+        """Encola la escritura del frame y devuelve cuándo termina (None si la cola está llena y no se espera)"""
+        inflight = self.inflight
+        while inflight and inflight[0] <= now:
+            inflight.popleft()
+        if len(inflight) >= self.queue_depth:
+            if not blocking:
+                return None
+            # Espera a que termine la escritura más antigua
+            self.queue_full_waits += 1
+            now = inflight.popleft()
+        
+        self.device_free = max(now, self.device_free) + self.transfer_ns
+        done = self.device_free + self.latency_ns
+        inflight.append(done)
+        self.write_done[frame_num] = done
+        self.disk_writes += 1
+        return done
+    
+    def _clean(self, frame_num, now):
+        """Escribe un frame sucio por adelantado sin bloquear; False si la cola está llena"""
+        if self._write(frame_num, now, False) is None:
+            return False
+        self.frame_dirty[frame_num] = 0
+        self.frame_cleaned[frame_num] = 1
+        self.dirty_pages.discard(self.frame_pages[frame_num])
+        return True
+    
+    def async_writeback(self, frame_num):
+        if not self._clean(frame_num, self.now):
+            return False
+        self.policy_writes += 1
+        return True
+    
+    def _run_cleaner(self, pos):
+        now = self._clock(pos)
+        frame_dirty = self.frame_dirty
+        hand = self.cleaner_hand
+        for _ in range(self.cleaner_rate):
+            frame_num = frame_dirty.find(1, hand)
+            if frame_num == -1:
+                frame_num = frame_dirty.find(1, 0, hand)
+                if frame_num == -1:
+                    break
+            if not self._clean(frame_num, now):
+                break
+            self.cleaner_writes += 1
+            hand = frame_num + 1 if frame_num + 1 < self.frame_count else 0
+        self.cleaner_hand = hand
+    
+    def handle_page_fault(self, page_num, operation, current_pos=None):
+        pos = current_pos if current_pos is not None else self.total_accesses - 1
+        now = self.now = self._clock(pos)
+        ready = now
+        if len(self.page_table) < self.frame_count:
+            frame_num = len(self.page_table)
+        else:
+            self.replacements += 1
+            frame_num = self.select_victim_frame(current_pos, page_num)
+            victim_page = self.frame_pages[frame_num]
+            
+            if self.frame_dirty[frame_num]:
+                self.modified_evictions += 1
+                self.eviction_writes += 1
+                ready = self._write(frame_num, now, True)
+            else:
+                if self.frame_cleaned[frame_num]:
+                    self.modified_evictions += 1
+                # Una escritura adelantada que aún no terminó también retiene el frame
+                ready = max(now, self.write_done[frame_num])
+            
+            del self.page_table[victim_page]
+            self.dirty_pages.discard(victim_page)
+            if self.translation is not None:
+                self.translation.invalidate(victim_page)
+        
+        stall = ready - now
+        if stall:
+            self.stall_ns += stall
+            self.stalled_faults += 1
+            if stall > self.max_stall_ns:
+                self.max_stall_ns = stall
+        self.elapsed_ns += stall + self.timings.page_fault_ns
+        
+        self.page_table[page_num] = frame_num
+        self.frame_pages[frame_num] = page_num
+        self.frame_cleaned[frame_num] = 0
+        if operation == 'W':
+            self.frame_dirty[frame_num] = 1
+            self.dirty_pages.add(page_num)
+        else:
+            self.frame_dirty[frame_num] = 0
+        
+        self.policy_on_insert(page_num, frame_num, current_pos)
+        return frame_num
+    
+    def get_statistics(self):
+        stats = super().get_statistics()
+        if not stats:
+            return stats
+        # Escrituras necesarias: víctimas modificadas y páginas residentes que ya quedaron escritas
+        cleaned = self.frame_cleaned
+        dirty = self.frame_dirty
+        required = self.modified_evictions + sum(
+            1 for frame_num in self.page_table.values() if cleaned[frame_num] and not dirty[frame_num]
+        )
+        total = self.total_accesses
+        # El EAT usa la espera real de los fallos en lugar de --writeback-ns por escritura
+        stats['eat'] += (self.stall_ns - self.disk_writes * self.timings.writeback_ns) / total
+        stats.update({
+            'write_queue_depth': self.queue_depth,
+            'eviction_writes': self.eviction_writes,
+            'cleaner_writes': self.cleaner_writes,
+            'policy_writes': self.policy_writes,
+            'write_amplification': self.disk_writes / required if required else None,
+            'stall_ns': self.stall_ns,
+            'stalled_faults': self.stalled_faults,
+            'stall_per_fault_ns': self.stall_ns / self.page_faults if self.page_faults else 0.0,
+            'max_stall_ns': self.max_stall_ns,
+            'queue_full_waits': self.queue_full_waits,
+            'simulated_time_ns': total * self.timings.memory_ns + self.elapsed_ns
+        })
+        return stats
+
+# ═══════════════════════ Analítica de localidad en streaming ═══════════════════════
+
+ANALYTICS_HASH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                        0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9)
+
+class TraceAnalytics:
+    """Working set, distancias de reuso, strides y páginas más accedidas con memoria fija
+
+    - W(t, τ): páginas distintas en ventanas consecutivas de τ referencias; la serie se
+      submuestrea a la mitad cada vez que llega a max_points.
+    - Distancias de reuso: distancia de pila LRU (páginas distintas desde el acceso anterior)
+      en buckets log2, con muestreo espacial SHARDS de tamaño fijo y un árbol de Fenwick.
+    - Strides: diferencia entre páginas consecutivas en buckets log2 con signo.
+    - Páginas calientes: resumen Misra-Gries de k contadores más un sketch Count-Min.
+    """
+
+    def __init__(self, window=10000, max_points=512, reuse_sample_rate=0.1, reuse_max_pages=8192,
+                 heavy_hitters=32, sketch_width_bits=12, sketch_depth=4):
+        self.window = window
+        self.max_points = max_points
+        self.window_pages = set()
+        self.window_fill = 0
+        self.windows_seen = 0
+        self.series_stride = 1
+        self.ws_series = []
+        self.ws_sum = 0
+        self.ws_max = 0
+        
+        self.position = 0
+        # Como mucho reuse_max_pages páginas muestreadas: al superarlo se baja el umbral
+        # expulsando la de mayor hash y se reescalan los conteos a la nueva tasa
+        self.reuse_threshold = sample_threshold(reuse_sample_rate)
+        self.reuse_max_pages = reuse_max_pages
+        self.reuse_last = {}    # página muestreada -> instante de su último acceso
+        self.reuse_heap = []    # (-hash, página) de las páginas muestreadas
+        self.reuse_tree = FenwickTree(4 * reuse_max_pages)
+        self.reuse_clock = 0
+        self.reuse_hist = [0.0] * 65
+        self.reuse_cold = 0.0
+        
+        self.last_page = None
+        self.stride_hist = [0] * 131  # índice 65 + signo * bit_length(|stride|)
+        
+        self.heavy_capacity = heavy_hitters
+        self.heavy_counts = {}
+        self.sketch_shift = 64 - sketch_width_bits
+        self.sketch_seeds = ANALYTICS_HASH_SEEDS[:sketch_depth]
+        self.sketch = [array('Q', bytes(8 << sketch_width_bits)) for _ in self.sketch_seeds]
+    
+    def process_batch(self, pages):
+        """Actualiza todas las métricas con un lote de páginas"""
+        self._update_working_set(pages)
+        self._update_reuse_distances(pages)
+        self._update_strides(pages)
+        self._update_heavy_hitters(pages)
+        self.position += len(pages)
+    
+    def _update_working_set(self, pages):
+        window = self.window
+        start = 0
+        while start < len(pages):
+            take = min(window - self.window_fill, len(pages) - start)
+            self.window_pages.update(pages[start:start + take])
+            self.window_fill += take
+            start += take
+            if self.window_fill == window:
+                self._close_window(self.position + start)
+    
+    def _close_window(self, end_position):
+        size = len(self.window_pages)
+        self.window_pages.clear()
+        self.window_fill = 0
+        self.ws_sum += size
+        self.ws_max = max(self.ws_max, size)
+        if self.windows_seen % self.series_stride == 0:
+            self.ws_series.append((end_position, size))
+            if len(self.ws_series) >= self.max_points:
+                del self.ws_series[1::2]
+                self.series_stride *= 2
+        self.windows_seen += 1
+    
+    def _update_reuse_distances(self, pages):
+        threshold = self.reuse_threshold
+        hashes = [((page_num * SAMPLE_HASH_MULTIPLIER) & SAMPLE_HASH_MASK) >> 32 for page_num in pages]
+        last = self.reuse_last
+        reuse_hist = self.reuse_hist
+        
+        for page_hash, page_num in zip(hashes, pages):
+            if page_hash >= threshold:
+                continue
+            if self.reuse_clock == self.reuse_tree.size:
+                self._compact_reuse_times()
+            tree = self.reuse_tree
+            previous = last.get(page_num)
+            if previous is None:
+                self.reuse_cold += 1
+                heappush(self.reuse_heap, (-page_hash, page_num))
+            else:
+                # Páginas muestreadas distintas desde el último acceso (incluida ésta), escaladas
+                distance = len(last) - tree.prefix_sum(previous) + 1
+                rate = threshold / (1 << 32)
+                reuse_hist[int(distance / rate).bit_length()] += 1
+                tree.add(previous, -1)
+            tree.add(self.reuse_clock, 1)
+            last[page_num] = self.reuse_clock
+            self.reuse_clock += 1
+            if len(last) > self.reuse_max_pages:
+                threshold = self._lower_reuse_threshold()
+    
+    def _lower_reuse_threshold(self):
+        """Expulsa las páginas de mayor hash y reescala los conteos a la nueva tasa"""
+        old_threshold = self.reuse_threshold
+        heap = self.reuse_heap
+        last = self.reuse_last
+        while len(last) > self.reuse_max_pages or (heap and -heap[0][0] >= self.reuse_threshold):
+            negative_hash, page_num = heappop(heap)
+            self.reuse_threshold = -negative_hash
+            self.reuse_tree.add(last.pop(page_num), -1)
+        
+        scale = self.reuse_threshold / old_threshold
+        self.reuse_hist[:] = [count * scale for count in self.reuse_hist]
+        self.reuse_cold *= scale
+        return self.reuse_threshold
+    
+    def _compact_reuse_times(self):
+        """Renumera los últimos accesos 0..n-1 en orden cuando el reloj llega al final del árbol"""
+        order = sorted(self.reuse_last, key=self.reuse_last.get)
+        tree = FenwickTree(self.reuse_tree.size)
+        for clock, page_num in enumerate(order):
+            tree.add(clock, 1)
+        self.reuse_last.update(zip(order, range(len(order))))
+        self.reuse_tree = tree
+        self.reuse_clock = len(order)
+    
+    def _update_strides(self, pages):
+        stride_hist = self.stride_hist
+        last_page = self.last_page
+        if last_page is None and len(pages):
+            last_page = pages[0]
+        
+        for page_num in pages:
+            stride = page_num - last_page
+            if stride >= 0:
+                stride_hist[65 + stride.bit_length()] += 1
+            else:
+                stride_hist[65 - (-stride).bit_length()] += 1
+            last_page = page_num
+        
+        self.last_page = last_page
+    
+    def _update_heavy_hitters(self, pages):
+        batch_counts = Counter(pages)
+        shift = self.sketch_shift
+        for seed, row in zip(self.sketch_seeds, self.sketch):
+            for page_num, count in batch_counts.items():
+                row[((page_num * seed) & SAMPLE_HASH_MASK) >> shift] += count
+        
+        # Misra-Gries por referencia (no depende de cómo se corten los lotes): una página sin
+        # contador y sin hueco descuenta 1 a todos; como mucho n / (k + 1) descuentos de O(k)
+        heavy = self.heavy_counts
+        capacity = self.heavy_capacity
+        for page_num in pages:
+            count = heavy.get(page_num)
+            if count is not None:
+                heavy[page_num] = count + 1
+            elif len(heavy) < capacity:
+                heavy[page_num] = 1
+            else:
+                heavy = {page: count - 1 for page, count in heavy.items() if count > 1}
+        self.heavy_counts = heavy
+    
+    def estimate_count(self, page_num):
+        """Frecuencia estimada (cota superior) según el sketch Count-Min"""
+        shift = self.sketch_shift
+        return min(row[((page_num * seed) & SAMPLE_HASH_MASK) >> shift]
+                   for seed, row in zip(self.sketch_seeds, self.sketch))
+    
+    def summary(self):
+        """Resultados serializables a JSON"""
+        windows = self.windows_seen
+        rate = self.reuse_threshold / (1 << 32)
+        reuse = {}
+        for bucket, count in enumerate(self.reuse_hist):
+            if count:
+                reuse[f"{1 << (bucket - 1)}-{(1 << bucket) - 1}"] = round(count / rate)
+        
+        strides = {}
+        for index, count in enumerate(self.stride_hist):
+            if count:
+                bucket = index - 65
+                if bucket == 0:
+                    label = "0"
+                elif bucket > 0:
+                    label = f"+{1 << (bucket - 1)}..+{(1 << bucket) - 1}"
+                else:
+                    label = f"-{(1 << (-bucket)) - 1}..-{1 << (-bucket - 1)}"
+                strides[label] = count
+        
+        heavy = sorted(
+            ({'page': page, 'estimated_count': self.estimate_count(page), 'min_count': count}
+             for page, count in self.heavy_counts.items()),
+            key=lambda entry: entry['estimated_count'], reverse=True
+        )
+        
+        return {
+            'total_references': self.position,
+            'working_set': {
+                'window': self.window,
+                'windows': windows,
+                'mean': self.ws_sum / windows if windows else 0,
+                'max': self.ws_max,
+                'series': [list(point) for point in self.ws_series]
+            },
+            'reuse_distance_log2': reuse,
+            'reuse_cold': round(self.reuse_cold / rate),
+            'reuse_sample_rate': rate,
+            'stride_log2': strides,
+            'heavy_hitters': heavy
+        }
+
+def print_analytics(summary):
+    """Muestra el resumen de la analítica de localidad"""
+    print_section_header("ANALÍTICA DE LOCALIDAD", Colors.PURPLE)
+    working_set = summary['working_set']
+    print(f"{Colors.BOLD}{Colors.PURPLE}🪟 Working set (τ={working_set['window']:,}): {Colors.WHITE}"
+          f"media {working_set['mean']:.1f} páginas, máximo {working_set['max']:,} en {working_set['windows']:,} ventanas{Colors.ENDC}")
+    
+    rows = [[bucket, f"{count:,}"] for bucket, count in summary['reuse_distance_log2'].items()]
+    rows.append(["Primer acceso", f"{summary['reuse_cold']:,}"])
+    print_table(["Distancia (páginas)", "Referencias (est.)"], rows,
+                f"DISTANCIAS DE REUSO (muestreo {summary['reuse_sample_rate']:.2%})", [Colors.CYAN, Colors.YELLOW])
+    
+    rows = [[bucket, f"{count:,}"] for bucket, count in summary['stride_log2'].items()]
+    print_table(["Stride (páginas)", "Referencias"], rows, "STRIDES ENTRE PÁGINAS", [Colors.CYAN, Colors.YELLOW])
+    
+    rows = [[f"0x{entry['page']:X}", f"{entry['estimated_count']:,}"] for entry in summary['heavy_hitters'][:10]]
+    print_table(["Página", "Accesos (est.)"], rows, "PÁGINAS MÁS ACCEDIDAS", [Colors.CYAN, Colors.YELLOW])
+
+# ═══════════════════════ Checkpoints ═══════════════════════
+
+CHECKPOINT_SUFFIX = '.vmckpt'
+CHECKPOINT_MAGIC = b'VMCKPT03'
+# magic, tamaño de la traza, mtime_ns de la traza, referencias procesadas, offset en bytes
+CHECKPOINT_HEADER = struct.Struct('<8sQqQQ')
+
+class CheckpointWriter(threading.Thread):
+    """Hilo que comprime y escribe los checkpoints fuera del bucle de simulación"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.pending = queue.Queue(maxsize=4)
+        self.start()
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            try:
+                if item is None:
+                    return
+                path, header, payload = item
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(header)
+                    f.write(zlib.compress(payload, 1))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"\n{Colors.WARNING}⚠️  No se pudo escribir el checkpoint: {e}{Colors.ENDC}")
+            finally:
+                self.pending.task_done()
+
+    def submit(self, path, header, payload):
+        self.pending.put((path, header, payload))
+
+    def flush(self):
+        self.pending.join()
+
+_checkpoint_writer = None
+
+def flush_checkpoints():
+    """Espera a que terminen las escrituras de checkpoints pendientes"""
+    if _checkpoint_writer is not None:
+        _checkpoint_writer.flush()
+
+class CheckpointConfig:
+    """Dónde y cada cuántas referencias guardar el estado de cada simulación"""
+    __slots__ = ['directory', 'every', 'resume', 'trace_name', 'trace_size', 'trace_mtime_ns']
+
+    def __init__(self, directory, every, resume, trace_path):
+        self.directory = directory
+        self.every = every
+        self.resume = resume
+        if trace_path == STDIN_TRACE:
+            # Reanudar desde stdin exige volver a enviar la misma traza
+            self.trace_name, self.trace_size, self.trace_mtime_ns = 'stdin', 0, 0
+            return
+        source = os.stat(trace_path)
+        self.trace_name = os.path.basename(trace_path)
+        self.trace_size = source.st_size
+        self.trace_mtime_ns = source.st_mtime_ns
+
+    def path_for(self, frames, policy, page_size=BASE_PAGE_SIZE):
+        size = '' if page_size == BASE_PAGE_SIZE else f".{format_page_size(page_size)}"
+        return os.path.join(self.directory, f"{self.trace_name}.{policy}.{frames}{size}{CHECKPOINT_SUFFIX}")
+
+    def save(self, manager, frames, policy, position, byte_offset=0):
+        """Serializa el estado en el hilo actual; compresión y escritura van en segundo plano"""
+        global _checkpoint_writer
+        payload = pickle.dumps(
+            {'key': manager.checkpoint_key(), 'state': manager.get_checkpoint_state()},
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+        header = CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, self.trace_size, self.trace_mtime_ns, position, byte_offset)
+        # En cada guardado: otra configuración del proceso puede usar otro directorio
+        os.makedirs(self.directory, exist_ok=True)
+        if _checkpoint_writer is None:
+            _checkpoint_writer = CheckpointWriter()
+        _checkpoint_writer.submit(self.path_for(frames, policy, manager.page_size), header, payload)
+
+    def load(self, manager, frames, policy):
+        """Restaura el gestor desde su checkpoint; devuelve (posición, offset) o None"""
+        path = self.path_for(frames, policy, manager.page_size)
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(CHECKPOINT_HEADER.size)
+                if len(header) != CHECKPOINT_HEADER.size:
+                    return None
+                magic, size, mtime_ns, position, byte_offset = CHECKPOINT_HEADER.unpack(header)
+                if magic != CHECKPOINT_MAGIC or size != self.trace_size or mtime_ns != self.trace_mtime_ns:
+                    return None
+                checkpoint = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError):
+            return None
+
+        if checkpoint['key'] != manager.checkpoint_key():
+            return None
+        manager.restore_checkpoint_state(checkpoint['state'])
+        return position, byte_offset
+
+    def discard(self, frames, policy, page_size=BASE_PAGE_SIZE):
+        """Borra el checkpoint de una simulación terminada"""
+        flush_checkpoints()
+        try:
+            os.remove(self.path_for(frames, policy, page_size))
+        except FileNotFoundError:
+            pass
+
+# ═══════════════════════ Motor de distancias de pila (Mattson) ═══════════════════════
+
+STACK_POLICIES = ('LRU', 'OPT')
+OPT_STACK_BLOCK = 32  # niveles por bloque en el máximo por bloques de la pila OPT
+
+class FenwickTree:
+    """Árbol de Fenwick para sumas de prefijo en O(log n)"""
+    __slots__ = ['size', 'tree']
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = array('l', bytes(array('l').itemsize * (size + 1)))
+
+    def add(self, index, delta):
+        tree = self.tree
+        size = self.size
+        index += 1
+        while index <= size:
+            tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index):
+        """Suma de los elementos [0, index]"""
+        tree = self.tree
+        total = 0
+        index += 1
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+def compute_next_use(pages):
+    """next_use[i] = posición del siguiente acceso a pages[i] (len(pages) si no hay más)"""
+    count = len(pages)
+    next_use = array('q', bytes(array('q').itemsize * count))
+    upcoming = {}
+    for pos in range(count - 1, -1, -1):
+        page_num = pages[pos]
+        next_use[pos] = upcoming.get(page_num, count)
+        upcoming[page_num] = pos
+    return next_use
+
+def lru_stack_histogram(pages):
+    """Histograma de distancias de pila LRU: hist[d] = referencias con distancia d (d >= 1)"""
+    tree = FenwickTree(len(pages))
+    add = tree.add
+    prefix_sum = tree.prefix_sum
+    last_access = {}
+    hist = [0, 0]
+    cold_misses = 0
+
+    for pos, page_num in enumerate(pages):
+        previous = last_access.get(page_num)
+        if previous is None:
+            cold_misses += 1
+            hist.append(0)
+        else:
+            # Páginas distintas tocadas desde el último acceso (incluida ésta)
+            distance = len(last_access) - prefix_sum(previous) + 1
+            hist[distance] += 1
+            add(previous, -1)
+        add(pos, 1)
+        last_access[page_num] = pos
+
+    return hist, cold_misses, len(last_access)
+
+def opt_stack_histogram(pages, max_depth=None):
+    """Histograma de distancias de pila OPT (pila de prioridades de Mattson)
+
+    Al subir la página referenciada desde el nivel d solo cambian de nivel los máximos de
+    prefijo del siguiente uso entre los niveles 0..d-1, que en la práctica son pocos. Se
+    localizan con el máximo por bloque de OPT_STACK_BLOCK niveles, saltando los bloques que
+    no superan al máximo de encima, y se rotan con operaciones en C.
+    La pila se trunca en max_depth: una referencia más profunda cuenta como fallo
+    para cualquier tamaño <= max_depth.
+    """
+    next_use = compute_next_use(pages)
+    block = OPT_STACK_BLOCK
+    stack = []      # página de cada nivel, la cima primero
+    upcoming = []   # siguiente uso de la página de cada nivel
+    block_max = []  # máximo de upcoming en cada bloque de niveles
+    level_of = {}   # página en la pila -> nivel
+    seen = set()
+    hist = [0, 0]
+    misses = 0
+    if max_depth is None:
+        max_depth = len(pages)
+
+    for pos, page_num in enumerate(pages):
+        depth = level_of.get(page_num)
+        if depth is None:
+            depth = len(stack)
+            misses += 1
+            if page_num not in seen:
+                seen.add(page_num)
+                hist.append(0)
+        else:
+            hist[depth + 1] += 1
+
+        if depth:
+            # Niveles que cambian: la cima y cada nivel cuyo siguiente uso supera a todos los de
+            # encima. La página referenciada sube a la cima y cada una de ésas baja al siguiente
+            levels = [0]
+            threshold = upcoming[0]
+            for index in range((depth - 1) // block + 1):
+                if block_max[index] <= threshold:
+                    continue
+                low = max(1, index * block)
+                high = min(depth, (index + 1) * block)
+                while True:
+                    low = next(compress(range(low, high), map(threshold.__lt__, upcoming[low:high])), high)
+                    if low == high:
+                        break
+                    levels.append(low)
+                    threshold = upcoming[low]
+                    low += 1
+
+            # Rotación en C: cada nivel de levels pasa al siguiente y el último baja al nivel d
+            targets = levels[1:]
+            targets.append(depth)
+            moved = list(map(stack.__getitem__, levels))
+            moved_use = list(map(upcoming.__getitem__, levels))
+            if depth == len(stack):
+                if depth < max_depth:
+                    stack.append(None)
+                    upcoming.append(0)
+                    if depth % block == 0:
+                        block_max.append(0)
+                else:
+                    # Pila truncada: la página que bajaría a max_depth sale de ella
+                    del level_of[moved.pop()]
+                    moved_use.pop()
+                    targets.pop()
+            deque(map(stack.__setitem__, targets, moved), maxlen=0)
+            deque(map(upcoming.__setitem__, targets, moved_use), maxlen=0)
+            level_of.update(zip(moved, targets))
+            stack[0] = page_num
+            level_of[page_num] = 0
+            levels = targets
+        elif not stack:
+            stack.append(page_num)
+            upcoming.append(0)
+            block_max.append(0)
+            level_of[page_num] = 0
+            levels = []
+        else:
+            levels = []
+
+        upcoming[0] = next_use[pos]
+        block_max[0] = max(upcoming[:block])
+        for index in {level // block for level in levels if level >= block}:
+            block_max[index] = max(upcoming[index * block:(index + 1) * block])
+
+    return hist, misses, len(seen)
+
+def faults_by_frame_count(hist, misses, max_frames):
+    """faults[c] para c = 0..max_frames a partir del histograma de distancias"""
+    faults = [0] * (max_frames + 1)
+    deeper = misses + sum(hist[max_frames + 1:])
+    for frames in range(max_frames, -1, -1):
+        faults[frames] = deeper
+        if frames < len(hist):
+            deeper += hist[frames]
+    return faults
+
+def run_stack_engine(trace, policy, frame_counts, miss_ratio_curve=False, timings=DEFAULT_TIMINGS,
+                     page_size=BASE_PAGE_SIZE, tlb_entries=DEFAULT_TLB_REACH_ENTRIES):
+    """Calcula las estadísticas de todos los tamaños de frames en una sola pasada
+
+    trace debe tener ya páginas de page_size (coarsen_trace).
+    """
+    start_time = time.time()
+    pages = trace.pages
+
+    if policy == "LRU":
+        hist, misses, unique_pages = lru_stack_histogram(pages)
+    elif policy == "OPT":
+        max_depth = None if miss_ratio_curve else max(frame_counts)
+        hist, misses, unique_pages = opt_stack_histogram(pages, max_depth)
+    else:
+        raise ValueError(f"El motor de pila no cubre la política {policy}")
+
+    max_frames = unique_pages if miss_ratio_curve else max(frame_counts)
+    faults = faults_by_frame_count(hist, misses, max(max_frames, max(frame_counts)))
+    elapsed = time.time() - start_time
+
+    total = trace.count
+    writes = trace.write_count()
+    results = []
+    for frames in frame_counts:
+        page_faults = faults[frames]
+        stats = summarize_counters(
+            total, total - page_faults, page_faults, page_faults - min(frames, unique_pages),
+            None, total - writes, writes, unique_pages, timings
+        )
+        stats.update({
+            'frames': frames,
+            'policy': policy,
+            'execution_time': elapsed,
+            'engine': 'stack'
+        })
+        stats.update(page_size_statistics(page_size, frames, unique_pages, tlb_entries))
+        results.append(stats)
+
+    curve = None
+    if miss_ratio_curve and total:
+        curve = [faults[frames] / total for frames in range(1, unique_pages + 1)]
+    return results, curve
+
+def simulate_decoded_trace(manager, trace, on_progress=None, progress_step=65536, first=0,
+                           on_checkpoint=None, checkpoint_every=0):
+    """Ejecuta la traza decodificada sobre un gestor desde la referencia first, reportando el avance por tramos"""
+    access_batch = manager.access_batch
+    pages = trace.pages
+    shift = manager.page_shift
+    total_refs = trace.count
+    last_checkpoint = first
+    
+    for start in range(first, total_refs, progress_step):
+        end = min(start + progress_step, total_refs)
+        access_batch(coarsen_pages(pages[start:end], shift), trace.operations(start, end), start)
+        if on_progress is not None:
+            on_progress(end)
+        if on_checkpoint is not None and end - last_checkpoint >= checkpoint_every and end < total_refs:
+            on_checkpoint(end)
+            last_checkpoint = end
+
+def run_configuration(manager, trace, frames, policy, checkpoint=None, on_progress=None, verbose=True):
+    """Simula una configuración sobre la traza decodificada, reanudando desde su checkpoint si existe"""
+    first = 0
+    if checkpoint is not None and checkpoint.resume:
+        restored = checkpoint.load(manager, frames, policy)
+        if restored is not None:
+            first = restored[0]
+            if verbose:
+                print(f"{Colors.OKGREEN}♻️  Reanudando {policy} con {frames} frames desde la referencia {first:,}{Colors.ENDC}")
+    
+    if manager.policy.requires_trace:
+        manager.prepare_policy(trace, verbose)
+    
+    on_checkpoint = None
+    if checkpoint is not None:
+        def on_checkpoint(pos):
+            checkpoint.save(manager, frames, policy, pos)
+    
+    with (manager.profile or DISABLED_TIMER).phase('simulate'):
+        simulate_decoded_trace(manager, trace, on_progress, first=first, on_checkpoint=on_checkpoint,
+                               checkpoint_every=checkpoint.every if checkpoint is not None else 0)
+    if checkpoint is not None:
+        checkpoint.discard(frames, policy, manager.page_size)
+
+def iter_decoded_batches(trace, chunk_size, first=0):
+    """Recorre una traza decodificada en lotes (páginas, operaciones, posición final)"""
+    for start in range(first, trace.count, chunk_size):
+        end = min(start + chunk_size, trace.count)
+        yield trace.pages[start:end], trace.operations(start, end), end
+
+def simulate_many(trace, configs, chunk_size=65536, on_progress=None, options=None, analytics=None,
+                  reporter=None):
+    """Simula varias configuraciones (frames, política[, tamaño de página]) en una sola pasada
+
+    trace puede ser una DecodedTrace o la ruta del archivo de texto; con una ruta se lee
+    por bloques salvo que alguna política necesite la traza completa. Cada lote se pasa
+    a todos los gestores mientras sigue en caché, convertido una vez por tamaño de página.
+    on_progress(referencias, posición)
+    recibe la posición en bytes del archivo o en referencias de la traza decodificada.
+    options (SimulationOptions) aplica muestreo, latencias y modelo de TLB a todas;
+    analytics (TraceAnalytics) recibe los mismos lotes y reporter (LiveReporter)
+    sigue los contadores de todos los gestores.
+    Devuelve un diccionario de estadísticas por configuración, en el orden de configs,
+    sin imprimir nada.
+    """
+    configs = [(config[0], config[1], config[2] if len(config) > 2 else BASE_PAGE_SIZE) for config in configs]
+    managers = [create_manager(frames, policy, options, page_size) for frames, policy, page_size in configs]
+    elapsed = [0.0] * len(managers)
+    timer = options.profile if options is not None and options.profile is not None else DISABLED_TIMER
+    
+    if not isinstance(trace, DecodedTrace) and any(manager.policy.requires_trace for manager in managers):
+        trace = decode_trace_file(trace, show_progress=False, timer=timer)
+    
+    for index, manager in enumerate(managers):
+        if manager.policy.requires_trace:
+            start_time = time.perf_counter()
+            manager.prepare_policy(trace, verbose=False)
+            elapsed[index] += time.perf_counter() - start_time
+    
+    # Reanudar solo si todas las configuraciones tienen checkpoint en el mismo punto
+    checkpoint = options.checkpoint if options is not None else None
+    pos = 0
+    byte_offset = 0
+    if checkpoint is not None and checkpoint.resume:
+        restored = [create_manager(frames, policy, options, page_size) for frames, policy, page_size in configs]
+        positions = {checkpoint.load(manager, frames, policy)
+                     for manager, (frames, policy, _) in zip(restored, configs)}
+        if len(positions) == 1 and None not in positions:
+            pos, byte_offset = positions.pop()
+            for index, manager in enumerate(restored):
+                if manager.policy.requires_trace:
+                    manager.prepare_policy(trace, verbose=False)
+            managers = restored
+    
+    if isinstance(trace, DecodedTrace):
+        batches = iter_decoded_batches(trace, chunk_size, pos)
+    else:
+        batches = iter_trace_batches(trace, start_offset=byte_offset, timer=timer)
+    
+    probes = []
+    if reporter is not None:
+        total = trace.count if isinstance(trace, DecodedTrace) else estimate_reference_count(trace)
+        probes = [ManagerProbe(manager, frames, config_label(policy, page_size), total, pos)
+                  for manager, (frames, policy, page_size) in zip(managers, configs)]
+        reporter.begin(f"Procesando {len(configs)} configuraciones", probes)
+    
+    last_checkpoint = pos
+    perf_counter = time.perf_counter
+    process_time = time.process_time
+    batch_calls = [manager.access_batch for manager in managers]
+    shifts = [manager.page_shift for manager in managers]
+    batch_wall = [0.0] * len(managers)
+    batch_cpu = [0.0] * len(managers)
+    batch_count = 0
+    for pages, operations, end in batches:
+        pages_by_shift = {shift: coarsen_pages(pages, shift) for shift in set(shifts)}
+        for index, access_batch in enumerate(batch_calls):
+            start_time = perf_counter()
+            start_cpu = process_time()
+            access_batch(pages_by_shift[shifts[index]], operations, pos)
+            batch_wall[index] += perf_counter() - start_time
+            batch_cpu[index] += process_time() - start_cpu
+        batch_count += 1
+        if analytics is not None:
+            with timer.phase('analytics'):
+                analytics.process_batch(pages)
+        pos += len(pages)
+        for probe in probes:
+            probe.position = pos
+        if on_progress is not None:
+            on_progress(pos, end)
+        if checkpoint is not None and pos - last_checkpoint >= checkpoint.every:
+            for manager, (frames, policy, _) in zip(managers, configs):
+                checkpoint.save(manager, frames, policy, pos, 0 if isinstance(trace, DecodedTrace) else end)
+            last_checkpoint = pos
+    
+    if reporter is not None:
+        reporter.end()
+    if checkpoint is not None:
+        for frames, policy, page_size in configs:
+            checkpoint.discard(frames, policy, page_size)
+    
+    results = []
+    for index, manager in enumerate(managers):
+        elapsed[index] += batch_wall[index]
+        if manager.profile is not None:
+            manager.profile.add('simulate', batch_wall[index], batch_cpu[index], batch_count)
+    for (frames, policy, _), manager, seconds in zip(configs, managers, elapsed):
+        stats = manager.get_statistics()
+        stats.update({
+            'frames': frames,
+            'policy': policy,
+            'execution_time': seconds
+        })
+        results.append(stats)
+    return results
+
+# ═══════════════════════ Monitor en tiempo real ═══════════════════════
+
+class ManagerProbe:
+    """Contadores de una simulación en curso leídos por el LiveReporter
+
+    El bucle de simulación solo asigna position; hits y fallos se leen del gestor."""
+    __slots__ = ('manager', 'frames', 'policy', 'total', 'position')
+
+    def __init__(self, manager, frames, policy, total, position=0):
+        self.manager = manager
+        self.frames = frames
+        self.policy = policy
+        self.total = total
+        self.position = position
+    
+    def sample(self):
+        return self.position, self.manager.hits, self.manager.page_faults
+
+class SharedProgressProbe:
+    """Contadores que un worker de --jobs publica en memoria compartida (posición, hits, fallos)"""
+    __slots__ = ('progress', 'index', 'frames', 'policy', 'total')
+
+    def __init__(self, progress, index, frames, policy, total):
+        self.progress = progress
+        self.index = index
+        self.frames = frames
+        self.policy = policy
+        self.total = total
+    
+    def sample(self):
+        base = 3 * self.index
+        return self.progress[base], self.progress[base + 1], self.progress[base + 2]
+
+def format_eta(seconds):
+    """Segundos restantes como [h:]mm:ss"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+class MetricsFileExporter:
+    """Escribe las métricas en formato de texto de Prometheus (reemplazo atómico del archivo)"""
+
+    def __init__(self, path):
+        self.path = path
+    
+    def publish(self, text):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
+    
+    def close(self):
+        pass
+
+class MetricsSocketExporter(threading.Thread):
+    """Sirve las últimas métricas por un socket UNIX: cada conexión recibe el texto y se cierra"""
+
+    def __init__(self, path):
+        super().__init__(name="vmsim-metrics", daemon=True)
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        self.path = path
+        self.text = ''
+        self.stopped = threading.Event()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(path)
+        self.sock.listen(8)
+        self.sock.settimeout(0.5)
+        self.start()
+    
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.sendall(self.text.encode())
+                except OSError:
+                    pass
+    
+    def publish(self, text):
+        self.text = text
+    
+    def close(self):
+        self.stopped.set()
+        self.join()
+        self.sock.close()
+        os.unlink(self.path)
+
+class LiveReporter(threading.Thread):
+    """Hilo que muestrea los contadores de las simulaciones en curso cada interval segundos
+
+    Todo el formato y la escritura ocurren aquí: el bucle de simulación solo actualiza
+    enteros. Sin detailed muestra la barra de progreso; con detailed añade refs/s, tasa
+    de hits y de fallos del último intervalo y ETA. exporters reciben las mismas métricas
+    en formato de texto de Prometheus.
+    """
+
+    def __init__(self, interval=1.0, detailed=False, exporters=()):
+        super().__init__(name="vmsim-reporter", daemon=True)
+        self.interval = interval
+        self.detailed = detailed
+        self.exporters = list(exporters)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.description = None
+        self.probes = []
+        self.reset_rates()
+    
+    def reset_rates(self):
+        self.last_time = time.perf_counter()
+        self.last_sample = (0, 0, 0)
+        self.rate = None
+        self.hit_rate = None
+    
+    def begin(self, description, probes):
+        """Empieza a seguir una tarea (una o varias configuraciones en curso)"""
+        with self.lock:
+            self.description = description
+            self.probes = list(probes)
+            self.reset_rates()
+            self.last_sample = self.totals()
+    
+    def end(self, completed=True):
+        """Dibuja el estado final de la tarea y deja de seguirla"""
+        with self.lock:
+            if self.description is not None:
+                self.render(completed)
+                print()
+            self.description = None
+            self.probes = []
+    
+    def totals(self):
+        position = hits = faults = 0
+        for probe in self.probes:
+            probe_position, probe_hits, probe_faults = probe.sample()
+            position += probe_position
+            hits += probe_hits
+            faults += probe_faults
+        return position, hits, faults
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                if self.description is not None:
+                    self.render()
+    
+    def stop(self):
+        self.stopped.set()
+        if self.is_alive():
+            self.join()
+        self.end(completed=False)
+        for exporter in self.exporters:
+            exporter.close()
+    
+    def render(self, completed=False):
+        now = time.perf_counter()
+        position, hits, faults = self.totals()
+        total = sum(probe.total for probe in self.probes)
+        if completed and total:
+            # Con --stream el total es una estimación
+            position = total
+        
+        last_position, last_hits, last_faults = self.last_sample
+        elapsed = now - self.last_time
+        if elapsed > 0 and position > last_position:
+            rate = (position - last_position) / elapsed
+            self.rate = rate if self.rate is None else 0.7 * self.rate + 0.3 * rate
+        resolved = (hits - last_hits) + (faults - last_faults)
+        if resolved > 0:
+            self.hit_rate = (hits - last_hits) / resolved * 100
+        self.last_time = now
+        self.last_sample = (position, hits, faults)
+        
+        if total:
+            current = min(position, total)
+            eta = (total - current) / self.rate if self.rate else None
+        else:
+            # Traza desde stdin: sin total ni ETA
+            current, eta = position, None
+        line = self.format_line(current, total, eta)
+        print(f"\r{line}", end="", flush=True)
+        
+        if self.exporters:
+            text = self.format_metrics(eta)
+            for exporter in self.exporters:
+                exporter.publish(text)
+    
+    def format_line(self, current, total, eta):
+        width = 30 if self.detailed else 50
+        if total:
+            progress = int(width * current / total)
+            bar = "█" * progress + "░" * (width - progress)
+            line = (f"{Colors.BOLD}{Colors.CYAN}{self.description}: {Colors.YELLOW}[{bar}] "
+                    f"{current / total * 100:.1f}% ({current:,}/{total:,})")
+        else:
+            line = f"{Colors.BOLD}{Colors.CYAN}{self.description}: {Colors.YELLOW}{current:,} referencias"
+        if self.detailed:
+            rate = f"{self.rate:,.0f}" if self.rate else "-"
+            hit_rate = f"{self.hit_rate:.1f}%" if self.hit_rate is not None else "-"
+            fault_rate = f"{100 - self.hit_rate:.1f}%" if self.hit_rate is not None else "-"
+            line += (f" {Colors.OKGREEN}⚡ {rate} refs/s │ hits {hit_rate} │ fallos {fault_rate}"
+                     f" │ ETA {format_eta(eta)}")
+        return line + f"{Colors.ENDC}\033[K"
+    
+    def format_metrics(self, eta):
+        """Métricas en formato de texto de Prometheus"""
+        lines = []
+        per_probe = [(probe, probe.sample()) for probe in self.probes]
+        for index, (name, help_text) in enumerate((
+            ('vmsim_references_total', 'Referencias procesadas'),
+            ('vmsim_hits_total', 'Hits de página'),
+            ('vmsim_page_faults_total', 'Fallos de página')
+        )):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for probe, sample in per_probe:
+                lines.append(f'{name}{{policy="{probe.policy}",frames="{probe.frames}"}} {sample[index]}')
+        
+        lines.append("# HELP vmsim_progress_ratio Fracción de la traza procesada")
+        lines.append("# TYPE vmsim_progress_ratio gauge")
+        for probe, sample in per_probe:
+            if not probe.total:
+                continue
+            ratio = min(1.0, sample[0] / probe.total)
+            lines.append(f'vmsim_progress_ratio{{policy="{probe.policy}",frames="{probe.frames}"}} {ratio:.6f}')
+        
+        for name, help_text, value in (
+            ('vmsim_references_per_second', 'Referencias simuladas por segundo', self.rate),
+            ('vmsim_interval_hit_ratio', 'Tasa de hits del último intervalo',
+             self.hit_rate / 100 if self.hit_rate is not None else None),
+            ('vmsim_eta_seconds', 'Tiempo restante estimado', eta)
+        ):
+            if value is not None:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value:.3f}")
+        return "\n".join(lines) + "\n"
+
+# ═══════════════════════ Barrido paralelo ═══════════════════════
+
+class SharedTraceBuffer:
+    """Traza decodificada copiada a memoria compartida: páginas seguidas del bitmap R/W"""
+
+    def __init__(self, trace):
+        self.count = trace.count
+        pages_size = trace.count * 8
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, pages_size + len(trace.ops)))
+        self.shm.buf[:pages_size] = memoryview(trace.pages).cast('B')
+        self.shm.buf[pages_size:pages_size + len(trace.ops)] = trace.ops
+    
+    @staticmethod
+    def attach(name, count):
+        """Vista de solo lectura de la traza desde un worker, sin copiarla"""
+        shm = shared_memory.SharedMemory(name=name)
+        pages_size = count * 8
+        pages = shm.buf[:pages_size].cast('Q')
+        ops = shm.buf[pages_size:pages_size + ((count + 7) >> 3)]
+        return shm, DecodedTrace(pages, ops)
+    
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+# Estado por proceso worker (se inicializa una vez por proceso)
+_sweep_worker_state = {}
+
+def _init_sweep_worker(trace_name, count, progress_name, options=None):
+    trace_shm, trace = SharedTraceBuffer.attach(trace_name, count)
+    progress_shm = shared_memory.SharedMemory(name=progress_name)
+    _sweep_worker_state.update({
+        'trace_shm': trace_shm,
+        'trace': trace,
+        'progress_shm': progress_shm,
+        'progress': progress_shm.buf.cast('q'),
+        'options': options
+    })
+
+def _run_sweep_config(index, frames, policy, page_size=BASE_PAGE_SIZE):
+    trace = _sweep_worker_state['trace']
+    progress = _sweep_worker_state['progress']
+    
+    start_time = time.time()
+    options = _sweep_worker_state['options']
+    manager = create_manager(frames, policy, options, page_size)
+    
+    base = 3 * index
     
-    line = "├" + "┼".join("─" * width for width in col_widths) + "┤"
-    print(f"{Colors.BOLD}{Colors.CYAN}{line}{Colors.ENDC}")
+    def on_progress(pos):
+        progress[base] = pos
+        progress[base + 1] = manager.hits
+        progress[base + 2] = manager.page_faults
     
-    for row in rows:
-        row_line = "│"
-        for i, (cell, width) in enumerate(zip(row, col_widths)):
-            color = colors[i] if i < len(colors) else Colors.WHITE
-            cell_str = str(cell).rjust(width-1) + " "
-            row_line += f"{color}{cell_str}{Colors.ENDC}│"
-        print(row_line)
-  
-    line = "└" + "┴".join("─" * width for width in col_widths) + "┘"
-    print(f"{Colors.BOLD}{Colors.CYAN}{line}{Colors.ENDC}")
+    run_configuration(manager, trace, frames, policy, options.checkpoint if options else None,
+                      on_progress, verbose=False)
+    on_progress(trace.count)
+    
+    stats = manager.get_statistics()
+    stats.update({
+        'frames': frames,
+        'policy': policy,
+        'execution_time': time.time() - start_time
+    })
+    return stats
 
-def print_progress_bar(current, total, description="Progreso", width=50):
-    """Barra de progreso"""
-    progress = int(width * current / total)
-    bar = "█" * progress + "░" * (width - progress)
-    percentage = (current / total) * 100
+def run_parallel_sweep(trace, configs, jobs, options=None, reporter=None):
+    """Simula cada (frames, política, tamaño de página) en un ProcessPoolExecutor; resultados en el orden de configs"""
+    shared_trace = SharedTraceBuffer(trace)
+    # Por configuración: posición, hits y fallos, escritos por el worker tras cada tramo
+    progress_shm = shared_memory.SharedMemory(create=True, size=24 * max(1, len(configs)))
+    progress = progress_shm.buf.cast('q')
+    for index in range(3 * len(configs)):
+        progress[index] = 0
     
-    print(f"\r{Colors.BOLD}{Colors.CYAN}{description}: {Colors.YELLOW}[{bar}] {percentage:.1f}% ({current:,}/{total:,}){Colors.ENDC}", end="", flush=True)
+    probes = [SharedProgressProbe(progress, index, frames, config_label(policy, page_size), trace.count)
+              for index, (frames, policy, page_size) in enumerate(configs)]
+    results = [None] * len(configs)
+    
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_sweep_worker,
+                                 initargs=(shared_trace.shm.name, trace.count, progress_shm.name,
+                                           options)) as executor:
+            futures = {
+                executor.submit(_run_sweep_config, index, frames, policy, page_size): index
+                for index, (frames, policy, page_size) in enumerate(configs)
+            }
+            if reporter is not None:
+                reporter.begin(f"Procesando {len(configs)} configuraciones", probes)
+            for future in futures:
+                results[futures[future]] = future.result()
+    finally:
+        # El reporter deja de leer la memoria compartida antes de liberarla
+        if reporter is not None:
+            reporter.end(completed=all(result is not None for result in results))
+        progress.release()
+        progress_shm.close()
+        progress_shm.unlink()
+        shared_trace.release()
+    
+    return results
 
-class MemoryReference:
-    __slots__ = ['address', 'operation', 'page_num']
+def process_trace_file_advanced(filepath, frame_counts, policies, show_realtime=False, cache_trace=False,
+                                stream=False, engine='sim', miss_ratio_curves=None, jobs=1, options=None,
+                                analytics=None, reporter=None, page_sizes=None, store=None):
+    """Procesa el archivo de traza con estadísticas avanzadas
+
+    Con store (ResultsStore) las configuraciones ya simuladas sobre el mismo contenido de
+    traza se sirven del almacén y las nuevas se guardan en él.
+    """
+    options = options or DEFAULT_OPTIONS
+    page_sizes = page_sizes or [BASE_PAGE_SIZE]
+    memoized = {}
+    trace_hash = None
+    if store is not None:
+        trace_hash = store.trace_hash(filepath)
+        configs = [(frames, policy, page_size) for frames in frame_counts for policy in policies for page_size in page_sizes]
+        stacked = set(STACK_POLICIES) if engine == 'stack' else set()
+        if miss_ratio_curves is not None:
+            # Las curvas de fallos completas no se guardan: con --mrc el motor de pila siempre recalcula
+            configs = [config for config in configs if config[1] not in stacked]
+        memoized = store.lookup(trace_hash, configs, options, stacked)
     
-    def __init__(self, address, operation):
-        self.address = address
-        self.operation = operation
-        self.page_num = address >> 12
+    reporter = reporter or LiveReporter(detailed=show_realtime)
+    if not reporter.is_alive():
+        reporter.start()
+    try:
+        results = _process_trace_file(filepath, frame_counts, policies, cache_trace, stream, engine,
+                                      miss_ratio_curves, jobs, options, analytics, reporter, page_sizes, memoized)
+    finally:
+        reporter.stop()
+    
+    if store is not None:
+        store.record_run(filepath, trace_hash, options, results)
+    return results
 
-class AdvancedPagedMemoryManager:
-    def __init__(self, frame_count, replacement_policy):
-        self.frame_count = frame_count
-        self.replacement_policy = replacement_policy
-        self.page_table = {}
-        self.frame_table = {}
-        self.dirty_pages = set()
-       
-        self.page_faults = 0
-        self.disk_writes = 0
-        self.replacements = 0
-        self.hits = 0
-        self.total_accesses = 0
-        self.operation_stats = {'R': 0, 'W': 0}
-        self.page_access_frequency = defaultdict(int)
-        self.temporal_locality = []
-        self.spatial_locality = []
-        
-        #STRUCTS Especificas de Polcies
-        if replacement_policy == "FIFO":
-            self.fifo_queue = deque()
-        elif replacement_policy == "LRU":
-            self.lru_cache = OrderedDict()
-        elif replacement_policy == "LFU":
-            self.lfu_counter = defaultdict(int)
-            self.lfu_time = defaultdict(int)
-        elif replacement_policy == "CLOCK":
-            self.clock_hand = 0
-            self.clock_bits = {}
-        elif replacement_policy == "OPT":
-            self.opt_data = {
-                'future_refs': {},
-                'current_pos': 0
-            }
+def _process_trace_file(filepath, frame_counts, policies, cache_trace, stream, engine, miss_ratio_curves,
+                        jobs, options, analytics, reporter, page_sizes, memoized):
+    timer = options.profile or DISABLED_TIMER
+    print_section_header("INICIANDO SIMULACIÓN AVANZADA")
     
-    def preprocess_opt(self, filepath):
-        """Preprocesa el archivo para OPT"""
-        print_section_header("PREPROCESANDO PARA ALGORITMO ÓPTIMO")
-        
-        start_time = time.time()
-        total_lines = self.count_lines_fast(filepath)
-        
-        with open(filepath, 'r') as f:
-            for line_num, line in enumerate(f):
-                if line_num % 50000 == 0:
-                    print_progress_bar(line_num, total_lines, "Analizando referencias futuras")
-                
-                parts = line.strip().split()
-                if len(parts) == 2:
-                    address = int(parts[0], 16)
-                    page_num = address >> 12
-                    if page_num not in self.opt_data['future_refs']:
-                        self.opt_data['future_refs'][page_num] = []
-                    self.opt_data['future_refs'][page_num].append(line_num)
-        
-        print_progress_bar(total_lines, total_lines, "Analizando referencias futuras")
-        elapsed = time.time() - start_time
-        print(f"\n{Colors.OKGREEN}✅ Preprocesamiento completado en {elapsed:.2f} segundos{Colors.ENDC}")
+    trace = None
+    trace_policies = [policy for policy in policies if REPLACEMENT_POLICIES[policy].requires_trace]
+    if stream and trace_policies:
+        print(f"{Colors.WARNING}⚠️  {', '.join(trace_policies)} necesita la traza completa: se decodifica en memoria solo para esas políticas{Colors.ENDC}")
     
-    def count_lines_fast(self, filepath):
-        """Cuenta líneas de forma rápida"""
-        with open(filepath, 'r') as f:
-            return sum(1 for _ in f)
+    stack_policies = [policy for policy in policies if policy in STACK_POLICIES] if engine == 'stack' else []
+    if engine == 'stack' and len(stack_policies) < len(policies):
+        print(f"{Colors.WARNING}⚠️  El motor de pila solo cubre {', '.join(STACK_POLICIES)}: el resto se simula normalmente{Colors.ENDC}")
+    if stack_policies and (options.sample_rate is not None or options.translation is not None):
+        print(f"{Colors.WARNING}⚠️  El motor de pila es exacto y no modela el TLB: --sample-rate y --tlb-entries solo se aplican a las políticas simuladas{Colors.ENDC}")
+    if stack_policies and options.address_spaces is not None:
+        print(f"{Colors.WARNING}⚠️  El motor de pila usa reemplazo global sin estadísticas por proceso: --scope solo se aplica a las políticas simuladas{Colors.ENDC}")
+    if stack_policies and options.allocation is not None:
+        print(f"{Colors.WARNING}⚠️  El motor de pila usa asignación fija: --allocation solo se aplica a las políticas simuladas{Colors.ENDC}")
     
-    def access_page(self, page_num, operation, current_pos=None):
-        self.total_accesses += 1
-        self.operation_stats[operation] += 1
-        self.page_access_frequency[page_num] += 1
-        
-        if page_num in self.page_table:
-            # Hit de página
-            self.hits += 1
-            frame_num = self.page_table[page_num]
-            
-            # Actualizar estructuras de política
-            if self.replacement_policy == "LRU":
-                self.lru_cache.move_to_end(page_num)
-            elif self.replacement_policy == "LFU":
-                self.lfu_counter[page_num] += 1
-                self.lfu_time[page_num] = self.total_accesses
-            elif self.replacement_policy == "CLOCK":
-                self.clock_bits[page_num] = 1
-            
-            if operation == 'W':
-                self.frame_table[frame_num]['dirty'] = True
-                self.dirty_pages.add(page_num)
-            
-            return frame_num
-        else:
-            # Page fault
-            self.page_faults += 1
-            return self.handle_page_fault(page_num, operation, current_pos)
+    configs = [(frames, policy, page_size) for frames in frame_counts for policy in policies for page_size in page_sizes]
+    pending = [config for config in configs if config not in memoized]
     
-    def handle_page_fault(self, page_num, operation, current_pos=None):
-        if len(self.page_table) < self.frame_count:
-            # Avilable Frames
-            frame_num = len(self.page_table)
-        else:
-            # Reemplazo
-            self.replacements += 1
-            frame_num = self.select_victim_frame(current_pos)
-            victim_page = self.frame_table[frame_num]['page_num']
-            
-            if self.frame_table[frame_num]['dirty']:
-                self.disk_writes += 1
-            
-            # Clean STRUCTS
-            del self.page_table[victim_page]
-            if victim_page in self.dirty_pages:
-                self.dirty_pages.remove(victim_page)
-            if self.replacement_policy == "CLOCK" and victim_page in self.clock_bits:
-                del self.clock_bits[victim_page]
-        
-        # NEW PAGE 
-        self.page_table[page_num] = frame_num
-        self.frame_table[frame_num] = {
-            'page_num': page_num,
-            'dirty': (operation == 'W')
-        }
-        
-        if operation == 'W':
-            self.dirty_pages.add(page_num)
-        
-        # Actualizar estructuras de política
-        if self.replacement_policy == "FIFO":
-            self.fifo_queue.append(page_num)
-        elif self.replacement_policy == "LRU":
-            self.lru_cache[page_num] = frame_num
-        elif self.replacement_policy == "LFU":
-            self.lfu_counter[page_num] += 1
-            self.lfu_time[page_num] = self.total_accesses
-        elif self.replacement_policy == "CLOCK":
-            self.clock_bits[page_num] = 1
-        
-        return frame_num
+    if stream:
+        total_refs = estimate_reference_count(filepath)
+    elif pending or analytics is not None:
+        # Decodificación única compartida por todas las simulaciones
+        trace = load_trace(filepath, cache_trace, timer)
+        total_refs = trace.count
+    else:
+        # Todo viene del almacén: no hace falta decodificar la traza
+        total_refs = next(iter(memoized.values()))['total_accesses']
     
-    def select_victim_frame(self, current_pos=None):
-        if self.replacement_policy == "FIFO":
-            victim_page = self.fifo_queue.popleft()
-            return self.page_table[victim_page]
-        
-        elif self.replacement_policy == "LRU":
-            victim_page, _ = self.lru_cache.popitem(last=False)
-            return self.page_table[victim_page]
-        
-        elif self.replacement_policy == "LFU":
-            # Encontrar página con menor frecuencia, y en caso de empate, la más antigua
-            min_freq = min(self.lfu_counter[page] for page in self.page_table)
-            candidates = [page for page in self.page_table if self.lfu_counter[page] == min_freq]
-            victim_page = min(candidates, key=lambda p: self.lfu_time[p])
-            return self.page_table[victim_page]
-        
-        elif self.replacement_policy == "CLOCK":
-            while True:
-                pages = list(self.page_table.keys())
-                if not pages:
-                    return 0
-                
-                current_page = pages[self.clock_hand % len(pages)]
-                
-                if self.clock_bits.get(current_page, 0) == 0:
-                    victim_frame = self.page_table[current_page]
-                    self.clock_hand = (self.clock_hand + 1) % len(pages)
-                    return victim_frame
-                else:
-                    self.clock_bits[current_page] = 0
-                    self.clock_hand = (self.clock_hand + 1) % len(pages)
-        
-        elif self.replacement_policy == "OPT":
-            farthest = -1
-            victim_page = None
+    print(f"{Colors.BOLD}{Colors.CYAN}📁 Archivo: {Colors.WHITE}{'entrada estándar' if filepath == STDIN_TRACE else filepath}")
+    if stream and not total_refs:
+        print(f"{Colors.CYAN}📊 Referencias totales: {Colors.WHITE}desconocidas (stdin){Colors.ENDC}")
+    else:
+        print(f"{Colors.CYAN}📊 Referencias totales: {Colors.WHITE}{'~' if stream else ''}{total_refs:,}{Colors.ENDC}")
+    if filepath != STDIN_TRACE:
+        file_size = os.path.getsize(filepath) / (1024 * 1024)  # MB
+        compression = trace_compression(filepath)
+        detail = f" ({compression}, ~{estimate_trace_size(filepath) / (1024 * 1024):.2f} MB de texto)" if compression else ""
+        print(f"{Colors.CYAN}💾 Tamaño del archivo: {Colors.WHITE}{file_size:.2f} MB{detail}{Colors.ENDC}")
+    if options.address_spaces is not None and trace is not None:
+        options.address_spaces.process_count = count_address_spaces(trace)
+        print(f"{Colors.CYAN}🧩 Procesos (ASID) en la traza: {Colors.WHITE}{options.address_spaces.process_count:,}{Colors.ENDC}")
+    
+    if analytics is not None and not stream:
+        # Una pasada por lotes sobre la traza en memoria, independiente del número de configuraciones
+        with timer.phase('analytics'):
+            for pages, _, _ in iter_decoded_batches(trace, 65536):
+                analytics.process_batch(pages)
+        print_analytics(analytics.summary())
+    
+    tlb_entries = options.translation.tlb_entries if options.translation else DEFAULT_TLB_REACH_ENTRIES
+    
+    stack_results = {}
+    for policy in stack_policies:
+        for page_size in page_sizes:
+            stack_frames = [frames for frames in frame_counts if (frames, policy, page_size) not in memoized]
+            if not stack_frames:
+                continue
+            label = config_label(policy, page_size)
+            print_section_header(f"DISTANCIAS DE PILA {label} PARA {len(stack_frames)} TAMAÑOS")
+            if trace is None:
+                trace = load_trace(filepath, cache_trace, timer)
             
-            for page in self.page_table:
-                refs = self.opt_data['future_refs'].get(page, [])
-                next_use = None
-                
-                for ref_pos in refs:
-                    if ref_pos > current_pos:
-                        next_use = ref_pos
-                        break
-                
-                if next_use is None:
-                    return self.page_table[page]
-                
-                if next_use > farthest:
-                    farthest = next_use
-                    victim_page = page
+            with timer.phase('stack_engine'):
+                results, curve = run_stack_engine(
+                    coarsen_trace(trace, page_size.bit_length() - 1 - BASE_PAGE_SHIFT), policy, stack_frames,
+                    miss_ratio_curves is not None, options.timings, page_size, tlb_entries
+                )
+            for stats in results:
+                stack_results[(stats['frames'], policy, page_size)] = stats
+            if curve is not None:
+                miss_ratio_curves[label] = curve
             
-            return self.page_table.get(victim_page, 0)
-        
-        return 0
+            print(f"{Colors.OKGREEN}✅ Pasada única completada en {results[0]['execution_time']:.2f} segundos{Colors.ENDC}")
+            for stats in results:
+                print_immediate_results(stats)
     
-    def get_statistics(self):
-        """Calcula estadísticas avanzadas"""
-        if self.total_accesses == 0:
-            return {}
+    if jobs > 1:
+        if stream:
+            print(f"{Colors.WARNING}⚠️  --jobs comparte la traza decodificada entre procesos: se ignora --stream{Colors.ENDC}")
         
-        hit_rate = (self.hits / self.total_accesses) * 100
-        fault_rate = (self.page_faults / self.total_accesses) * 100
-        replacement_rate = (self.replacements / self.total_accesses) * 100
+        parallel_configs = [config for config in pending if config[1] not in stack_policies]
+        parallel_results = {}
+        if parallel_configs:
+            if trace is None:
+                trace = load_trace(filepath, cache_trace, timer)
+            print_section_header(f"SIMULANDO {len(parallel_configs)} CONFIGURACIONES CON {jobs} PROCESOS")
+            parallel_results = dict(zip(parallel_configs,
+                                        run_parallel_sweep(trace, parallel_configs, jobs, options, reporter)))
         
-        # Effective Access Time
-        eat = 100 + (fault_rate / 100 * 10000000)  # 100ns + fault_rate * 10ms
-        
-        return {
-            'total_accesses': self.total_accesses,
-            'hits': self.hits,
-            'page_faults': self.page_faults,
-            'replacements': self.replacements,
-            'disk_writes': self.disk_writes,
-            'hit_rate': hit_rate,
-            'fault_rate': fault_rate,
-            'replacement_rate': replacement_rate,
-            'eat': eat,
-            'reads': self.operation_stats['R'],
-            'writes': self.operation_stats['W'],
-            'unique_pages': len(self.page_access_frequency),
-            'avg_page_accesses': sum(self.page_access_frequency.values()) / len(self.page_access_frequency) if self.page_access_frequency else 0
-        }
-
-def process_trace_file_advanced(filepath, frame_counts, policies, show_realtime=False):
-    """Procesa el archivo de traza con estadísticas avanzadas"""
-    print_section_header("INICIANDO SIMULACIÓN AVANZADA")
-    
-    total_lines = 0
-    with open(filepath, 'r') as f:
-        total_lines = sum(1 for _ in f)
+        all_results = []
+        for config in configs:
+            if config in memoized:
+                stats = memoized[config]
+                all_results.append(stats)
+                print_immediate_results(stats)
+            elif config in stack_results:
+                all_results.append(stack_results[config])
+            else:
+                stats = parallel_results[config]
+                all_results.append(stats)
+                print_immediate_results(stats)
+        return all_results
     
-    file_size = os.path.getsize(filepath) / (1024 * 1024)  # MB
-    print(f"{Colors.BOLD}{Colors.CYAN}📁 Archivo: {Colors.WHITE}{filepath}")
-    print(f"{Colors.CYAN}📊 Referencias totales: {Colors.WHITE}{total_lines:,}")
-    print(f"{Colors.CYAN}💾 Tamaño del archivo: {Colors.WHITE}{file_size:.2f} MB{Colors.ENDC}")
+    streamed_results = {}
+    if stream:
+        # Una sola lectura por bloques alimenta a todas las configuraciones y tamaños de página
+        streamed_configs = [config for config in pending
+                            if config[1] not in stack_policies and config[1] not in trace_policies]
+        if streamed_configs:
+            print_section_header(f"SIMULANDO {len(streamed_configs)} CONFIGURACIONES EN UNA PASADA")
+            results = simulate_many(
+                filepath, streamed_configs,
+                options=options,
+                analytics=analytics,
+                reporter=reporter
+            )
+            if analytics is not None:
+                print_analytics(analytics.summary())
+            streamed_results = dict(zip(streamed_configs, results))
+        elif analytics is not None:
+            # Ninguna configuración se lee por bloques: la analítica hace su propia pasada
+            with timer.phase('analytics'):
+                for pages, _, _ in iter_trace_batches(filepath, timer=timer):
+                    analytics.process_batch(pages)
+            print_analytics(analytics.summary())
     
     all_results = []
     
-    for frames in frame_counts:
-        for policy in policies:
-            print_section_header(f"SIMULANDO {policy} CON {frames} FRAMES")
-            
-            start_time = time.time()
-            manager = AdvancedPagedMemoryManager(frames, policy)
-            
-            if policy == "OPT":
-                manager.preprocess_opt(filepath)
-            
-            # Simulación línea por línea
-            with open(filepath, 'r') as f:
-                for line_num, line in enumerate(f):
-                    if line_num % 10000 == 0:
-                        print_progress_bar(line_num, total_lines, f"Procesando {policy}")
-                    
-                    parts = line.strip().split()
-                    if len(parts) == 2:
-                        address = int(parts[0], 16)
-                        operation = parts[1]
-                        page_num = address >> 12
-                        manager.access_page(page_num, operation, line_num)
-            
-            print_progress_bar(total_lines, total_lines, f"Procesando {policy}")
-            elapsed = time.time() - start_time
-            
-            stats = manager.get_statistics()
-            stats.update({
-                'frames': frames,
-                'policy': policy,
-                'execution_time': elapsed
-            })
-            
+    for config in configs:
+        frames, policy, page_size = config
+        if config in memoized:
+            stats = memoized[config]
+            all_results.append(stats)
+            print_immediate_results(stats)
+            continue
+        if config in stack_results:
+            all_results.append(stack_results[config])
+            continue
+        if config in streamed_results:
+            stats = streamed_results[config]
             all_results.append(stats)
-            
-            print(f"\n{Colors.OKGREEN}✅ Simulación completada en {elapsed:.2f} segundos{Colors.ENDC}")
             print_immediate_results(stats)
+            continue
+        
+        label = config_label(policy, page_size)
+        print_section_header(f"SIMULANDO {label} CON {frames} FRAMES")
+        
+        start_time = time.time()
+        manager = create_manager(frames, policy, options, page_size)
+        
+        if trace is None:
+            trace = load_trace(filepath, cache_trace, timer)
+        
+        probe = ManagerProbe(manager, frames, label, trace.count)
+        reporter.begin(f"Procesando {label}", [probe])
+        run_configuration(
+            manager, trace, frames, policy, options.checkpoint,
+            functools.partial(setattr, probe, 'position')
+        )
+        reporter.end()
+        elapsed = time.time() - start_time
+        
+        stats = manager.get_statistics()
+        stats.update({
+            'frames': frames,
+            'policy': policy,
+            'execution_time': elapsed
+        })
+        
+        all_results.append(stats)
+        
+        print(f"{Colors.OKGREEN}✅ Simulación completada en {elapsed:.2f} segundos{Colors.ENDC}")
+        print_immediate_results(stats)
     
     return all_results
 
@@ -402,13 +3976,63 @@ def print_immediate_results(stats):
         ["Hit Rate", f"{stats['hit_rate']:.2f}%", "Porcentaje de aciertos"],
         ["Fault Rate", f"{stats['fault_rate']:.2f}%", "Porcentaje de fallos"],
         ["Replacements", f"{stats['replacements']:,}", "Reemplazos realizados"],
-        ["Disk Writes", f"{stats['disk_writes']:,}", "Escrituras a disco"],
+        ["Disk Writes", f"{stats['disk_writes']:,}" if stats['disk_writes'] is not None else "N/D", "Escrituras a disco"],
         ["EAT", f"{stats['eat']:.2f} ns", "Tiempo acceso efectivo"],
         ["Reads/Writes", f"{stats['reads']:,}/{stats['writes']:,}", "Operaciones de lectura/escritura"],
         ["Unique Pages", f"{stats['unique_pages']:,}", "Páginas únicas accedidas"]
     ]
+    if 'tlb_hit_rate' in stats:
+        rows.append(["TLB Hit Rate", f"{stats['tlb_hit_rate']:.2f}%", f"Aciertos de TLB ({stats['tlb_hits']:,})"])
+        rows.append(["Page Walks", f"{stats['page_walks']:,}", f"{stats['walk_memory_accesses']:,} accesos a memoria por nivel {stats['walk_accesses_per_level']}"])
+        rows.append(["PWC Hit Rate", f"{stats['pwc_hit_rate']:.2f}%", "Aciertos de la caché de recorrido"])
+        rows.append(["Translation", f"{stats['translation_ns']:.2f} ns", "Coste medio de traducción incluido en el EAT"])
+    if 'sample_rate' in stats:
+        rows[1][1] += f" ±{stats['hit_rate_error']:.2f}"
+        rows[2][1] += f" ±{stats['fault_rate_error']:.2f}"
+        rows[5][1] = f"{stats['eat']:.2f} ±{stats['eat_error']:.2f} ns"
+        rows.append(["Sampling", f"{stats['sample_rate']:.4f}", f"Estimación SHARDS: {stats['sampled_accesses']:,} refs, {stats['sampled_frames']:,} frames"])
+    if 'allocation' in stats:
+        parameter = f"τ = {stats['allocation_parameter']:,}" if stats['allocation'] == 'ws' else f"T = {stats['allocation_parameter']:,}"
+        rows.append(["Allocation", stats['allocation'].upper(), f"Asignación variable ({parameter}, máx. {stats['frames']:,} frames)"])
+        rows.append(["Resident Set", f"{stats['mean_resident_frames']:.1f}", f"Frames residentes de media (pico {stats['peak_resident_frames']:,})"])
+        rows.append(["Releases", f"{stats['allocation_releases']:,}", "Páginas liberadas por el asignador"])
+    if 'stall_ns' in stats:
+        amplification = stats['write_amplification']
+        rows.append(["Write Stall", f"{stats['stall_ns'] / 1e6:,.2f} ms", f"Espera de {stats['stalled_faults']:,} fallos por escrituras (máx. {stats['max_stall_ns'] / 1e3:,.1f} µs)"])
+        rows.append(["Stall/Fault", f"{stats['stall_per_fault_ns']:,.0f} ns", "Espera media por fallo de página"])
+        rows.append(["Writes", f"{stats['eviction_writes']:,}/{stats['cleaner_writes']:,}/{stats['policy_writes']:,}", "Escrituras al expulsar / del limpiador / de la política"])
+        rows.append(["Write Amp.", f"{amplification:.2f}x" if amplification is not None else "N/D", f"Escrituras por página modificada (cola de {stats['write_queue_depth']}, {stats['queue_full_waits']:,} llenas)"])
     
-    print_table(headers, rows, f"Resultados {stats['policy']} - {stats['frames']} frames", colors)
+    title = f"Resultados {stats['policy']} - {stats['frames']} frames"
+    if stats['page_size'] != BASE_PAGE_SIZE:
+        title += f" de {format_page_size(stats['page_size'])}"
+    if stats.get('from_store'):
+        title += " (almacén)"
+    print_table(headers, rows, title, colors)
+    if 'processes' in stats:
+        print_process_statistics(stats)
+
+def print_process_statistics(stats, limit=15):
+    """Fallos y working set de los procesos con más fallos"""
+    processes = sorted(stats['processes'].items(), key=lambda item: item[1]['page_faults'], reverse=True)
+    rows = []
+    for asid, process in processes[:limit]:
+        rows.append([
+            asid,
+            f"{process['accesses']:,}",
+            f"{process['page_faults']:,}",
+            f"{process['fault_rate']:.2f}%",
+            f"{process['resident_frames']:,}",
+            f"{process['peak_frames']:,}",
+            f"{process['working_set_mean']:.1f}",
+            f"{process['working_set_max']:,}"
+        ])
+    scope = stats['replacement_scope']
+    if stats['process_quota'] is not None:
+        scope += f", cuota {stats['process_quota']:,} frames"
+    title = f"PROCESOS ({scope}; {limit} de {len(processes)} con más fallos)" if len(processes) > limit else f"PROCESOS ({scope})"
+    print_table(["ASID", "Accesos", "Fallos", "Tasa", "Frames", "Pico", "WS medio", "WS máx."], rows, title,
+                [Colors.CYAN, Colors.WHITE, Colors.RED, Colors.RED, Colors.YELLOW, Colors.YELLOW, Colors.GREEN, Colors.GREEN])
 
 def print_final_comparison(results):
     """Imprime una comparación final épica"""
@@ -417,32 +4041,126 @@ def print_final_comparison(results):
     # Tabla principal de comparación
     headers = ["Frames", "Política", "Page Faults", "Hit Rate", "EAT (ns)", "Tiempo (s)"]
     colors = [Colors.CYAN, Colors.YELLOW, Colors.RED, Colors.GREEN, Colors.PURPLE, Colors.BLUE]
+    variable = any('allocation' in result for result in results)
+    if variable:
+        # Con asignación variable, Frames es el máximo y Residentes la media ocupada
+        headers.insert(1, "Residentes")
+        colors.insert(1, Colors.CYAN)
+    writeback = any('stall_ns' in result for result in results)
+    if writeback:
+        headers[-1:-1] = ["Espera (ms)", "Amplif."]
+        colors[-1:-1] = [Colors.RED, Colors.YELLOW]
     
+    labels = result_labels(results)
     rows = []
-    for result in results:
-        rows.append([
+    for result, label in zip(results, labels):
+        row = [
             result['frames'],
-            result['policy'],
+            label,
             f"{result['page_faults']:,}",
             f"{result['hit_rate']:.2f}%",
             f"{result['eat']:.2f}",
             f"{result['execution_time']:.2f}"
-        ])
+        ]
+        if variable:
+            row.insert(1, f"{result['mean_resident_frames']:.1f}" if 'allocation' in result else f"{result['frames']:,}")
+        if writeback:
+            amplification = result.get('write_amplification')
+            row[-1:-1] = [f"{result['stall_ns'] / 1e6:,.2f}" if 'stall_ns' in result else "-",
+                          f"{amplification:.2f}x" if amplification is not None else "-"]
+        rows.append(row)
     
     print_table(headers, rows, "RESUMEN COMPLETO DE SIMULACIONES", colors)
     
     # Encontrar mejores rendimientos
     print_section_header("🏆 MEJORES RENDIMIENTOS", Colors.OKGREEN)
     
-    best_hit_rate = max(results, key=lambda x: x['hit_rate'])
-    best_eat = min(results, key=lambda x: x['eat'])
-    best_time = min(results, key=lambda x: x['execution_time'])
+    ranked = list(zip(results, labels))
+    best_hit_rate, best_hit_label = max(ranked, key=lambda x: x[0]['hit_rate'])
+    best_eat, best_eat_label = min(ranked, key=lambda x: x[0]['eat'])
+    best_time, best_time_label = min(ranked, key=lambda x: x[0]['execution_time'])
+    
+    print(f"{Colors.BOLD}{Colors.GOLD}🥇 Mejor Hit Rate: {Colors.WHITE}{best_hit_label} con {best_hit_rate['frames']} frames - {best_hit_rate['hit_rate']:.2f}%{Colors.ENDC}")
+    print(f"{Colors.BOLD}{Colors.GOLD}🥇 Mejor EAT: {Colors.WHITE}{best_eat_label} con {best_eat['frames']} frames - {best_eat['eat']:.2f} ns{Colors.ENDC}")
+    print(f"{Colors.BOLD}{Colors.GOLD}🥇 Más Rápido: {Colors.WHITE}{best_time_label} con {best_time['frames']} frames - {best_time['execution_time']:.2f}s{Colors.ENDC}")
+    
+    if len({result['page_size'] for result in results}) > 1:
+        print_page_size_comparison(results)
+
+def result_labels(results):
+    """Política de cada resultado, con la asignación variable y el tamaño de página si se compararon varios"""
+    labels = [result['policy'] + (f"+{result['allocation'].upper()}" if 'allocation' in result else '')
+              for result in results]
+    if len({result['page_size'] for result in results}) == 1:
+        return labels
+    return [f"{label}@{format_page_size(result['page_size'])}" for label, result in zip(labels, results)]
+
+def format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if size < 1024 or unit == 'TiB':
+            return f"{size:,.0f} {unit}" if unit == 'B' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+def print_page_size_comparison(results):
+    """Fallos, memoria, footprint y alcance del TLB de cada tamaño de página"""
+    # El footprint con la página más pequeña es la referencia para la fragmentación interna
+    smallest = min(results, key=lambda x: x['page_size'])['footprint_bytes']
+    rows = []
+    for result in sorted(results, key=lambda x: (x['policy'], x['frames'], x['page_size'])):
+        bloat = result['footprint_bytes'] / smallest if smallest else 1.0
+        rows.append([
+            result['policy'],
+            result['frames'],
+            format_page_size(result['page_size']),
+            f"{result['page_faults']:,}",
+            f"{result['fault_rate']:.2f}%",
+            format_bytes(result['memory_bytes']),
+            format_bytes(result['footprint_bytes']),
+            f"{bloat:.2f}x",
+            format_bytes(result['tlb_reach_bytes']),
+            f"{result['tlb_reach_coverage'] * 100:.1f}%"
+        ])
+    print_table(["Política", "Frames", "Página", "Fallos", "Tasa", "Memoria", "Footprint", "vs. mínima",
+                 "Alcance TLB", "Cobertura"], rows, "COMPARACIÓN POR TAMAÑO DE PÁGINA",
+                [Colors.YELLOW, Colors.CYAN, Colors.CYAN, Colors.RED, Colors.RED, Colors.WHITE, Colors.WHITE,
+                 Colors.PURPLE, Colors.GREEN, Colors.GREEN])
+
+def print_profile(results, timer):
+    """Muestra el tiempo por fase del proceso y el perfil de cada simulación"""
+    print_section_header("PERFIL DE EJECUCIÓN", Colors.PURPLE)
+    
+    rows = [[name, f"{wall:.3f}", f"{cpu:.3f}", f"{calls:,}"] for name, (wall, cpu, calls) in timer.phases.items()]
+    if rows:
+        print_table(["Fase", "Pared (s)", "CPU (s)", "Llamadas"], rows, "FASES DEL PROCESO",
+                    [Colors.CYAN, Colors.YELLOW, Colors.YELLOW, Colors.WHITE])
     
-    print(f"{Colors.BOLD}{Colors.GOLD}🥇 Mejor Hit Rate: {Colors.WHITE}{best_hit_rate['policy']} con {best_hit_rate['frames']} frames - {best_hit_rate['hit_rate']:.2f}%{Colors.ENDC}")
-    print(f"{Colors.BOLD}{Colors.GOLD}🥇 Mejor EAT: {Colors.WHITE}{best_eat['policy']} con {best_eat['frames']} frames - {best_eat['eat']:.2f} ns{Colors.ENDC}")
-    print(f"{Colors.BOLD}{Colors.GOLD}🥇 Más Rápido: {Colors.WHITE}{best_time['policy']} con {best_time['frames']} frames - {best_time['execution_time']:.2f}s{Colors.ENDC}")
+    rows = []
+    for result, label in zip(results, result_labels(results)):
+        profile = result.get('profile')
+        if profile is None:
+            continue
+        phases = profile['phases']
+        preprocess = phases.get('preprocess', {}).get('wall_time', 0.0)
+        simulate = phases.get('simulate', {})
+        rows.append([
+            result['frames'],
+            label,
+            f"{preprocess:.3f}",
+            f"{simulate.get('wall_time', 0.0):.3f}",
+            f"{simulate.get('cpu_time', 0.0):.3f}",
+            f"{profile['victim_selections']:,}",
+            f"{profile['victim_avg_ns']:,.0f}",
+            f"{profile['fault_latency_p50_ns']:,}",
+            f"{profile['fault_latency_p99_ns']:,}"
+        ])
+    if rows:
+        print_table(["Frames", "Política", "Preproc. (s)", "Simulación (s)", "CPU (s)", "Víctimas",
+                     "ns/víctima", "Fallo p50 (ns)", "Fallo p99 (ns)"], rows, "PERFIL POR SIMULACIÓN",
+                    [Colors.CYAN, Colors.YELLOW, Colors.WHITE, Colors.WHITE, Colors.WHITE, Colors.RED,
+                     Colors.PURPLE, Colors.GREEN, Colors.GREEN])
+        print(f"{Colors.PURPLE}ℹ️  Las latencias de fallo usan buckets log2: se muestra la cota superior del bucket{Colors.ENDC}")
 
-def save_results_json(results, filename):
+def save_results_json(results, filename, extra=None):
     """Guarda los resultados en formato JSON"""
     output_data = {
         'timestamp': datetime.now().isoformat(),
@@ -453,12 +4171,562 @@ def save_results_json(results, filename):
             'frame_counts_tested': list(set(r['frames'] for r in results))
         }
     }
+    if extra:
+        output_data.update(extra)
     
     with open(filename, 'w') as f:
         json.dump(output_data, f, indent=2)
     
     print(f"{Colors.OKGREEN}💾 Resultados guardados en: {filename}{Colors.ENDC}")
 
+# ═══════════════════════ Almacén de resultados ═══════════════════════
+
+DEFAULT_STORE_PATH = 'vmsim_results.db'
+TRACE_HASH_CHUNK = 8 * 1024 * 1024
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trace_hashes (
+    path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    trace_hash TEXT NOT NULL, policy TEXT NOT NULL, frames INTEGER NOT NULL, page_size INTEGER NOT NULL,
+    version TEXT NOT NULL, options TEXT NOT NULL, created TEXT NOT NULL, stats TEXT NOT NULL,
+    PRIMARY KEY (trace_hash, policy, frames, page_size, version, options)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, created TEXT NOT NULL, trace_path TEXT NOT NULL,
+    trace_hash TEXT NOT NULL, version TEXT NOT NULL, options TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id), policy TEXT NOT NULL, frames INTEGER NOT NULL,
+    page_size INTEGER NOT NULL, from_store INTEGER NOT NULL, stats TEXT NOT NULL
+);
+"""
+
+def options_fingerprint(options, stack=False):
+    """Opciones que cambian los resultados de una configuración, como JSON canónico
+
+    No incluye checkpoints ni perfilado; el motor de pila solo depende de las latencias
+    y de las entradas del TLB usadas para su alcance.
+    """
+    timings = options.timings
+    translation = options.translation
+    fields = {'timings': [timings.memory_ns, timings.page_fault_ns, timings.writeback_ns, timings.tlb_ns,
+                          timings.pwc_ns]}
+    if stack:
+        fields['engine'] = 'stack'
+        fields['tlb_entries'] = translation.tlb_entries if translation else None
+        return json.dumps(fields, sort_keys=True)
+    
+    spaces = options.address_spaces
+    allocation = options.allocation
+    writeback = options.writeback
+    fields.update({
+        'sample_rate': options.sample_rate,
+        'translation': None if translation is None else [
+            translation.tlb_entries, translation.tlb_ways, translation.tlb_policy, translation.levels,
+            translation.bits, translation.pwc_entries],
+        'address_spaces': None if spaces is None else [spaces.scope, spaces.quota, spaces.ws_window],
+        'allocation': None if allocation is None else [allocation.mode, allocation.window, allocation.threshold],
+        'writeback': None if writeback is None else [writeback.queue_depth, writeback.latency_ns, writeback.bandwidth,
+                                                     writeback.cleaner_rate, writeback.cleaner_interval]
+    })
+    return json.dumps(fields, sort_keys=True)
+
+class ResultsStore:
+    """Resultados por configuración en SQLite, indexados por el contenido de la traza
+
+    La clave es (hash SHA-256 del archivo de traza, política, frames, tamaño de página,
+    SIMULATOR_VERSION, options_fingerprint). Cada ejecución queda además registrada en
+    runs/run_results para poder compararlas con el comando compare.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, refresh=False):
+        self.path = path
+        self.refresh = refresh  # recalcular todo y sobrescribir lo guardado
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(STORE_SCHEMA)
+    
+    def close(self):
+        self.connection.close()
+    
+    def trace_hash(self, filepath):
+        """SHA-256 del archivo; se recalcula solo si cambian su tamaño o su mtime"""
+        path = os.path.abspath(filepath)
+        source = os.stat(path)
+        row = self.connection.execute('SELECT size, mtime_ns, hash FROM trace_hashes WHERE path = ?',
+                                      (path,)).fetchone()
+        if row is not None and row[0] == source.st_size and row[1] == source.st_mtime_ns:
+            return row[2]
+        
+        digest = hashlib.sha256()
+        done = 0
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(TRACE_HASH_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                done += len(chunk)
+                print_progress_bar(done, source.st_size, "Calculando hash de la traza")
+        if source.st_size:
+            print()
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO trace_hashes VALUES (?, ?, ?, ?)',
+                                    (path, source.st_size, source.st_mtime_ns, digest.hexdigest()))
+        return digest.hexdigest()
+    
+    def lookup(self, trace_hash, configs, options, stacked=()):
+        """{(frames, política, tamaño de página): estadísticas} de las configuraciones ya guardadas
+
+        stacked son las políticas que calcula el motor de pila (su huella de opciones es otra).
+        """
+        if self.refresh:
+            return {}
+        fingerprints = {True: options_fingerprint(options, True), False: options_fingerprint(options, False)}
+        found = {}
+        for frames, policy, page_size in configs:
+            row = self.connection.execute(
+                'SELECT stats FROM results WHERE trace_hash = ? AND policy = ? AND frames = ? AND page_size = ? '
+                'AND version = ? AND options = ?',
+                (trace_hash, policy, frames, page_size, SIMULATOR_VERSION, fingerprints[policy in stacked])
+            ).fetchone()
+            if row is not None:
+                stats = json.loads(row[0])
+                stats['from_store'] = True
+                found[(frames, policy, page_size)] = stats
+        if found:
+            print(f"{Colors.OKGREEN}🗄️  {len(found)} de {len(configs)} configuraciones servidas desde {self.path}{Colors.ENDC}")
+        return found
+    
+    def record_run(self, filepath, trace_hash, options, results):
+        """Guarda los resultados nuevos y registra la ejecución; devuelve su id"""
+        created = datetime.now().isoformat()
+        fresh = 0
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO runs (created, trace_path, trace_hash, version, options) VALUES (?, ?, ?, ?, ?)',
+                (created, os.path.abspath(filepath), trace_hash, SIMULATOR_VERSION, options_fingerprint(options))
+            )
+            run_id = cursor.lastrowid
+            for stats in results:
+                cached = bool(stats.get('from_store'))
+                payload = json.dumps({key: value for key, value in stats.items()
+                                      if key not in ('from_store', 'profile')})
+                if not cached:
+                    fresh += 1
+                    self.connection.execute(
+                        'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (trace_hash, stats['policy'], stats['frames'], stats['page_size'], SIMULATOR_VERSION,
+                         options_fingerprint(options, stats.get('engine') == 'stack'), created, payload)
+                    )
+                self.connection.execute('INSERT INTO run_results VALUES (?, ?, ?, ?, ?, ?)',
+                                        (run_id, stats['policy'], stats['frames'], stats['page_size'],
+                                         int(cached), payload))
+        print(f"{Colors.OKGREEN}🗄️  Ejecución #{run_id} guardada en {self.path} "
+              f"({fresh} nuevas, {len(results) - fresh} reutilizadas){Colors.ENDC}")
+        return run_id
+    
+    def runs(self, limit=None):
+        query = 'SELECT id, created, trace_path, trace_hash, version FROM runs ORDER BY id DESC'
+        if limit is not None:
+            query += f' LIMIT {int(limit)}'
+        return self.connection.execute(query).fetchall()
+    
+    def run(self, run_id):
+        return self.connection.execute('SELECT id, created, trace_path, trace_hash, version FROM runs WHERE id = ?',
+                                       (run_id,)).fetchone()
+    
+    def run_results(self, run_id):
+        """{(frames, política, tamaño de página): estadísticas} de una ejecución"""
+        rows = self.connection.execute('SELECT frames, policy, page_size, stats FROM run_results WHERE run_id = ?',
+                                       (run_id,))
+        return {(frames, policy, page_size): json.loads(stats) for frames, policy, page_size, stats in rows}
+    
+    def resolve(self, selector):
+        """Id de ejecución a partir de un número o de un archivo de traza (su última ejecución)"""
+        if selector.lstrip('-').isdigit():
+            number = int(selector)
+            if number < 0:
+                # -1 es la última ejecución, -2 la anterior...
+                runs = self.runs(-number)
+                return runs[-1][0] if len(runs) == -number else None
+            return number if self.run(number) is not None else None
+        if not os.path.exists(selector):
+            return None
+        row = self.connection.execute('SELECT MAX(id) FROM runs WHERE trace_hash = ?',
+                                      (self.trace_hash(selector),)).fetchone()
+        return row[0]
+
+def print_runs(store, limit=20):
+    rows = [[run_id, created[:19].replace('T', ' '), os.path.basename(path), trace_hash[:12], version,
+             f"{store.connection.execute('SELECT COUNT(*) FROM run_results WHERE run_id = ?', (run_id,)).fetchone()[0]:,}"]
+            for run_id, created, path, trace_hash, version in store.runs(limit)]
+    print_table(["Id", "Fecha", "Traza", "Hash", "Versión", "Configuraciones"], rows,
+                f"EJECUCIONES EN {store.path}",
+                [Colors.CYAN, Colors.WHITE, Colors.YELLOW, Colors.PURPLE, Colors.WHITE, Colors.GREEN])
+
+def compare_runs(store, run_a, run_b):
+    """Diferencias de fallos, hit rate y EAT por configuración entre dos ejecuciones"""
+    results_a = store.run_results(run_a)
+    results_b = store.run_results(run_b)
+    for run_id in (run_a, run_b):
+        _, created, path, trace_hash, version = store.run(run_id)
+        print(f"{Colors.BOLD}{Colors.CYAN}#{run_id}: {Colors.WHITE}{path} ({trace_hash[:12]}, v{version}, "
+              f"{created[:19].replace('T', ' ')}){Colors.ENDC}")
+    
+    common = sorted(set(results_a) & set(results_b), key=lambda config: (config[1], config[2], config[0]))
+    rows = []
+    better = worse = 0
+    for config in common:
+        a = results_a[config]
+        b = results_b[config]
+        delta = b['page_faults'] - a['page_faults']
+        better += delta < 0
+        worse += delta > 0
+        rows.append([
+            config_label(config[1], config[2]),
+            config[0],
+            f"{a['page_faults']:,}",
+            f"{b['page_faults']:,}",
+            f"{delta:+,}",
+            f"{delta / a['page_faults'] * 100:+.2f}%" if a['page_faults'] else "-",
+            f"{a['hit_rate']:.2f}% → {b['hit_rate']:.2f}%",
+            f"{(b['eat'] - a['eat']) / a['eat'] * 100:+.2f}%" if a['eat'] else "-"
+        ])
+    if rows:
+        print_table(["Política", "Frames", f"Fallos #{run_a}", f"Fallos #{run_b}", "Δ fallos", "Δ %", "Hit rate",
+                     "Δ EAT"], rows, f"COMPARACIÓN #{run_a} → #{run_b}",
+                    [Colors.YELLOW, Colors.CYAN, Colors.WHITE, Colors.WHITE, Colors.RED, Colors.RED, Colors.GREEN,
+                     Colors.PURPLE])
+        print(f"{Colors.BOLD}{Colors.OKGREEN}📉 Menos fallos: {better}   {Colors.FAIL}📈 Más fallos: {worse}   "
+              f"{Colors.WHITE}= Iguales: {len(common) - better - worse}{Colors.ENDC}")
+    else:
+        print(f"{Colors.WARNING}⚠️  Las ejecuciones no tienen configuraciones en común{Colors.ENDC}")
+    
+    for run_id, only in ((run_a, set(results_a) - set(results_b)), (run_b, set(results_b) - set(results_a))):
+        if only:
+            names = ', '.join(f"{config_label(policy, page_size)}/{frames}"
+                              for frames, policy, page_size in sorted(only, key=lambda c: (c[1], c[2], c[0])))
+            print(f"{Colors.CYAN}ℹ️  Solo en #{run_id}: {Colors.WHITE}{names}{Colors.ENDC}")
+
+def create_compare_parser():
+    parser = argparse.ArgumentParser(
+        prog='Virtual_Memory_Simulator.py compare',
+        description="🗄️ Compara dos ejecuciones guardadas en el almacén de resultados",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Cada ejecución se indica por su id, por un índice negativo (-1 = la última) o por un
+archivo de traza (su última ejecución, según el hash del contenido).
+
+Ejemplos de uso:
+  python epic_memory_sim.py compare                 (las dos últimas ejecuciones)
+  python epic_memory_sim.py compare 12 15
+  python epic_memory_sim.py compare trace_v1.txt trace_v2.txt
+  python epic_memory_sim.py compare --list
+        """
+    )
+    parser.add_argument('runs', nargs='*', default=['-2', '-1'], metavar='EJECUCIÓN',
+                        help='Dos ejecuciones a comparar (default: -2 -1)')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help=f'Base de datos del almacén (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--list', action='store_true',
+                        help='Listar las últimas ejecuciones guardadas')
+    return parser
+
+def compare_main(argv):
+    parser = create_compare_parser()
+    args = parser.parse_args(argv)
+    if not args.list and len(args.runs) != 2:
+        parser.error('indica exactamente dos ejecuciones')
+    if not os.path.exists(args.store):
+        parser.error(f"no existe el almacén {args.store}")
+    
+    store = ResultsStore(args.store)
+    try:
+        print_section_header("ALMACÉN DE RESULTADOS")
+        if args.list:
+            print_runs(store)
+            return 0
+        run_ids = [store.resolve(selector) for selector in args.runs]
+        for selector, run_id in zip(args.runs, run_ids):
+            if run_id is None:
+                parser.error(f"no hay ninguna ejecución para {selector}")
+        compare_runs(store, *run_ids)
+        return 0
+    finally:
+        store.close()
+
+# ═══════════════════════ Benchmark ═══════════════════════
+
+SYNTHETIC_PATTERNS = ('sequential', 'zipf', 'loop', 'phase')
+SYNTHETIC_PHASES = 4
+BENCHMARK_FORMAT = 2
+
+def generate_synthetic_pages(pattern, size, pages, rng, zipf_exponent=1.0):
+    """Secuencia determinista de páginas para un patrón de acceso
+
+    sequential: barrido sin reuso (cada referencia es un fallo frío).
+    zipf: popularidad Zipf sobre `pages` páginas, con el orden de popularidad barajado.
+    loop: recorrido cíclico de un working set de `pages` páginas.
+    phase: SYNTHETIC_PHASES fases con working sets disjuntos de pages // SYNTHETIC_PHASES páginas.
+    """
+    if pattern == 'sequential':
+        return list(range(size))
+    if pattern == 'zipf':
+        ranked = list(range(pages))
+        rng.shuffle(ranked)
+        weights = list(accumulate(1 / rank ** zipf_exponent for rank in range(1, pages + 1)))
+        return rng.choices(ranked, cum_weights=weights, k=size)
+    if pattern == 'loop':
+        return [index % pages for index in range(size)]
+    if pattern == 'phase':
+        phase_pages = max(1, pages // SYNTHETIC_PHASES)
+        phase_length = -(-size // SYNTHETIC_PHASES)
+        return [(index // phase_length) * phase_pages + rng.randrange(phase_pages) for index in range(size)]
+    raise ValueError(f"Patrón sintético desconocido: {pattern}")
+
+def write_synthetic_trace(filepath, pattern, size, pages=4096, write_ratio=0.3, seed=42):
+    """Escribe una traza sintética "<dirección> <R|W>" reproducible a partir de seed"""
+    rng = random.Random(f"{seed}:{pattern}")
+    page_list = generate_synthetic_pages(pattern, size, pages, rng)
+    getrandbits = rng.getrandbits
+    uniform = rng.random
+    with open(filepath, 'w') as f:
+        f.writelines(
+            f"0x{(page_num << 12) | getrandbits(12):08X} {'W' if uniform() < write_ratio else 'R'}\n"
+            for page_num in page_list
+        )
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB (None si la plataforma no lo expone)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KB en Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def benchmark_configuration(trace, frames, policy, repeat):
+    """Tiempos de preprocesamiento y simulación de una configuración
+
+    La primera corrida calienta cachés y el asignador y se descarta; de las `repeat`
+    siguientes se reporta la más rápida, la mediana y el ruido (mediana / mejor - 1).
+    """
+    preprocess_times = []
+    simulate_times = []
+    for run in range(repeat + 1):
+        manager = create_manager(frames, policy)
+        start_time = time.perf_counter()
+        if manager.policy.requires_trace:
+            manager.prepare_policy(trace, verbose=False)
+        preprocess_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        simulate_decoded_trace(manager, trace)
+        simulate_time = time.perf_counter() - start_time
+        
+        if run:
+            preprocess_times.append(preprocess_time)
+            simulate_times.append(simulate_time)
+    
+    best_simulate = min(simulate_times)
+    median_simulate = sorted(simulate_times)[len(simulate_times) // 2]
+    return {
+        'policy': policy,
+        'frames': frames,
+        'references': trace.count,
+        'page_faults': manager.page_faults,
+        'preprocess_time': min(preprocess_times),
+        'simulate_time': best_simulate,
+        'simulate_median': median_simulate,
+        # Distancia de la mediana a la mejor: no la infla una sola corrida lenta
+        'noise': (median_simulate - best_simulate) / best_simulate if best_simulate > 0 else 0.0,
+        'refs_per_sec': trace.count / best_simulate if best_simulate > 0 else 0.0
+    }
+
+def benchmark_pattern(pattern, policies, frame_counts, size, pages, write_ratio, seed, repeat):
+    """Genera y decodifica la traza de un patrón y mide todas sus configuraciones
+
+    Devuelve (resultados, referencias, pico de RSS en MB); se ejecuta en un proceso nuevo
+    para que el pico de RSS sea solo del patrón.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix='vmsim-bench-') as workdir:
+        filepath = os.path.join(workdir, f"{pattern}.txt")
+        write_synthetic_trace(filepath, pattern, size, pages, write_ratio, seed)
+        
+        start_time = time.perf_counter()
+        trace = decode_trace_file(filepath, show_progress=False)
+        parse_time = time.perf_counter() - start_time
+    
+    for policy in policies:
+        for frames in frame_counts:
+            entry = benchmark_configuration(trace, frames, policy, repeat)
+            entry.update({'pattern': pattern, 'parse_time': parse_time})
+            results.append(entry)
+    return results, trace.count, peak_rss_mb()
+
+def run_benchmark(patterns, policies, frame_counts, size, pages, write_ratio, seed, repeat=5):
+    """Mide cada patrón en su propio proceso (spawn) y muestra sus resultados"""
+    results = []
+    peak_rss = {}
+    context = get_context('spawn')
+    for pattern in patterns:
+        print_section_header(f"BENCHMARK {pattern.upper()}")
+        # ru_maxrss es el máximo de todo el proceso: un proceso nuevo por patrón lo aísla
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            entries, references, peak_rss[pattern] = executor.submit(
+                benchmark_pattern, pattern, policies, frame_counts, size, pages, write_ratio, seed, repeat
+            ).result()
+        results.extend(entries)
+        
+        rows = [[entry['policy'], entry['frames'], f"{entry['refs_per_sec']:,.0f}", f"{entry['parse_time']:.3f}",
+                 f"{entry['preprocess_time']:.3f}", f"{entry['simulate_time']:.3f}", f"{entry['simulate_median']:.3f}",
+                 f"{entry['noise'] * 100:.1f}%", f"{entry['page_faults']:,}"]
+                for entry in entries]
+        print_table(["Política", "Frames", "Refs/s", "Parseo (s)", "Preproc. (s)", "Simulación (s)", "Mediana (s)",
+                     "Ruido", "Fallos"],
+                    rows, f"{pattern.upper()}: {references:,} REFERENCIAS",
+                    [Colors.CYAN, Colors.WHITE, Colors.OKGREEN, Colors.YELLOW, Colors.YELLOW, Colors.YELLOW,
+                     Colors.YELLOW, Colors.PURPLE, Colors.RED])
+        if peak_rss[pattern] is not None:
+            print(f"{Colors.PURPLE}🧠 Pico de RSS del patrón: {Colors.WHITE}{peak_rss[pattern]:.1f} MB{Colors.ENDC}")
+    return results, peak_rss
+
+def compare_benchmark(results, baseline, threshold):
+    """Compara refs/s contra la línea base; devuelve el número de regresiones
+
+    Solo es regresión una caída mayor que el umbral y que el ruido medido en
+    cualquiera de las dos corridas.
+    """
+    baseline_entries = {(entry['pattern'], entry['policy'], entry['frames']): entry
+                        for entry in baseline['results']}
+    if baseline.get('machine') != platform.platform() or baseline.get('python') != platform.python_version():
+        print(f"{Colors.WARNING}⚠️  La línea base se midió en otra máquina o versión de Python "
+              f"({baseline.get('machine')}, Python {baseline.get('python')}){Colors.ENDC}")
+    
+    rows = []
+    regressions = 0
+    for entry in results:
+        previous = baseline_entries.get((entry['pattern'], entry['policy'], entry['frames']))
+        if previous is None:
+            continue
+        change = entry['refs_per_sec'] / previous['refs_per_sec'] - 1 if previous['refs_per_sec'] else 0.0
+        tolerance = max(threshold, entry['noise'], previous['noise'])
+        if entry['page_faults'] != previous['page_faults']:
+            status = "❌ Fallos distintos"
+            regressions += 1
+        elif change < -tolerance:
+            status = "❌ Regresión"
+            regressions += 1
+        else:
+            status = "✅"
+        rows.append([entry['pattern'], entry['policy'], entry['frames'], f"{previous['refs_per_sec']:,.0f}",
+                     f"{entry['refs_per_sec']:,.0f}", f"{change * 100:+.1f}%", f"-{tolerance * 100:.1f}%", status])
+    
+    print_table(["Patrón", "Política", "Frames", "Base (refs/s)", "Actual (refs/s)", "Cambio", "Tolerancia", "Estado"],
+                rows, f"COMPARACIÓN CON LA LÍNEA BASE (UMBRAL {threshold * 100:.0f}%)",
+                [Colors.CYAN, Colors.CYAN, Colors.WHITE, Colors.YELLOW, Colors.OKGREEN, Colors.YELLOW, Colors.PURPLE,
+                 Colors.WHITE])
+    return regressions
+
+def create_benchmark_parser():
+    parser = argparse.ArgumentParser(
+        prog='Virtual_Memory_Simulator.py benchmark',
+        description='🏁 Benchmark de rendimiento con trazas sintéticas deterministas',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python epic_memory_sim.py benchmark --save-baseline bench.json
+  python epic_memory_sim.py benchmark --baseline bench.json --threshold 0.05
+  python epic_memory_sim.py benchmark --patterns zipf loop --size 1000000 --frames 64 1024
+        """
+    )
+    parser.add_argument('--patterns', nargs='+', choices=SYNTHETIC_PATTERNS, default=list(SYNTHETIC_PATTERNS),
+                        help='Patrones de acceso sintéticos (default: todos)')
+    parser.add_argument('--policies', nargs='+', choices=list(REPLACEMENT_POLICIES),
+                        default=list(REPLACEMENT_POLICIES),
+                        help='Políticas a medir (default: todas)')
+    parser.add_argument('--frames', nargs='+', type=int, default=[16, 128, 1024],
+                        help='Grilla de frames (default: 16 128 1024)')
+    parser.add_argument('--size', type=int, default=100000,
+                        help='Referencias por traza (default: 100000)')
+    parser.add_argument('--pages', type=int, default=4096,
+                        help='Páginas del working set de zipf, loop y phase (default: 4096)')
+    parser.add_argument('--write-ratio', type=float, default=0.3,
+                        help='Fracción de escrituras (default: 0.3)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Semilla del generador (default: 42)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Corridas medidas por configuración, tras una de calentamiento; se toma la más rápida (default: 5)')
+    parser.add_argument('--save-baseline', metavar='ARCHIVO',
+                        help='Guardar los resultados como línea base JSON')
+    parser.add_argument('--baseline', metavar='ARCHIVO',
+                        help='Comparar contra una línea base guardada')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Caída de refs/s tolerada frente a la línea base (default: 0.10)')
+    return parser
+
+def benchmark_main(argv):
+    """Subcomando benchmark: devuelve 1 si hay regresiones frente a la línea base"""
+    parser = create_benchmark_parser()
+    args = parser.parse_args(argv)
+    if args.size <= 0 or args.pages <= 0 or args.repeat <= 0:
+        parser.error('--size, --pages y --repeat deben ser positivos')
+    if not 0 <= args.write_ratio <= 1:
+        parser.error('--write-ratio debe estar en [0, 1]')
+    
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('format') != BENCHMARK_FORMAT:
+            parser.error(f"{args.baseline} no es una línea base de benchmark compatible")
+        # Misma carga de trabajo que la línea base
+        config = baseline['config']
+        args.size, args.pages, args.write_ratio, args.seed = (
+            config['size'], config['pages'], config['write_ratio'], config['seed'])
+    
+    print_banner()
+    print_section_header("CONFIGURACIÓN DEL BENCHMARK")
+    print(f"{Colors.BOLD}{Colors.CYAN}🧪 Patrones: {Colors.WHITE}{args.patterns}")
+    print(f"{Colors.CYAN}🔄 Políticas: {Colors.WHITE}{args.policies}")
+    print(f"{Colors.CYAN}🔢 Frames: {Colors.WHITE}{args.frames}")
+    print(f"{Colors.CYAN}📊 Referencias por traza: {Colors.WHITE}{args.size:,} ({args.pages:,} páginas, "
+          f"{args.write_ratio:.0%} escrituras, semilla {args.seed})")
+    print(f"{Colors.CYAN}🔁 Repeticiones: {Colors.WHITE}{args.repeat}{Colors.ENDC}")
+    
+    results, peak_rss = run_benchmark(args.patterns, args.policies, args.frames, args.size, args.pages,
+                                      args.write_ratio, args.seed, args.repeat)
+    
+    if args.save_baseline:
+        output_data = {
+            'format': BENCHMARK_FORMAT,
+            'timestamp': datetime.now().isoformat(),
+            'machine': platform.platform(),
+            'python': platform.python_version(),
+            'config': {
+                'size': args.size,
+                'pages': args.pages,
+                'write_ratio': args.write_ratio,
+                'seed': args.seed,
+                'repeat': args.repeat
+            },
+            'peak_rss_mb': peak_rss,
+            'results': results
+        }
+        with open(args.save_baseline, 'w') as f:
+            json.dump(output_data, f, indent=2)
+        print(f"{Colors.OKGREEN}💾 Línea base guardada en: {args.save_baseline}{Colors.ENDC}")
+    
+    if baseline is not None:
+        regressions = compare_benchmark(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{Colors.FAIL}❌ {regressions} configuraciones con regresión{Colors.ENDC}")
+            return 1
+        print(f"\n{Colors.OKGREEN}✅ Sin regresiones frente a la línea base{Colors.ENDC}")
+    return 0
+
 # Aprovechando Compi hice un parser de argumentos para la entrada de datos :D
 def create_arg_parser():
     parser = argparse.ArgumentParser(
@@ -469,28 +4737,220 @@ Ejemplos de uso:
   python epic_memory_sim.py trace.txt
   python epic_memory_sim.py trace.txt --frames 10 50 100 --policies FIFO LRU OPT
   python epic_memory_sim.py trace.txt --save-json results.json --realtime
+  python epic_memory_sim.py trace.txt --cache-trace
+  python epic_memory_sim.py trace.txt --policies LRU ARC CAR 2Q LIRS OPT
+  python epic_memory_sim.py trace.txt --frames 512 --policies LRU ARC --allocation ws --ws-window 20000
+  python epic_memory_sim.py trace.txt --policies LRU CFLRU WSCLOCK --write-queue 32 --cleaner-rate 8
+  python epic_memory_sim.py trace.txt.zst --stream --policies LRU CLOCK
+  capture-tool | python epic_memory_sim.py - --stream --policies FIFO LRU
+  python epic_memory_sim.py trace.txt --policies FIFO LRU LFU CLOCK OPT --jobs 8
+  python epic_memory_sim.py trace.txt --frames 1000 10000 --sample-rate 0.01
+  python epic_memory_sim.py trace.txt --tlb-entries 64 --tlb-ways 4 --pt-levels 4 --writeback-ns 10000000
+  python epic_memory_sim.py trace.txt --policies OPT LFU --checkpoint-dir ckpt --resume
+  python epic_memory_sim.py trace.txt --analytics --analytics-window 50000 --save-json results.json
+  python epic_memory_sim.py trace.txt --realtime --metrics-file /var/lib/node_exporter/vmsim.prom
+  python epic_memory_sim.py trace.txt --profile --profiler cprofile --save-json results.json
+  python epic_memory_sim.py trace.txt --page-size 4K 64K 2M --frames 16 256 --policies LRU CLOCK
+  python epic_memory_sim.py multi.txt --scope local --quota 64    (líneas "<dirección> <R|W> <asid>")
+  python epic_memory_sim.py benchmark --baseline bench.json    (ver benchmark --help)
+  python epic_memory_sim.py trace.txt --policies LRU ARC OPT --store
+  python epic_memory_sim.py compare trace_v1.txt trace_v2.txt    (ver compare --help)
+  python epic_memory_sim.py trace.txt --engine stack --policies LRU OPT --mrc --save-json mrc.json
         """
     )
     
-    parser.add_argument('trace_file', help='Archivo de traza de memoria')
+    parser.add_argument('trace_file',
+                        help='Archivo de traza de memoria (.gz, .bz2, .xz, .zst o "-" para stdin)')
     parser.add_argument('--frames', nargs='+', type=int, default=[10, 50, 100],
                         help='Número de frames a probar (default: 10 50 100)')
     parser.add_argument('--policies', nargs='+', default=['FIFO', 'LRU', 'OPT'],
-                        choices=['FIFO', 'LRU', 'LFU', 'CLOCK', 'OPT'],
+                        choices=list(REPLACEMENT_POLICIES),
                         help='Políticas de reemplazo a probar')
+    parser.add_argument('--page-size', nargs='+', type=parse_page_size, default=[BASE_PAGE_SIZE],
+                        metavar='TAMAÑO',
+                        help='Tamaños de página a comparar en la misma pasada: 4K 16K 64K 2M 1G... (default: 4K)')
     parser.add_argument('--save-json', help='Guardar resultados en archivo JSON')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, metavar='RUTA',
+                        help=f'Reutilizar y guardar resultados en un almacén SQLite (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Con --store, recalcular todas las configuraciones y sobrescribir las guardadas')
     parser.add_argument('--realtime', action='store_true',
-                        help='Mostrar estadísticas en tiempo real')
+                        help='Mostrar estadísticas en tiempo real (refs/s, hits, fallos y ETA)')
+    parser.add_argument('--realtime-interval', type=float, default=1.0,
+                        help='Segundos entre muestras del monitor (default: 1.0)')
+    parser.add_argument('--metrics-file', metavar='RUTA',
+                        help='Exportar las métricas en formato de texto de Prometheus a este archivo')
+    parser.add_argument('--metrics-socket', metavar='RUTA',
+                        help='Servir las métricas en formato de Prometheus por un socket UNIX')
+    parser.add_argument('--cache-trace', action='store_true',
+                        help='Reutilizar/guardar la traza decodificada en un sidecar .vmtrace')
+    parser.add_argument('--stream', action='store_true',
+                        help='Leer la traza por bloques (mmap o tubería de descompresión) sin cargarla en memoria (excepto OPT)')
+    parser.add_argument('--engine', choices=['sim', 'stack'], default='sim',
+                        help='Motor: simulación por configuración o distancias de pila para LRU/OPT (default: sim)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Procesos para simular configuraciones en paralelo (default: 1)')
+    parser.add_argument('--sample-rate', type=float,
+                        help='Simular solo una fracción R de las páginas (muestreo SHARDS) y estimar métricas')
+    parser.add_argument('--tlb-entries', type=int,
+                        help='Activar el modelo de TLB con N entradas (y tabla de páginas multinivel)')
+    parser.add_argument('--tlb-ways', type=int, default=4,
+                        help='Asociatividad del TLB (default: 4)')
+    parser.add_argument('--tlb-policy', choices=TLB_POLICIES, default='LRU',
+                        help='Política de reemplazo del TLB (default: LRU)')
+    parser.add_argument('--pt-levels', type=int, default=None,
+                        help='Niveles de la tabla de páginas radix (default: (48 - log2(tamaño de página)) // 9, '
+                             '4 con 4 KiB y 3 con 2 MiB)')
+    parser.add_argument('--pwc-entries', type=int, default=16,
+                        help='Entradas por nivel de la caché de recorrido, 0 la desactiva (default: 16)')
+    parser.add_argument('--mem-ns', type=float, default=100,
+                        help='Latencia de acceso a memoria en ns (default: 100)')
+    parser.add_argument('--fault-ns', type=float, default=10000000,
+                        help='Latencia de servicio de un fallo de página en ns (default: 10ms)')
+    parser.add_argument('--writeback-ns', type=float, default=0,
+                        help='Coste de escribir una página sucia expulsada en ns (default: 0)')
+    parser.add_argument('--tlb-ns', type=float, default=1,
+                        help='Latencia de consulta del TLB en ns (default: 1)')
+    parser.add_argument('--pwc-ns', type=float, default=2,
+                        help='Latencia de consulta de la caché de recorrido en ns (default: 2)')
+    parser.add_argument('--checkpoint-dir',
+                        help='Guardar checkpoints periódicos de cada simulación en este directorio')
+    parser.add_argument('--checkpoint-every', type=int, default=1000000,
+                        help='Referencias entre checkpoints (default: 1000000)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continuar desde los checkpoints de --checkpoint-dir')
+    parser.add_argument('--analytics', action='store_true',
+                        help='Calcular working set, distancias de reuso, strides y páginas calientes')
+    parser.add_argument('--analytics-window', type=int, default=10000,
+                        help='Ventana τ en referencias para W(t, τ) y el working set por proceso (default: 10000)')
+    parser.add_argument('--scope', choices=['global', 'local'],
+                        help='Reemplazo global o local por proceso (ASID de la tercera columna) con estadísticas por proceso')
+    parser.add_argument('--quota', type=int,
+                        help='Frames por proceso con --scope local (default: reparto equitativo)')
+    parser.add_argument('--allocation', choices=['fixed'] + list(ALLOCATION_MODES), default='fixed',
+                        help='Asignación fija o variable: working set (ws) o frecuencia de fallos (pff); '
+                             '--frames es el máximo (default: fixed)')
+    parser.add_argument('--ws-window', type=int, default=10000,
+                        help='Ventana τ en referencias de --allocation ws (default: 10000)')
+    parser.add_argument('--pff-threshold', type=int, default=1000,
+                        help='Referencias entre fallos por encima de las que --allocation pff reduce el conjunto (default: 1000)')
+    parser.add_argument('--write-queue', type=int, metavar='N',
+                        help='Modelar la escritura de páginas sucias con una cola de N escrituras en vuelo')
+    parser.add_argument('--device-latency-ns', type=float, default=100000,
+                        help='Latencia de una escritura en el dispositivo en ns (default: 100000)')
+    parser.add_argument('--device-bandwidth', type=float, default=200,
+                        help='Ancho de banda de escritura del dispositivo en MB/s (default: 200)')
+    parser.add_argument('--cleaner-rate', type=int, default=0,
+                        help='Páginas sucias que escribe el limpiador en cada despertar (default: 0, sin limpiador)')
+    parser.add_argument('--cleaner-interval', type=int, default=1000,
+                        help='Referencias entre despertares del limpiador (default: 1000)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Medir tiempo por fase, selección de víctima y latencia de fallos')
+    parser.add_argument('--profiler', choices=['cprofile', 'sample'],
+                        help='Envolver la ejecución en cProfile o en un perfilador por muestreo (implica --profile)')
+    parser.add_argument('--mrc', action='store_true',
+                        help='Con --engine stack, calcular la curva de fallos completa (1..N frames)')
     
     return parser
 
-def main():
+def build_simulation_options(args):
+    """Traduce los argumentos de línea de comandos a SimulationOptions"""
+    timings = MemoryTimings(args.mem_ns, args.fault_ns, args.writeback_ns, args.tlb_ns, args.pwc_ns)
+    translation = None
+    if args.tlb_entries:
+        translation = TranslationConfig(args.tlb_entries, args.tlb_ways, args.tlb_policy,
+                                        args.pt_levels, 9, args.pwc_entries)
+    checkpoint = None
+    if args.checkpoint_dir:
+        checkpoint = CheckpointConfig(args.checkpoint_dir, args.checkpoint_every, args.resume, args.trace_file)
+    profile = PhaseTimer() if args.profile else None
+    address_spaces = None
+    if args.scope:
+        address_spaces = AddressSpaceConfig(args.scope, args.quota, ws_window=args.analytics_window)
+    allocation = None
+    if args.allocation != 'fixed':
+        allocation = AllocationConfig(args.allocation, args.ws_window, args.pff_threshold)
+    writeback = None
+    if args.write_queue:
+        writeback = WritebackConfig(args.write_queue, args.device_latency_ns, args.device_bandwidth * 1024 * 1024,
+                                    args.cleaner_rate, args.cleaner_interval)
+    return SimulationOptions(args.sample_rate, timings, translation, checkpoint, profile, address_spaces,
+                             allocation, writeback)
+
+def profiler_output_path(args):
+    """Archivo del perfilador junto al JSON de resultados (o en el directorio actual)"""
+    base = os.path.splitext(args.save_json)[0] if args.save_json else 'vmsim_profile'
+    return base + ('.prof' if args.profiler == 'cprofile' else '.folded')
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'benchmark':
+        return benchmark_main(argv[1:])
+    if argv and argv[0] == 'compare':
+        return compare_main(argv[1:])
+    
     parser = create_arg_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    args.page_sizes = sorted(set(args.page_size))
+    if args.sample_rate is not None and not 0 < args.sample_rate <= 1:
+        parser.error('--sample-rate debe estar en (0, 1]')
+    if args.jobs <= 0:
+        parser.error('--jobs debe ser positivo')
+    if args.checkpoint_every <= 0:
+        parser.error('--checkpoint-every debe ser positivo')
+    if args.mrc and args.engine != 'stack':
+        parser.error('--mrc necesita --engine stack')
+    if args.resume and not args.checkpoint_dir:
+        parser.error('--resume necesita --checkpoint-dir')
+    if args.realtime_interval <= 0:
+        parser.error('--realtime-interval debe ser positivo')
+    if args.metrics_socket and not hasattr(socket, 'AF_UNIX'):
+        parser.error('--metrics-socket necesita sockets UNIX')
+    if args.profiler:
+        args.profile = True
+    if args.scope and args.sample_rate is not None:
+        parser.error('--scope no se puede combinar con --sample-rate')
+    if args.quota is not None and args.scope != 'local':
+        parser.error('--quota necesita --scope local')
+    if args.quota is not None and args.quota <= 0:
+        parser.error('--quota debe ser positivo')
+    if args.allocation != 'fixed' and (args.scope or args.sample_rate is not None):
+        parser.error('--allocation ws/pff no se puede combinar con --scope ni con --sample-rate')
+    if args.ws_window <= 0 or args.pff_threshold <= 0:
+        parser.error('--ws-window y --pff-threshold deben ser positivos')
+    if args.write_queue is not None:
+        if args.write_queue <= 0:
+            parser.error('--write-queue debe ser positivo')
+        if args.scope or args.sample_rate is not None or args.allocation != 'fixed':
+            parser.error('--write-queue no se puede combinar con --scope, --sample-rate ni --allocation ws/pff')
+        if args.engine == 'stack':
+            parser.error('--write-queue necesita --engine sim (el motor de pila no modela escrituras)')
+        if args.device_latency_ns < 0 or args.device_bandwidth <= 0:
+            parser.error('--device-latency-ns no puede ser negativo y --device-bandwidth debe ser positivo')
+        if args.cleaner_rate < 0 or args.cleaner_interval <= 0:
+            parser.error('--cleaner-rate no puede ser negativo y --cleaner-interval debe ser positivo')
+    elif args.cleaner_rate:
+        parser.error('--cleaner-rate necesita --write-queue')
+    if args.scope == 'local' and any(policy in ('WSCLOCK', 'CFLRU') for policy in args.policies):
+        parser.error('WSCLOCK y CFLRU consultan los bits de sucio globales: no admiten --scope local')
+    if args.scope == 'local' and args.quota is None and args.stream and args.jobs == 1:
+        parser.error('--scope local con --stream necesita --quota (no se conoce el número de procesos)')
+    if args.refresh and not args.store:
+        parser.error('--refresh necesita --store')
+    if args.trace_file == STDIN_TRACE:
+        if args.cache_trace:
+            parser.error('--cache-trace necesita un archivo de traza, no stdin')
+        if args.store:
+            parser.error('--store indexa por el hash del archivo de traza: no admite stdin')
+        if args.stream and args.jobs == 1 and (args.engine == 'stack' or any(
+                REPLACEMENT_POLICIES[policy].requires_trace for policy in args.policies)):
+            parser.error('stdin se lee una sola vez: con --stream no admite OPT ni --engine stack')
+    elif trace_compression(args.trace_file) == 'zstd' and zstandard is None:
+        parser.error('las trazas .zst necesitan el paquete zstandard (pip install zstandard)')
     
     print_banner()
     
-    if not os.path.exists(args.trace_file):
+    if args.trace_file != STDIN_TRACE and not os.path.exists(args.trace_file):
         print(f"{Colors.FAIL}❌ Error: El archivo {args.trace_file} no existe{Colors.ENDC}")
         return 1
     
@@ -498,19 +4958,80 @@ def main():
     print(f"{Colors.BOLD}{Colors.CYAN}📁 Archivo de traza: {Colors.WHITE}{args.trace_file}")
     print(f"{Colors.CYAN}🔢 Frames a probar: {Colors.WHITE}{args.frames}")
     print(f"{Colors.CYAN}🔄 Políticas: {Colors.WHITE}{args.policies}")
+    print(f"{Colors.CYAN}📐 Tamaño de página: {Colors.WHITE}{[format_page_size(size) for size in args.page_sizes]}")
     if args.save_json:
         print(f"{Colors.CYAN}💾 Guardar en: {Colors.WHITE}{args.save_json}")
-    print(f"{Colors.CYAN}⏱️  Tiempo real: {Colors.WHITE}{'Sí' if args.realtime else 'No'}{Colors.ENDC}")
+    if args.store:
+        print(f"{Colors.CYAN}🗄️  Almacén: {Colors.WHITE}{args.store}{' (recalcular)' if args.refresh else ''}")
+    print(f"{Colors.CYAN}⏱️  Tiempo real: {Colors.WHITE}{'Sí' if args.realtime else 'No'}")
+    print(f"{Colors.CYAN}🌊 Lectura por bloques: {Colors.WHITE}{'Sí' if args.stream else 'No'}")
+    print(f"{Colors.CYAN}⚙️  Motor: {Colors.WHITE}{args.engine}")
+    print(f"{Colors.CYAN}🧵 Procesos: {Colors.WHITE}{args.jobs}")
+    print(f"{Colors.CYAN}🎲 Muestreo: {Colors.WHITE}{args.sample_rate if args.sample_rate else 'No'}")
+    levels_text = args.pt_levels or ', '.join(str(page_table_levels(size)) for size in args.page_sizes)
+    tlb_text = f"{args.tlb_entries} entradas, {args.tlb_ways} vías, {args.tlb_policy}, {levels_text} niveles" if args.tlb_entries else 'No'
+    print(f"{Colors.CYAN}🗂️  TLB: {Colors.WHITE}{tlb_text}{Colors.ENDC}")
+    if args.scope:
+        quota_text = f", cuota {args.quota} frames" if args.quota else ""
+        print(f"{Colors.CYAN}🧩 Reemplazo por proceso: {Colors.WHITE}{args.scope}{quota_text}{Colors.ENDC}")
+    if args.allocation != 'fixed':
+        parameter = f"τ = {args.ws_window}" if args.allocation == 'ws' else f"T = {args.pff_threshold}"
+        print(f"{Colors.CYAN}📈 Asignación variable: {Colors.WHITE}{args.allocation.upper()} ({parameter}){Colors.ENDC}")
+    if args.write_queue:
+        cleaner = (f"limpiador {args.cleaner_rate} páginas/{args.cleaner_interval:,} refs" if args.cleaner_rate
+                   else "sin limpiador")
+        print(f"{Colors.CYAN}💽 Escritura diferida: {Colors.WHITE}cola {args.write_queue}, "
+              f"{args.device_latency_ns / 1e3:g} µs, {args.device_bandwidth:g} MB/s, {cleaner}{Colors.ENDC}")
     
     # Procesar archivo
+    miss_ratio_curves = {} if args.mrc else None
+    analytics = TraceAnalytics(args.analytics_window) if args.analytics else None
+    exporters = []
+    if args.metrics_file:
+        exporters.append(MetricsFileExporter(args.metrics_file))
+    if args.metrics_socket:
+        exporters.append(MetricsSocketExporter(args.metrics_socket))
+    reporter = LiveReporter(args.realtime_interval, args.realtime, exporters)
+    options = build_simulation_options(args)
+    store = ResultsStore(args.store, args.refresh) if args.store else None
+    
+    profiler = None
+    if args.profiler == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif args.profiler == 'sample':
+        profiler = SamplingProfiler()
+        profiler.start()
+    
     start_total = time.time()
     results = process_trace_file_advanced(
         args.trace_file, 
         args.frames, 
         args.policies, 
-        args.realtime
+        args.realtime,
+        args.cache_trace,
+        args.stream,
+        args.engine,
+        miss_ratio_curves,
+        args.jobs,
+        options,
+        analytics,
+        reporter,
+        args.page_sizes,
+        store
     )
     total_time = time.time() - start_total
+    if store is not None:
+        store.close()
+    
+    profiler_path = None
+    if profiler is not None:
+        if args.profiler == 'cprofile':
+            profiler.disable()
+        else:
+            profiler.stop()
+        profiler_path = profiler_output_path(args)
+        profiler.dump_stats(profiler_path)
     
     print_final_comparison(results)
     
@@ -520,8 +5041,20 @@ def main():
     print(f"{Colors.PURPLE}🔢 Simulaciones completadas: {Colors.WHITE}{len(results)}")
     print(f"{Colors.PURPLE}⚡ Promedio por simulación: {Colors.WHITE}{total_time/len(results):.2f} segundos{Colors.ENDC}")
     
+    if options.profile is not None:
+        print_profile(results, options.profile)
+    if profiler_path:
+        print(f"{Colors.OKGREEN}🔬 Perfil ({args.profiler}) guardado en: {profiler_path}{Colors.ENDC}")
+    
     if args.save_json:
-        save_results_json(results, args.save_json)
+        extra = {}
+        if miss_ratio_curves:
+            extra['miss_ratio_curves'] = miss_ratio_curves
+        if analytics is not None:
+            extra['analytics'] = analytics.summary()
+        if options.profile is not None:
+            extra['profile'] = {'phases': options.profile.summary(), 'profiler_output': profiler_path}
+        save_results_json(results, args.save_json, extra)
     
     print(f"\n{Colors.BOLD}{Colors.OKGREEN}🎉 ¡SIMULACIÓN COMPLETADA EXITOSAMENTE! 🎉{Colors.ENDC}")
     return 0
@@ -531,6 +5064,7 @@ if __name__ == "__main__":
         exit_code = main()
         sys.exit(exit_code)
     except KeyboardInterrupt:
+        flush_checkpoints()
         print(f"\n{Colors.WARNING}⚠️  Simulación interrumpida por el usuario{Colors.ENDC}")
         sys.exit(1)
     except Exception as e:
@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Virtual_Memory_Simulator as vms
+
+
+def zipf_pages(count, universe, seed):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(universe)]
+    return array('Q', rng.choices(range(universe), weights, k=count))
+
+def analyze(pages, chunk_size, **kwargs):
+    analytics = vms.TraceAnalytics(**kwargs)
+    for start in range(0, len(pages), chunk_size):
+        analytics.process_batch(pages[start:start + chunk_size])
+    return analytics.summary()
+
+
+class ReuseDistanceTest(unittest.TestCase):
+    def test_unsampled_matches_lru_stack_distances(self):
+        pages = zipf_pages(50000, 5000, 1)
+        hist, cold_misses, _ = vms.lru_stack_histogram(pages)
+        expected = {}
+        for distance, count in enumerate(hist):
+            if count:
+                bucket = distance.bit_length()
+                label = f"{1 << (bucket - 1)}-{(1 << bucket) - 1}"
+                expected[label] = expected.get(label, 0) + count
+        
+        summary = analyze(pages, 4096, reuse_sample_rate=1.0, reuse_max_pages=len(pages))
+        self.assertEqual(summary['reuse_distance_log2'], expected)
+        self.assertEqual(summary['reuse_cold'], cold_misses)
+
+    def test_fixed_size_sampling_tracks_total(self):
+        # Sin páginas muy calientes la varianza del muestreo espacial es baja
+        rng = random.Random(2)
+        pages = array('Q', (rng.randrange(20000) for _ in range(100000)))
+        summary = analyze(pages, 65536, reuse_max_pages=512)
+        self.assertLess(summary['reuse_sample_rate'], 0.1)
+        estimated = sum(summary['reuse_distance_log2'].values()) + summary['reuse_cold']
+        self.assertAlmostEqual(estimated / len(pages), 1, delta=0.1)
+
+    def test_independent_of_chunk_size(self):
+        pages = zipf_pages(60000, 8000, 3)
+        reference = analyze(pages, 65536, reuse_max_pages=256)
+        for chunk_size in (1, 7777):
+            summary = analyze(pages, chunk_size, reuse_max_pages=256)
+            for key in ('reuse_distance_log2', 'reuse_cold', 'reuse_sample_rate', 'stride_log2', 'working_set'):
+                self.assertEqual(summary[key], reference[key], (key, chunk_size))
+
+
+class HeavyHittersTest(unittest.TestCase):
+    def test_independent_of_chunk_size(self):
+        pages = zipf_pages(80000, 10000, 4)
+        reference = analyze(pages, 65536)['heavy_hitters']
+        for chunk_size in (1, 7777, 4096):
+            self.assertEqual(analyze(pages, chunk_size)['heavy_hitters'], reference, chunk_size)
+
+    def test_counts_bound_true_frequency(self):
+        pages = zipf_pages(80000, 10000, 5)
+        true_counts = {}
+        for page_num in pages:
+            true_counts[page_num] = true_counts.get(page_num, 0) + 1
+        heavy = analyze(pages, 7777, heavy_hitters=32)['heavy_hitters']
+        slack = len(pages) / 33
+        for entry in heavy:
+            true_count = true_counts[entry['page']]
+            self.assertLessEqual(entry['min_count'], true_count)
+            self.assertGreaterEqual(entry['min_count'], true_count - slack)
+            self.assertGreaterEqual(entry['estimated_count'], true_count)
+        # Toda página con más de n / (k + 1) accesos sigue en el resumen
+        frequent = {page for page, count in true_counts.items() if count > slack}
+        self.assertLessEqual(frequent, {entry['page'] for entry in heavy})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Virtual_Memory_Simulator as vms
+
+
+def make_trace(pages, seed=0):
+    """Traza decodificada con escrituras aleatorias"""
+    rng = random.Random(seed)
+    ops = bytes(rng.randrange(256) for _ in range((len(pages) + 7) >> 3))
+    return vms.DecodedTrace(array('Q', pages), ops)
+
+def simulated_faults(trace, frames, policy):
+    manager = vms.create_manager(frames, policy)
+    vms.run_configuration(manager, trace, frames, policy, verbose=False)
+    return manager.get_statistics()['page_faults']
+
+
+class StackEngineTest(unittest.TestCase):
+    FRAMES = [1, 2, 3, 7, 16, 33, 64, 65, 150]
+
+    def traces(self):
+        rng = random.Random(42)
+        weights = [1 / (rank + 1) for rank in range(300)]
+        yield make_trace(rng.choices(range(300), weights, k=6000), 1)
+        yield make_trace([rng.randrange(120) for _ in range(4000)], 2)
+        yield make_trace([pos % 70 for pos in range(3000)], 3)
+
+    def check_policy(self, policy):
+        for trace in self.traces():
+            for miss_ratio_curve in (False, True):
+                results, curve = vms.run_stack_engine(trace, policy, self.FRAMES, miss_ratio_curve)
+                for frames, stats in zip(self.FRAMES, results):
+                    expected = simulated_faults(trace, frames, policy)
+                    self.assertEqual(stats['page_faults'], expected, (policy, frames, miss_ratio_curve))
+                    if curve is not None and frames <= len(curve):
+                        self.assertAlmostEqual(curve[frames - 1] * trace.count, expected)
+
+    def test_lru_matches_simulation(self):
+        self.check_policy('LRU')
+
+    def test_opt_matches_simulation(self):
+        self.check_policy('OPT')
+
+
+if __name__ == '__main__':
+    unittest.main()